@@ -0,0 +1,643 @@
+#!/usr/bin/env python
+"""
+Benchmarks for the PIM platform.
+
+Usage (from the project root):
+    PYTHONPATH=src python scripts/benchmark.py <benchmark> [options]
+
+Run with --help to list the available benchmarks.
+"""
+
+import argparse
+import gc
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from pim.core import (
+    EsbocoQuantis,
+    ListaNotas,
+    achatar,
+    calcular_media,
+    calcular_mediana,
+    calcular_medianas,
+    calcular_medias,
+    calcular_moda,
+    calcular_modas,
+    calcular_percentil,
+    descrever,
+)
+from pim.data import disciplinas
+from pim.io import (
+    DURABILITY_LEVELS,
+    Aluno,
+    ColunasNotas,
+    JsonStorage,
+    ShardedStorage,
+    SqliteStorage,
+    StudentCache,
+    StudentRegistry,
+    carregar_dados,
+    exportar_dados,
+    get_cache_path,
+    importar_csv,
+    iterar_alunos,
+    repartir,
+    salvar_colunas,
+    salvar_dados,
+    verificar_dados,
+)
+
+
+def gerar_alunos(quantidade: int, semente: int = 42) -> List[Aluno]:
+    """
+    Build a synthetic roster.
+
+    About half of the students have taken a few evaluations, with grades in
+    the 0-10 range produced by 10-question quizzes.
+
+    Args:
+        quantidade: Number of students.
+        semente: Random seed, so runs are comparable.
+
+    Returns:
+        List of Aluno objects.
+    """
+    rng = random.Random(semente)
+    alunos = []
+    for i in range(quantidade):
+        aluno = Aluno(nome=f"Aluno {i}", email=f"aluno{i}@example.com", senha=f"s{i}")
+        if rng.random() < 0.5:
+            for disciplina in rng.sample(disciplinas, 2):
+                aluno.notas[disciplina].extend(
+                    rng.randint(0, 10) * 10 / 10 for _ in range(3)
+                )
+        alunos.append(aluno)
+    return alunos
+
+
+def bench_memoria(args: argparse.Namespace) -> None:
+    """Measure the memory held by each resident student."""
+    gc.collect()
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    alunos = gerar_alunos(args.alunos)
+    depois = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"Alunos: {len(alunos)}")
+    print(f"Bytes por aluno: {(depois - antes) / len(alunos):.0f}")
+
+
+def cronometrar(funcao: Callable[[], object]) -> float:
+    """Run a function once and return the elapsed wall time in seconds."""
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio
+
+
+def bench_carregar(args: argparse.Namespace) -> None:
+    """Compare JSON parsing with loads served by the binary cache."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "alunos.json")
+        salvar_dados(gerar_alunos(args.alunos), path)
+
+        json_puro = cronometrar(lambda: carregar_dados(path, usar_cache=False))
+        frio = cronometrar(lambda: carregar_dados(path, usar_cache=True))
+        quente = cronometrar(lambda: carregar_dados(path, usar_cache=True))
+
+        print(f"Alunos: {args.alunos}")
+        print(f"JSON: {os.path.getsize(path) / 1e6:.1f} MB")
+        print(f"Cache: {get_cache_path(path).stat().st_size / 1e6:.1f} MB")
+        print(f"Sem cache:           {json_puro:.3f} s")
+        print(f"Cache frio (criar):  {frio:.3f} s")
+        print(f"Cache quente:        {quente:.3f} s")
+
+
+def pico_memoria(funcao: Callable[[], object]) -> float:
+    """Run a function once and return its peak traced memory in MB."""
+    gc.collect()
+    tracemalloc.start()
+    funcao()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return pico / 1e6
+
+
+def bench_streaming(args: argparse.Namespace) -> None:
+    """Compare the peak memory of a full load with the streaming loader."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "alunos.json")
+        salvar_dados(gerar_alunos(args.alunos), path)
+
+        def contar_notas() -> int:
+            return sum(
+                len(notas)
+                for aluno in iterar_alunos(path)
+                for notas in aluno.notas.values()
+            )
+
+        print(f"Alunos: {args.alunos}")
+        print(f"JSON: {os.path.getsize(path) / 1e6:.1f} MB")
+        print(
+            "carregar_dados: "
+            f"{pico_memoria(lambda: carregar_dados(path, usar_cache=False)):.1f} MB"
+        )
+        print(f"iterar_alunos:  {pico_memoria(contar_notas):.1f} MB")
+        print(f"Tempo iterar_alunos: {cronometrar(contar_notas):.3f} s")
+
+
+def bench_jsonl(args: argparse.Namespace) -> None:
+    """Compare JSON, JSON Lines and parallel JSON Lines loads."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        alunos = gerar_alunos(args.alunos)
+        path_json = os.path.join(tmpdir, "alunos.json")
+        path_jsonl = os.path.join(tmpdir, "alunos.jsonl")
+        salvar_dados(alunos, path_json)
+        salvar_dados(alunos, path_jsonl)
+        del alunos
+
+        print(f"Alunos: {args.alunos} (CPUs: {os.cpu_count()})")
+        tempo = cronometrar(lambda: carregar_dados(path_json, usar_cache=False))
+        print(f"JSON:                   {tempo:.3f} s")
+        for processos in (1, 2, 4, 8):
+            tempo = cronometrar(
+                lambda: carregar_dados(path_jsonl, False, processos=processos)
+            )
+            print(f"JSONL, {processos} processo(s):   {tempo:.3f} s")
+
+
+def bench_salvar(args: argparse.Namespace) -> None:
+    """Compare the indented and the fast save layouts at several roster sizes."""
+    tamanhos = [args.alunos] if args.alunos_informado else [10_000, 100_000, 1_000_000]
+    print(f"{'Alunos':>10} {'Modo':>8} {'Tempo (s)':>10} {'Tamanho (MB)':>13}")
+    for quantidade in tamanhos:
+        alunos = gerar_alunos(quantidade)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            for modo, rapido in (("pretty", False), ("fast", True)):
+                tempo = cronometrar(lambda: salvar_dados(alunos, path, rapido=rapido))
+                tamanho = os.path.getsize(path) / 1e6
+                print(f"{quantidade:>10} {modo:>8} {tempo:>10.3f} {tamanho:>13.1f}")
+        del alunos
+
+
+def bench_durabilidade(args: argparse.Namespace) -> None:
+    """Measure save throughput at each durability level."""
+    quantidade = args.alunos if args.alunos_informado else 1_000
+    operacoes = 200
+    alunos = gerar_alunos(quantidade)
+    print(f"{quantidade} alunos, {operacoes} notas por medição")
+    print(f"{'Modo':>8} {'Nível':>8} {'Notas/s':>10}")
+    for modo in ("json", "journal"):
+        for nivel in DURABILITY_LEVELS:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                path = os.path.join(tmpdir, "alunos.json")
+                salvar_dados(alunos, path)
+                storage = JsonStorage(
+                    path, journal=modo == "journal", durabilidade=nivel
+                )
+
+                def registrar() -> None:
+                    for i in range(operacoes):
+                        aluno = alunos[i % quantidade]
+                        storage.registrar_nota(aluno, disciplinas[0], 5.0, alunos)
+                    storage.fechar()
+
+                tempo = cronometrar(registrar)
+            print(f"{modo:>8} {nivel:>8} {operacoes / tempo:>10.0f}")
+
+
+def _escritor(path: str, journal: bool, operacoes: int, semente: int) -> None:
+    """Give grades to random students, like one of several pim processes."""
+    rng = random.Random(semente)
+    storage = JsonStorage(path, journal=journal)
+    alunos = StudentRegistry()
+    alunos.load(storage.carregar())
+    for _ in range(operacoes):
+        aluno = alunos[rng.randrange(len(alunos))]
+        aluno.notas[disciplinas[0]].append(5.0)
+        storage.registrar_nota(aluno, disciplinas[0], 5.0, alunos)
+
+
+def bench_concorrencia(args: argparse.Namespace) -> None:
+    """Measure throughput and lost grades with several writer processes."""
+    quantidade = args.alunos if args.alunos_informado else 1_000
+    operacoes = 50
+    print(f"{quantidade} alunos, {operacoes} notas por processo")
+    print(f"{'Modo':>8} {'Processos':>10} {'Notas/s':>10} {'Perdidas':>9}")
+    for modo in ("json", "journal"):
+        for processos in (1, 2, 4):
+            with tempfile.TemporaryDirectory() as tmpdir:
+                path = os.path.join(tmpdir, "alunos.json")
+                alunos = gerar_alunos(quantidade)
+                salvar_dados(alunos, path)
+                antes = sum(len(a.notas[disciplinas[0]]) for a in alunos)
+
+                escritores = [
+                    multiprocessing.Process(
+                        target=_escritor,
+                        args=(path, modo == "journal", operacoes, semente),
+                    )
+                    for semente in range(processos)
+                ]
+
+                def executar() -> None:
+                    for escritor in escritores:
+                        escritor.start()
+                    for escritor in escritores:
+                        escritor.join()
+
+                tempo = cronometrar(executar)
+                depois = sum(len(a.notas[disciplinas[0]]) for a in carregar_dados(path))
+                perdidas = antes + processos * operacoes - depois
+                total = processos * operacoes
+                print(f"{modo:>8} {processos:>10} {total / tempo:>10.0f} {perdidas:>9}")
+
+
+def bench_shards(args: argparse.Namespace) -> None:
+    """Compare the cost of a write in a single file and in a sharded directory."""
+    tamanhos = [args.alunos] if args.alunos_informado else [1_000, 10_000, 100_000]
+    operacoes = 5
+    print(f"{'Alunos':>10} {'Layout':>8} {'Escrita (ms)':>13} {'Carga (s)':>10}")
+    for quantidade in tamanhos:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            arquivo = os.path.join(tmpdir, "alunos.json")
+            salvar_dados(gerar_alunos(quantidade), arquivo)
+            repartir(arquivo, os.path.join(tmpdir, "alunos"), shards=16)
+            for layout, storage in (
+                ("arquivo", JsonStorage(arquivo)),
+                ("shards", ShardedStorage(os.path.join(tmpdir, "alunos"))),
+            ):
+                storage.carregar()  # builds the caches
+                carga = cronometrar(storage.carregar)
+                alunos = storage.carregar()
+
+                def escrever() -> None:
+                    for i in range(operacoes):
+                        aluno = alunos[i]
+                        aluno.notas[disciplinas[0]].append(5.0)
+                        storage.registrar_nota(aluno, disciplinas[0], 5.0, alunos)
+
+                escrita = cronometrar(escrever) / operacoes * 1000
+                print(f"{quantidade:>10} {layout:>8} {escrita:>13.1f} {carga:>10.3f}")
+                del alunos
+
+
+def bench_residencia(args: argparse.Namespace) -> None:
+    """Compare the memory of a full SQLite load with a bounded working set."""
+    capacidade = 1000
+    with tempfile.TemporaryDirectory() as tmpdir:
+        storage = SqliteStorage(os.path.join(tmpdir, "alunos.db"))
+        storage.salvar(gerar_alunos(args.alunos))
+        emails = [f"aluno{i}@example.com" for i in range(args.alunos)]
+        ativos = random.Random(7).sample(emails, min(len(emails), 5 * capacidade))
+
+        def carregar_tudo() -> None:
+            alunos = StudentRegistry(storage.carregar())
+            for email in ativos:
+                alunos.get(email)
+
+        def carregar_sob_demanda() -> None:
+            alunos = StudentCache(storage, capacidade)
+            for email in ativos:
+                alunos.get(email)
+
+        print(f"{'Modo':>16} {'Pico (MB)':>10} {'Tempo (s)':>10}")
+        for modo, funcao in (
+            ("completo", carregar_tudo),
+            (f"residentes={capacidade}", carregar_sob_demanda),
+        ):
+            tempo = cronometrar(funcao)
+            print(f"{modo:>16} {pico_memoria(funcao):>10.1f} {tempo:>10.2f}")
+        storage.fechar()
+
+
+def bench_colunas(args: argparse.Namespace) -> None:
+    """Compare cohort statistics over the JSON roster and the grade columns."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "alunos.json")
+        colunas = os.path.join(tmpdir, "alunos.json.notas")
+        alunos = gerar_alunos(args.alunos)
+        salvar_dados(alunos, path)
+        salvar_colunas(alunos, colunas)
+        del alunos
+
+        def estatisticas_json() -> None:
+            alunos = carregar_dados(path, usar_cache=False)
+            for disciplina in disciplinas:
+                notas = [n for aluno in alunos for n in aluno.notas[disciplina]]
+                calcular_media(notas)
+                calcular_mediana(notas)
+
+        def estatisticas_colunas() -> None:
+            with ColunasNotas(colunas) as arquivo:
+                for disciplina in disciplinas:
+                    notas = arquivo.notas(disciplina)
+                    calcular_media(notas)
+                    calcular_mediana(notas)
+                    del notas
+
+        print(f"Alunos: {args.alunos}")
+        print(f"JSON: {os.path.getsize(path) / 1e6:.1f} MB")
+        print(f"Colunas: {os.path.getsize(colunas) / 1e6:.1f} MB")
+        print(f"{'Origem':>8} {'Tempo (s)':>10} {'Pico (MB)':>10}")
+        for origem, funcao in (
+            ("json", estatisticas_json),
+            ("colunas", estatisticas_colunas),
+        ):
+            tempo = cronometrar(funcao)
+            print(f"{origem:>8} {tempo:>10.3f} {pico_memoria(funcao):>10.1f}")
+
+
+def bench_notas(args: argparse.Namespace) -> None:
+    """Compare grades kept as float lists and as two-byte grade codes."""
+    rng = random.Random(42)
+    quantidade = args.alunos * 10
+    resultados = [(rng.randint(0, 7), 7) for _ in range(quantidade)]
+
+    def medir(construir: Callable[[], Any]) -> Tuple[Any, float]:
+        gc.collect()
+        tracemalloc.start()
+        notas = construir()
+        memoria = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return notas, memoria / quantidade
+
+    floats, bytes_floats = medir(lambda: [a * 10 / t for a, t in resultados])
+    codigos, bytes_codigos = medir(lambda: ListaNotas(floats))
+
+    print(f"Notas: {quantidade}")
+    print(f"{'Formato':>8} {'Bytes/nota':>11} {'Moda (s)':>9}")
+    for formato, notas, tamanho in (
+        ("float", floats, bytes_floats),
+        ("codigo", codigos, bytes_codigos),
+    ):
+        moda = cronometrar(lambda: calcular_moda(notas))
+        print(f"{formato:>8} {tamanho:>11.1f} {moda:>9.3f}")
+
+
+def bench_compressao(args: argparse.Namespace) -> None:
+    """Compare save and load times and file sizes of plain and compressed files."""
+    alunos = gerar_alunos(args.alunos)
+    print(f"Alunos: {args.alunos}")
+    print(
+        f"{'Arquivo':>14} {'Tamanho (MB)':>13} {'Salvar (s)':>11} "
+        f"{'Carregar (s)':>13} {'Pico (MB)':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for nome in ("alunos.json", "alunos.json.gz", "alunos.json.xz"):
+            path = os.path.join(tmpdir, nome)
+            salvar = cronometrar(lambda: salvar_dados(alunos, path))
+            carregar = cronometrar(lambda: carregar_dados(path, usar_cache=False))
+            pico = pico_memoria(lambda: sum(1 for _ in iterar_alunos(path)))
+            print(
+                f"{nome:>14} {os.path.getsize(path) / 1e6:>13.1f} {salvar:>11.2f} "
+                f"{carregar:>13.2f} {pico:>10.1f}"
+            )
+
+
+def bench_verificar(args: argparse.Namespace) -> None:
+    """Measure the verification throughput of each layout."""
+    alunos = gerar_alunos(args.alunos)
+    print(f"Alunos: {args.alunos}")
+    print(f"{'Formato':>10} {'Tamanho (MB)':>13} {'Tempo (s)':>10} {'MB/s':>7}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for formato, nome, rapido in (
+            ("indentado", "alunos.json", False),
+            ("rapido", "alunos.json", True),
+            ("jsonl", "alunos.jsonl", True),
+            ("indent.gz", "alunos.json.gz", False),
+            ("rapido.gz", "alunos.json.gz", True),
+        ):
+            path = os.path.join(tmpdir, nome)
+            salvar_dados(alunos, path, rapido=rapido)
+            tamanho = os.path.getsize(path) / 1e6
+            tempo = cronometrar(lambda: verificar_dados(path))
+            print(
+                f"{formato:>10} {tamanho:>13.1f} {tempo:>10.2f} {tamanho / tempo:>7.0f}"
+            )
+
+
+def bench_importar(args: argparse.Namespace) -> None:
+    """Measure a bulk CSV import into each storage backend."""
+    quantidade = args.alunos if args.alunos_informado else 500_000
+    print(f"Linhas: {quantidade} (1% de emails repetidos)")
+    print(f"{'Backend':>10} {'Tempo (s)':>10} {'Linhas/s':>10}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        arquivo = os.path.join(tmpdir, "turma.csv")
+        with open(arquivo, "w", encoding="utf-8") as csv:
+            csv.write("nome,email,senha\n")
+            for i in range(quantidade):
+                numero = i - 1 if i % 100 == 99 else i
+                csv.write(f"Aluno {i},aluno{numero}@example.com,s{i}\n")
+
+        for backend, abrir in (
+            ("json", lambda: JsonStorage(os.path.join(tmpdir, "alunos.json"))),
+            ("jsonl", lambda: JsonStorage(os.path.join(tmpdir, "alunos.jsonl"))),
+            (
+                "journal",
+                lambda: JsonStorage(os.path.join(tmpdir, "journal.json"), journal=True),
+            ),
+            ("sqlite", lambda: SqliteStorage(os.path.join(tmpdir, "alunos.db"))),
+        ):
+            with abrir() as storage:
+                tempo = cronometrar(lambda: importar_csv(arquivo, storage))
+            print(f"{backend:>10} {tempo:>10.2f} {quantidade / tempo:>10.0f}")
+
+
+def bench_exportar(args: argparse.Namespace) -> None:
+    """Measure the time and peak memory of exporting every grade."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "alunos.jsonl")
+        salvar_dados(gerar_alunos(args.alunos), path)
+        print(f"Alunos: {args.alunos}")
+        print(f"{'Formato':>8} {'Linhas':>9} {'Tempo (s)':>10} {'Pico (MB)':>10}")
+        for formato in ("csv", "jsonl"):
+            destino = os.path.join(tmpdir, f"notas.{formato}")
+            linhas: List[int] = []
+            tempo = cronometrar(lambda: linhas.append(exportar_dados(destino, path)))
+            pico = pico_memoria(lambda: exportar_dados(destino, path))
+            print(f"{formato:>8} {linhas[0]:>9} {tempo:>10.2f} {pico:>10.1f}")
+        pico = pico_memoria(lambda: carregar_dados(path, usar_cache=False))
+        print(f"Pico de memória de carregar_dados: {pico:.1f} MB")
+
+
+def bench_lote(args: argparse.Namespace) -> None:
+    """Compare per-series statistics with the batch (ragged array) functions."""
+    rng = random.Random(42)
+    series = [
+        [rng.randint(0, 10) * 10 / 10 for _ in range(rng.randint(1, 6))]
+        for _ in range(args.alunos * 10)
+    ]
+    valores, offsets = achatar(series)
+
+    def escalar() -> None:
+        for notas in series:
+            calcular_media(notas)
+            calcular_mediana(notas)
+            calcular_moda(notas)
+
+    def lote(usar_numpy: bool) -> Callable[[], None]:
+        def executar() -> None:
+            calcular_medias(valores, offsets, usar_numpy)
+            calcular_medianas(valores, offsets, usar_numpy)
+            calcular_modas(valores, offsets, usar_numpy)
+
+        return executar
+
+    print(f"Séries: {len(series)} ({len(valores)} notas)")
+    print(f"{'Modo':>14} {'Tempo (s)':>10}")
+    print(f"{'escalar':>14} {cronometrar(escalar):>10.2f}")
+    print(f"{'lote (python)':>14} {cronometrar(lote(False)):>10.2f}")
+    try:
+        print(f"{'lote (numpy)':>14} {cronometrar(lote(True)):>10.2f}")
+    except ImportError:
+        print(f"{'lote (numpy)':>14} {'sem NumPy':>10}")
+
+
+def bench_selecao(args: argparse.Namespace) -> None:
+    """Compare sort-based medians and percentiles with selection."""
+    tamanhos = (
+        [args.alunos] if args.alunos_informado else [10**3, 10**4, 10**5, 10**6, 10**7]
+    )
+    rng = random.Random(42)
+
+    def ordenando(valores: List[float]) -> Tuple[float, float]:
+        ordenados = sorted(valores)
+        meio = len(ordenados) // 2
+        mediana = (ordenados[meio - 1] + ordenados[meio]) / 2
+        return mediana, ordenados[int((len(ordenados) - 1) * 0.9)]
+
+    def selecionando(valores: List[float]) -> Tuple[float, float]:
+        return calcular_mediana(valores), calcular_percentil(valores, 90)
+
+    print(f"{'Valores':>10} {'Dados':>10} {'Ordenação (s)':>14} {'Seleção (s)':>12}")
+    for quantidade in tamanhos:
+        for dados, valores in (
+            ("aleatorios", [rng.random() * 10 for _ in range(quantidade)]),
+            ("notas", [rng.randint(0, 10) * 10 / 10 for _ in range(quantidade)]),
+        ):
+            assert ordenando(valores)[0] == selecionando(valores)[0]
+            tempo_ordenacao = cronometrar(lambda: ordenando(valores))
+            tempo_selecao = cronometrar(lambda: selecionando(valores))
+            print(
+                f"{quantidade:>10} {dados:>10} {tempo_ordenacao:>14.4f}"
+                f" {tempo_selecao:>12.4f}"
+            )
+            del valores
+
+
+def bench_esboco(args: argparse.Namespace) -> None:
+    """Compare exact cohort percentiles with merged per-shard sketches."""
+    percentis = (10, 50, 90)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        arquivo = os.path.join(tmpdir, "alunos.json")
+        diretorio = os.path.join(tmpdir, "alunos")
+        salvar_dados(gerar_alunos(args.alunos), arquivo)
+        repartir(arquivo, diretorio, shards=16)
+        arquivos = [
+            os.path.join(diretorio, nome)
+            for nome in sorted(os.listdir(diretorio))
+            if nome.startswith("shard-") and nome.endswith(".json")
+        ]
+
+        def exatos() -> List[float]:
+            notas = [
+                nota
+                for aluno in iterar_alunos(diretorio)
+                for lista in aluno.notas.values()
+                for nota in lista
+            ]
+            return [calcular_percentil(notas, p) for p in percentis]
+
+        def esbocos() -> List[float]:
+            esboco = EsbocoQuantis(semente=0)
+            for shard in arquivos:
+                parte = EsbocoQuantis()
+                for aluno in iterar_alunos(shard):
+                    for lista in aluno.notas.values():
+                        parte.adicionar_todas(lista)
+                esboco.mesclar(parte)
+            return [esboco.percentil(p) for p in percentis]
+
+        print(f"Alunos: {args.alunos} ({len(arquivos)} shards)")
+        print(f"{'Modo':>8} {'Tempo (s)':>10} {'Pico (MB)':>10} {'P10/P50/P90':>16}")
+        for modo, funcao in (("exato", exatos), ("esboco", esbocos)):
+            tempo = cronometrar(funcao)
+            valores = "/".join(f"{valor:.1f}" for valor in funcao())
+            pico = pico_memoria(funcao)
+            print(f"{modo:>8} {tempo:>10.3f} {pico:>10.1f} {valores:>16}")
+
+
+def bench_descrever(args: argparse.Namespace) -> None:
+    """Compare separate statistics calls with the single-pass description."""
+    rng = random.Random(42)
+    series = [
+        [rng.randint(0, 10) * 10 / 10 for _ in range(tamanho)]
+        for tamanho in (10, 1_000, 100_000, args.alunos * 10)
+    ]
+
+    def separadas(notas: List[float]) -> None:
+        calcular_media(notas)
+        calcular_mediana(notas)
+        calcular_moda(notas)
+        statistics.pstdev(notas)
+        min(notas)
+        max(notas)
+        calcular_percentil(notas, 25)
+        calcular_percentil(notas, 75)
+        histograma = [0] * 10
+        for nota in notas:
+            histograma[min(int(nota), 9)] += 1
+
+    print(f"{'Notas':>10} {'Separadas (s)':>14} {'descrever (s)':>14}")
+    for notas in series:
+        tempo_separadas = cronometrar(lambda: separadas(notas))
+        tempo_descrever = cronometrar(lambda: descrever(notas))
+        print(f"{len(notas):>10} {tempo_separadas:>14.4f} {tempo_descrever:>14.4f}")
+
+
+BENCHMARKS: Dict[str, Callable[[argparse.Namespace], None]] = {
+    "memoria": bench_memoria,
+    "carregar": bench_carregar,
+    "streaming": bench_streaming,
+    "jsonl": bench_jsonl,
+    "salvar": bench_salvar,
+    "durabilidade": bench_durabilidade,
+    "concorrencia": bench_concorrencia,
+    "shards": bench_shards,
+    "residencia": bench_residencia,
+    "colunas": bench_colunas,
+    "notas": bench_notas,
+    "compressao": bench_compressao,
+    "verificar": bench_verificar,
+    "importar": bench_importar,
+    "exportar": bench_exportar,
+    "lote": bench_lote,
+    "selecao": bench_selecao,
+    "esboco": bench_esboco,
+    "descrever": bench_descrever,
+}
+
+
+def main() -> None:
+    """Parse the command line and run the chosen benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--alunos", type=int, help="roster size (default: 100000)")
+    args = parser.parse_args()
+    args.alunos_informado = args.alunos is not None
+    if args.alunos is None:
+        args.alunos = 100_000
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
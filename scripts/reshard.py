@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+Reshard the student data.
+
+Converts a single data file into a sharded directory, or changes the number
+of shards of an existing one. Stop every pim process before running it.
+
+Usage (from the project root):
+    PYTHONPATH=src python scripts/reshard.py [origem] [--destino DIR] [--shards N]
+"""
+
+import argparse
+import logging
+import sys
+
+from pim.io import DataLoadError, DataSaveError, get_shard_count, repartir
+
+
+def main() -> int:
+    """Parse the command line and reshard the data."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "origem",
+        nargs="?",
+        help="data file or sharded directory (default: PIM_DATA_PATH)",
+    )
+    parser.add_argument(
+        "--destino", help="directory to write (default: next to origem)"
+    )
+    parser.add_argument(
+        "--shards", type=int, help=f"number of shards (default: {get_shard_count()})"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    try:
+        quantidade = repartir(args.origem, args.destino, args.shards)
+    except (DataLoadError, DataSaveError) as e:
+        print(f"Erro ao redistribuir os dados: {e}", file=sys.stderr)
+        return 1
+    print(f"{quantidade} alunos redistribuídos.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,9 +6,46 @@ content review, and assessments across multiple disciplines.
 """
 
 from .cli import main
-from .core import calcular_media, calcular_mediana, calcular_moda
+from .core import (
+    Acumulador,
+    Descricao,
+    EsbocoQuantis,
+    ListaNotas,
+    achatar,
+    calcular_media,
+    calcular_mediana,
+    calcular_medianas,
+    calcular_medias,
+    calcular_moda,
+    calcular_modas,
+    calcular_k_esimo,
+    calcular_percentil,
+    codificar_nota,
+    decodificar_nota,
+    descrever,
+)
 from .data import conteudos, disciplinas, perguntas
-from .io import Aluno, carregar_dados, salvar_dados
+from .io import (
+    Aluno,
+    ColunasNotas,
+    JsonStorage,
+    RelatorioVerificacao,
+    ShardedStorage,
+    SqliteStorage,
+    Storage,
+    StudentCache,
+    StudentRegistry,
+    WriteBehindStorage,
+    abrir_storage,
+    carregar_dados,
+    exportar_dados,
+    importar_csv,
+    iterar_alunos,
+    repartir,
+    salvar_colunas,
+    salvar_dados,
+    verificar_dados,
+)
 
 __version__ = "1.0.0"
 __all__ = [
@@ -16,10 +53,39 @@ __all__ = [
     "calcular_media",
     "calcular_mediana",
     "calcular_moda",
+    "calcular_percentil",
+    "calcular_k_esimo",
+    "descrever",
+    "Descricao",
+    "calcular_medias",
+    "calcular_medianas",
+    "calcular_modas",
+    "achatar",
+    "codificar_nota",
+    "decodificar_nota",
+    "ListaNotas",
+    "Acumulador",
+    "EsbocoQuantis",
     "disciplinas",
     "conteudos",
     "perguntas",
     "Aluno",
     "carregar_dados",
     "salvar_dados",
+    "iterar_alunos",
+    "importar_csv",
+    "exportar_dados",
+    "repartir",
+    "salvar_colunas",
+    "verificar_dados",
+    "RelatorioVerificacao",
+    "ColunasNotas",
+    "Storage",
+    "StudentRegistry",
+    "StudentCache",
+    "WriteBehindStorage",
+    "JsonStorage",
+    "SqliteStorage",
+    "ShardedStorage",
+    "abrir_storage",
 ]
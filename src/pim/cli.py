@@ -2,15 +2,41 @@
 CLI module for the PIM platform user interface.
 """
 
+import argparse
 import logging
-from typing import List, Optional
+import time
+from contextlib import nullcontext
+from typing import ContextManager, List, Optional, Tuple, Union
 
-from .core import calcular_media, calcular_mediana, calcular_moda
+from .core import descrever
 from .data import conteudos, disciplinas, perguntas
-from .io import Aluno, carregar_dados, salvar_dados
+from .io import (
+    Aluno,
+    Compactador,
+    DataLoadError,
+    DataSaveError,
+    Storage,
+    StudentCache,
+    StudentRegistry,
+    EXPORT_COLUMNS,
+    EXPORT_FORMATS,
+    abrir_storage,
+    exportar_dados,
+    get_resident_limit,
+    get_storage_mode,
+    importar_csv,
+    verificar_dados,
+)
 
 logger = logging.getLogger(__name__)
 
+# The roster may be given as a plain list, an indexed registry or a working set
+Registro = Union[StudentRegistry, StudentCache]
+Alunos = Union[List[Aluno], Registro]
+
+# Rejected CSV rows listed by `pim import`
+_MAX_INVALIDOS = 20
+
 
 def setup_logging(level: int = logging.INFO) -> None:
     """
@@ -26,12 +52,27 @@ def setup_logging(level: int = logging.INFO) -> None:
     )
 
 
-def registrar_aluno(alunos: List[Aluno]) -> None:
+def _usar_storage(storage: Optional[Storage]) -> ContextManager[Storage]:
+    """Use the given storage, or open (and later close) the configured one."""
+    if storage is not None:
+        return nullcontext(storage)
+    return abrir_storage()
+
+
+def _como_registro(alunos: Alunos) -> Registro:
+    """Wrap a plain list of students in a registry that updates it in place."""
+    if isinstance(alunos, (StudentRegistry, StudentCache)):
+        return alunos
+    return StudentRegistry(alunos)
+
+
+def registrar_aluno(alunos: Alunos, storage: Optional[Storage] = None) -> None:
     """
     Register a new student.
 
     Args:
-        alunos: List of existing students.
+        alunos: Existing students.
+        storage: Storage backend (default: the configured one).
     """
     print("\n=== Registro de Aluno ===")
     nome = input("Nome: ").strip()
@@ -45,7 +86,8 @@ def registrar_aluno(alunos: List[Aluno]) -> None:
         return
 
     # Check if email already exists
-    if any(aluno.email == email for aluno in alunos):
+    registro = _como_registro(alunos)
+    if email in registro:
         print("Erro: Este email já está registrado.")
         return
 
@@ -55,8 +97,9 @@ def registrar_aluno(alunos: List[Aluno]) -> None:
         return
 
     aluno = Aluno(nome=nome, email=email, senha=senha)
-    alunos.append(aluno)
-    salvar_dados(alunos)
+    registro.add(aluno)
+    with _usar_storage(storage) as backend:
+        backend.registrar_aluno(aluno, registro)
     logger.info(f"Student registered: {nome} ({email})")
     print(f"Aluno {nome} registrado com sucesso!")
 
@@ -68,15 +111,16 @@ def revisar_conteudos() -> None:
         input("Pressione Enter para continuar")
 
 
-def fazer_perguntas(disciplina: str) -> float:
+def responder_perguntas(disciplina: str) -> Tuple[int, int]:
     """
-    Execute the quiz for a discipline.
+    Run the quiz for a discipline.
 
     Args:
         disciplina: Name of the discipline.
 
     Returns:
-        Score from 0 to 10 based on correct answers.
+        ``(acertos, total)``: correct answers and number of questions
+        (``(0, 0)`` if the discipline has no questions).
     """
     print(f"\nIniciando avaliação de {disciplina}...")
     acertos = 0
@@ -84,7 +128,7 @@ def fazer_perguntas(disciplina: str) -> float:
 
     if not questoes:
         logger.warning(f"No questions found for discipline: {disciplina}")
-        return 0.0
+        return 0, 0
 
     for p in questoes:
         print(f"\n{p['pergunta']}")
@@ -94,22 +138,38 @@ def fazer_perguntas(disciplina: str) -> float:
         if resp == p["resposta"]:
             acertos += 1
 
-    # Calculate score based on actual number of questions
     total_perguntas = len(questoes)
-    nota = (acertos / total_perguntas) * 10
-    logger.info(
-        f"Quiz completed for {disciplina}: {acertos}/{total_perguntas} = {nota:.1f}"
-    )
-    return nota
+    logger.info(f"Quiz completed for {disciplina}: {acertos}/{total_perguntas}")
+    return acertos, total_perguntas
+
+
+def fazer_perguntas(disciplina: str) -> float:
+    """
+    Execute the quiz for a discipline.
+
+    Args:
+        disciplina: Name of the discipline.
+
+    Returns:
+        Score from 0 to 10 based on correct answers.
+    """
+    acertos, total_perguntas = responder_perguntas(disciplina)
+    if not total_perguntas:
+        return 0.0
+    # Same float as decodificar_nota for the pair, so it is stored exactly
+    return acertos * 10 / total_perguntas
 
 
-def aplicar_avaliacao(aluno: Aluno, alunos: List[Aluno]) -> None:
+def aplicar_avaliacao(
+    aluno: Aluno, alunos: Alunos, storage: Optional[Storage] = None
+) -> None:
     """
     Apply an evaluation for a student.
 
     Args:
         aluno: Student taking the evaluation.
-        alunos: List of all students (for saving).
+        alunos: All students (for saving).
+        storage: Storage backend (default: the configured one).
     """
     print("\n=== Avaliação ===")
     for i, disciplina in enumerate(disciplinas, 1):
@@ -130,9 +190,14 @@ def aplicar_avaliacao(aluno: Aluno, alunos: List[Aluno]) -> None:
         print("Esta disciplina ainda não possui avaliação.")
         return
 
-    nota = fazer_perguntas(disciplina)
-    aluno.notas[disciplina].append(nota)
-    salvar_dados(alunos)
+    acertos, total_perguntas = responder_perguntas(disciplina)
+    notas = aluno.notas[disciplina]
+    # Stored as the code of the pair, with no search for the code of a float;
+    # also updates the running statistics ver_notas shows (ListaNotas.resumo)
+    notas.adicionar(acertos, total_perguntas)
+    nota = notas[-1]
+    with _usar_storage(storage) as backend:
+        backend.registrar_nota(aluno, disciplina, nota, alunos)
     logger.info(f"Grade {nota:.1f} recorded for {aluno.nome} in {disciplina}")
     print(f"Nota {nota:.1f} registrada em {disciplina}.")
 
@@ -148,17 +213,17 @@ def ver_notas(aluno: Aluno) -> None:
     for disciplina, notas in aluno.notas.items():
         if notas:
             print(f"\n{disciplina}: {notas}")
-            media = calcular_media(notas)
-            if media is not None:
-                print(
-                    f"  Média: {media:.2f} -> Indica o desempenho geral ao longo das autoavaliações"
-                )
-            mediana = calcular_mediana(notas)
-            if mediana is not None:
-                print(
-                    f"  Mediana: {mediana:.2f} -> Representa o valor central das pontuações"
-                )
-            moda = calcular_moda(notas)
+            # From the running statistics of the list: no pass over the grades
+            descricao = descrever(notas)
+            if descricao is None:
+                continue
+            media, mediana, moda = descricao.media, descricao.mediana, descricao.moda
+            print(
+                f"  Média: {media:.2f} -> Indica o desempenho geral ao longo das autoavaliações"
+            )
+            print(
+                f"  Mediana: {mediana:.2f} -> Representa o valor central das pontuações"
+            )
             if moda is not None:
                 print(f"  Moda: {moda} -> Valor mais frequente entre as avaliações")
             else:
@@ -167,12 +232,12 @@ def ver_notas(aluno: Aluno) -> None:
             print(f"{disciplina}: Sem notas")
 
 
-def fazer_login(alunos: List[Aluno]) -> Optional[Aluno]:
+def fazer_login(alunos: Alunos) -> Optional[Aluno]:
     """
     Authenticate a student.
 
     Args:
-        alunos: List of registered students.
+        alunos: Registered students.
 
     Returns:
         The authenticated student, or None if authentication failed.
@@ -181,24 +246,25 @@ def fazer_login(alunos: List[Aluno]) -> Optional[Aluno]:
     email = input("Email: ").strip()
     senha = input("Senha: ").strip()
 
-    for aluno in alunos:
-        if aluno.email == email and aluno.senha == senha:
-            logger.info(f"Successful login: {aluno.nome} ({email})")
-            print(f"Bem-vindo(a), {aluno.nome}!")
-            return aluno
+    aluno = _como_registro(alunos).autenticar(email, senha)
+    if aluno is not None:
+        logger.info(f"Successful login: {aluno.nome} ({email})")
+        print(f"Bem-vindo(a), {aluno.nome}!")
+        return aluno
 
     logger.warning(f"Failed login attempt for email: {email}")
     print("Email ou senha incorretos.")
     return None
 
 
-def menu_aluno(aluno: Aluno, alunos: List[Aluno]) -> None:
+def menu_aluno(aluno: Aluno, alunos: Alunos, storage: Optional[Storage] = None) -> None:
     """
     Display the student menu.
 
     Args:
         aluno: Logged-in student.
-        alunos: List of all students.
+        alunos: All students.
+        storage: Storage backend (default: the configured one).
     """
     while True:
         print(f"\n=== Menu de {aluno.nome} ===")
@@ -211,7 +277,7 @@ def menu_aluno(aluno: Aluno, alunos: List[Aluno]) -> None:
         if opcao == "1":
             revisar_conteudos()
         elif opcao == "2":
-            aplicar_avaliacao(aluno, alunos)
+            aplicar_avaliacao(aluno, alunos, storage)
         elif opcao == "3":
             ver_notas(aluno)
         elif opcao == "4":
@@ -220,18 +286,206 @@ def menu_aluno(aluno: Aluno, alunos: List[Aluno]) -> None:
             print("Opção inválida.")
 
 
-def main() -> None:
-    """Main entry point for the application."""
+def verificar(caminho: Optional[str] = None) -> int:
+    """
+    Verify the integrity of the data store and print a report.
+
+    Args:
+        caminho: Optional data path. If not provided, uses PIM_DATA_PATH.
+
+    Returns:
+        Exit status: 0 if every record is intact, 1 otherwise.
+    """
+    inicio = time.perf_counter()
+    try:
+        relatorio = verificar_dados(caminho)
+    except DataLoadError as e:
+        print(f"Erro ao verificar dados: {e}")
+        return 1
+    duracao = time.perf_counter() - inicio
+
+    print(f"Registros íntegros: {relatorio.registros - relatorio.sem_checksum}")
+    if relatorio.sem_checksum:
+        print(f"Registros sem checksum: {relatorio.sem_checksum}")
+    print(f"Registros corrompidos: {len(relatorio.corrompidos)}")
+    for registro in relatorio.corrompidos:
+        print(f"  {registro.arquivo}, linha {registro.linha}: {registro.motivo}")
+    megabytes = relatorio.bytes / 1e6
+    taxa = megabytes / duracao if duracao > 0 else 0.0
+    print(f"Verificados {megabytes:.1f} MB em {duracao:.2f} s ({taxa:.0f} MB/s)")
+    return 0 if relatorio.ok else 1
+
+
+def importar(arquivo: str, caminho: Optional[str] = None) -> int:
+    """
+    Register the students of a roster CSV and print a report.
+
+    Args:
+        arquivo: Path of the CSV file (columns nome, email and senha).
+        caminho: Optional data path. If not provided, uses PIM_DATA_PATH.
+
+    Returns:
+        Exit status: 0 if the import was saved, 1 otherwise.
+    """
+    inicio = time.perf_counter()
+    try:
+        with abrir_storage(caminho) as storage:
+            relatorio = importar_csv(arquivo, storage)
+    except DataLoadError as e:
+        print(f"Erro ao importar alunos: {e}")
+        return 1
+    except DataSaveError as e:
+        print(f"Erro ao salvar dados: {e}")
+        return 1
+    duracao = time.perf_counter() - inicio
+
+    print(f"Alunos importados: {relatorio.importados}")
+    print(f"Emails já registrados: {relatorio.duplicados}")
+    print(f"Linhas inválidas: {len(relatorio.invalidos)}")
+    for linha, motivo in relatorio.invalidos[:_MAX_INVALIDOS]:
+        print(f"  linha {linha}: {motivo}")
+    if len(relatorio.invalidos) > _MAX_INVALIDOS:
+        print(f"  ... e mais {len(relatorio.invalidos) - _MAX_INVALIDOS}")
+    print(f"Concluído em {duracao:.2f} s")
+    return 0
+
+
+def exportar(
+    destino: str,
+    caminho: Optional[str] = None,
+    colunas: Optional[List[str]] = None,
+    apenas: Optional[List[str]] = None,
+    formato: Optional[str] = None,
+) -> int:
+    """
+    Export students and grades to a CSV or JSON Lines file.
+
+    Args:
+        destino: Path of the export file.
+        caminho: Optional data path. If not provided, uses PIM_DATA_PATH.
+        colunas: Columns to export (default: all of EXPORT_COLUMNS).
+        apenas: Only export grades of these disciplines (default: all).
+        formato: ``csv`` or ``jsonl`` (default: by the suffix of ``destino``).
+
+    Returns:
+        Exit status: 0 if the export was written, 1 otherwise.
+    """
+    inicio = time.perf_counter()
+    try:
+        quantidade = exportar_dados(destino, caminho, colunas, apenas, formato)
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return 1
+    except DataLoadError as e:
+        print(f"Erro ao carregar dados: {e}")
+        return 1
+    except DataSaveError as e:
+        print(f"Erro ao exportar dados: {e}")
+        return 1
+    duracao = time.perf_counter() - inicio
+    print(f"Exportadas {quantidade} linhas para {destino} em {duracao:.2f} s")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Main entry point for the application.
+
+    Without a command, runs the interactive platform.
+
+    Args:
+        argv: Command line arguments (default: sys.argv[1:]).
+
+    Returns:
+        Exit status.
+    """
+    parser = argparse.ArgumentParser(prog="pim", description="Plataforma de Revisão")
+    comandos = parser.add_subparsers(dest="comando")
+    verify = comandos.add_parser(
+        "verify", help="verifica os checksums de todos os registros dos dados"
+    )
+    verify.add_argument(
+        "caminho", nargs="?", help="caminho dos dados (padrão: PIM_DATA_PATH)"
+    )
+    importacao = comandos.add_parser(
+        "import", help="registra em lote os alunos de um arquivo CSV"
+    )
+    importacao.add_argument("arquivo", help="arquivo CSV com nome, email e senha")
+    importacao.add_argument("--dados", help="caminho dos dados (padrão: PIM_DATA_PATH)")
+    exportacao = comandos.add_parser(
+        "export", help="exporta alunos e notas para CSV ou JSON Lines"
+    )
+    exportacao.add_argument("destino", help="arquivo de saída (.csv ou .jsonl)")
+    exportacao.add_argument("--dados", help="caminho dos dados (padrão: PIM_DATA_PATH)")
+    exportacao.add_argument(
+        "--colunas",
+        type=lambda valor: [coluna.strip() for coluna in valor.split(",")],
+        help=f"colunas separadas por vírgula (padrão: {','.join(EXPORT_COLUMNS)})",
+    )
+    exportacao.add_argument(
+        "--disciplina",
+        action="append",
+        dest="disciplinas",
+        help="exporta apenas as notas desta disciplina (pode ser repetido)",
+    )
+    exportacao.add_argument("--formato", choices=EXPORT_FORMATS)
+    args = parser.parse_args(argv)
+
     setup_logging()
+    if args.comando == "verify":
+        return verificar(args.caminho)
+    if args.comando == "import":
+        return importar(args.arquivo, args.dados)
+    if args.comando == "export":
+        return exportar(
+            args.destino, args.dados, args.colunas, args.disciplinas, args.formato
+        )
+
     logger.info("Starting PIM Platform")
 
+    storage = abrir_storage()
+    alunos: Registro
+    limite = get_resident_limit()
+    if limite is not None and storage.indexado:
+        # Students are loaded on demand; the cache also buffers their changes
+        alunos = storage = StudentCache(storage, limite)
+    else:
+        if limite is not None:
+            logger.warning(
+                f"{type(storage).__name__} cannot load students on demand, "
+                "keeping every student in memory"
+            )
+        alunos = StudentRegistry()
+        try:
+            alunos.load(storage.carregar())
+        except Exception as e:
+            logger.error(f"Failed to load data: {e}")
+            print(f"Erro ao carregar dados: {e}")
+
+    compactador = Compactador()
+    if get_storage_mode() == "journal":
+        compactador.start()
+
     try:
-        alunos = carregar_dados()
-    except Exception as e:
-        logger.error(f"Failed to load data: {e}")
-        print(f"Erro ao carregar dados: {e}")
-        alunos = []
+        _loop_principal(alunos, storage)
+    finally:
+        compactador.stop()
+        try:
+            storage.fechar()
+        except DataSaveError as e:
+            logger.error(f"Failed to save pending changes: {e}")
+            print(f"Erro ao salvar dados: {e}")
+    return 0
+
+
+def _loop_principal(alunos: Registro, storage: Storage) -> None:
+    """
+    Run the main menu until the user quits.
 
+    Args:
+        alunos: All students.
+        storage: Storage backend.
+    """
     while True:
         print("\n=== Plataforma de Revisão ===")
         print("1. Registro")
@@ -240,11 +494,11 @@ def main() -> None:
         opcao = input("Escolha: ").strip()
 
         if opcao == "1":
-            registrar_aluno(alunos)
+            registrar_aluno(alunos, storage)
         elif opcao == "2":
             aluno = fazer_login(alunos)
             if aluno:
-                menu_aluno(aluno, alunos)
+                menu_aluno(aluno, alunos, storage)
         elif opcao == "3":
             logger.info("Shutting down PIM Platform")
             print("Encerrando...")
@@ -254,4 +508,4 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -3,17 +3,355 @@ Core module containing statistical calculation functions.
 """
 
 import logging
-from typing import List, Optional, Union
+import random
+import sys
+from array import array
+from collections import Counter
+from collections.abc import MutableSequence
+from itertools import islice
+from math import ceil, gcd, isfinite, sqrt
+from operator import itemgetter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore[assignment]
 
 logger = logging.getLogger(__name__)
 
+# Largest number of questions of a quiz whose grade fits in a grade code
+MAX_TOTAL = 255
+
+# Two grades closer than this are the same grade (distinct codes are
+# at least 10 / (255 * 254) apart, so this only absorbs rounding noise)
+_TOLERANCIA = 1e-9
+
+# Grades without a code remembered by codigo_de_nota, so imported data full
+# of arbitrary floats cannot grow the memo without bound
+_MAX_SEM_CODIGO = 4096
+
+# Selection sorts parts of at most this many values (sorted() is faster there)
+_LIMITE_ORDENAR = 4096
+
+# Selection steps keeping more than 3/4 of the values tolerated before
+# selection switches to median-of-medians pivots, which guarantee linear time
+_MAX_PIVOS_RUINS = 2
+
+# Source of the samples selection takes its pivots from
+_AMOSTRAGEM = random.Random()
+
+
+def codificar_nota(acertos: int, total: int) -> int:
+    """
+    Encode a quiz result as a two-byte grade code.
+
+    The fraction is reduced first, so every grade value has a single code
+    (5 of 10 and 1 of 2 are the same grade).
+
+    Args:
+        acertos: Number of correct answers.
+        total: Number of questions, from 1 to MAX_TOTAL.
+
+    Returns:
+        The code ``acertos << 8 | total`` of the reduced fraction.
+
+    Raises:
+        ValueError: If the result is out of range.
+    """
+    if not 0 <= acertos <= total or not 1 <= total <= MAX_TOTAL:
+        raise ValueError(f"Invalid quiz result {acertos}/{total}")
+    divisor = gcd(acertos, total)
+    return (acertos // divisor) << 8 | (total // divisor)
+
+
+def decodificar_nota(codigo: int) -> float:
+    """
+    Get the 0-10 grade of a grade code.
+
+    Args:
+        codigo: Code built by codificar_nota.
+
+    Returns:
+        The grade, as the float nearest to ``10 * acertos / total``.
+    """
+    return (codigo >> 8) * 10 / (codigo & 0xFF)
+
+
+def _buscar_codigo(nota: float) -> Optional[int]:
+    """Find the code of the quiz result with the smallest total for a grade."""
+    try:
+        if not 0 <= nota <= 10:
+            return None
+    except TypeError:
+        return None
+    for total in range(1, MAX_TOTAL + 1):
+        acertos = round(nota * total / 10)
+        if abs(acertos * 10 / total - nota) <= _TOLERANCIA:
+            return acertos << 8 | total
+    return None
+
+
+class _Valores(Dict[int, float]):
+    """Grades of the codes decoded so far."""
+
+    def __missing__(self, codigo: int) -> float:
+        valor = self[codigo] = decodificar_nota(codigo)
+        return valor
+
+
+class _Codigos(Dict[Any, Optional[int]]):
+    """
+    Codes of the grades looked up so far, None for grades without one.
+
+    Grades with a code are bounded by the quiz results; only the first
+    _MAX_SEM_CODIGO grades without one (legacy or imported values, which
+    may be any float) are kept, the others are searched each time.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._sem_codigo = 0
+
+    def __missing__(self, nota: float) -> Optional[int]:
+        codigo = _buscar_codigo(nota)
+        if codigo is None:
+            if self._sem_codigo >= _MAX_SEM_CODIGO:
+                return None
+            self._sem_codigo += 1
+        self[nota] = codigo
+        return codigo
+
 
-def calcular_media(lista: List[float]) -> Optional[float]:
+_VALORES = _Valores()
+_CODIGOS = _Codigos()
+
+
+def codigo_de_nota(nota: float) -> Optional[int]:
+    """
+    Get the code of a 0-10 grade.
+
+    Args:
+        nota: Grade, e.g. as computed by a quiz or read from a data file.
+
+    Returns:
+        The code of the quiz result (of at most MAX_TOTAL questions) that
+        gives this grade, up to float rounding noise, or None if no quiz
+        result does.
+    """
+    try:
+        return _CODIGOS[nota]
+    except TypeError:
+        return None
+
+
+class ListaNotas(MutableSequence):
+    """
+    List of grades stored as two-byte quiz result codes.
+
+    Behaves like a list of floats (equal to one, with the same repr), but
+    keeps one ``codificar_nota`` code per grade in an ``array('H')`` instead
+    of one float object per grade, and grades with the same value have the
+    same code. A grade no quiz result gives (such as 7.123) switches the
+    list to plain floats.
+
+    The list also keeps an :class:`Acumulador` of its grades once one is
+    asked for (see ``resumo``): appending updates it, other changes drop
+    it to be rebuilt on the next request. It lives in memory only and is
+    not saved with the grades, so a loaded list builds it again.
+    """
+
+    __slots__ = ("_dados", "_resumo")
+
+    def __init__(self, notas: Iterable[float] = ()) -> None:
+        """
+        Args:
+            notas: Initial grades.
+        """
+        self._dados: Union["array[int]", List[float]] = array("H")
+        self._resumo: Optional[Acumulador] = None
+        self.extend(notas)
+
+    @classmethod
+    def de_codigos(cls, codigos: Iterable[int]) -> "ListaNotas":
+        """
+        Build a list from grade codes.
+
+        Args:
+            codigos: Codes built by codificar_nota. An ``array('H')`` is
+                adopted, not copied.
+
+        Returns:
+            The list of the grades of the codes.
+        """
+        lista = cls.__new__(cls)
+        if isinstance(codigos, array) and codigos.typecode == "H":
+            lista._dados = codigos
+        else:
+            lista._dados = array("H", codigos)
+        lista._resumo = None
+        return lista
+
+    @property
+    def codigos(self) -> Optional["array[int]"]:
+        """Codes of the grades, or None if the list holds plain floats."""
+        dados = self._dados
+        return dados if isinstance(dados, array) else None
+
+    @property
+    def resumo(self) -> "Acumulador":
+        """
+        Running statistics of the grades.
+
+        Built with one pass over the grades the first time, then kept up
+        to date as grades are appended, so later requests cost no pass.
+        """
+        if self._resumo is None:
+            self._resumo = Acumulador(self)
+        return self._resumo
+
+    def adicionar(self, acertos: int, total: int) -> None:
+        """
+        Append the grade of a quiz result.
+
+        Args:
+            acertos: Number of correct answers.
+            total: Number of questions.
+
+        Raises:
+            ValueError: If the result is out of range.
+        """
+        codigo = codificar_nota(acertos, total)
+        if isinstance(self._dados, array):
+            self._dados.append(codigo)
+        else:
+            self._dados.append(decodificar_nota(codigo))
+        if self._resumo is not None:
+            self._resumo.adicionar(_VALORES[codigo])
+
+    def _como_floats(self) -> List[float]:
+        """Switch to plain floats (for a grade without a code)."""
+        if isinstance(self._dados, array):
+            self._dados = list(self)
+        return self._dados  # type: ignore[return-value]
+
+    def append(self, nota: float) -> None:
+        dados = self._dados
+        if isinstance(dados, array):
+            try:
+                codigo = _CODIGOS[nota]
+            except TypeError:
+                codigo = None
+            if codigo is None:
+                dados = self._como_floats()
+            else:
+                dados.append(codigo)
+                if self._resumo is not None:
+                    self._resumo.adicionar(_VALORES[codigo])
+                return
+        dados.append(nota)
+        if self._resumo is not None:
+            self._resumo.adicionar(nota)
+
+    def extend(self, notas: Iterable[float]) -> None:
+        codigos = notas.codigos if isinstance(notas, ListaNotas) else None
+        if codigos is not None:
+            if isinstance(self._dados, array):
+                self._dados.extend(codigos)
+                self._resumo = None
+                return
+            notas = list(notas)
+        for nota in notas:
+            self.append(nota)
+
+    def insert(self, indice: int, nota: float) -> None:
+        self._resumo = None
+        codigo = codigo_de_nota(nota)
+        if codigo is not None and isinstance(self._dados, array):
+            self._dados.insert(indice, codigo)
+        else:
+            self._como_floats().insert(indice, nota)
+
+    def __getitem__(self, indice: Any) -> Any:
+        dados = self._dados
+        if isinstance(indice, slice):
+            fatia = ListaNotas.__new__(ListaNotas)
+            fatia._dados = dados[indice]
+            fatia._resumo = None
+            return fatia
+        if isinstance(dados, array):
+            return _VALORES[dados[indice]]
+        return dados[indice]
+
+    def __setitem__(self, indice: Any, valor: Any) -> None:
+        self._resumo = None
+        if isinstance(indice, slice):
+            novas = ListaNotas(valor)
+            codigos = novas.codigos
+            if isinstance(self._dados, array) and codigos is not None:
+                self._dados[indice] = codigos
+            else:
+                self._como_floats()[indice] = list(novas)
+            return
+        codigo = codigo_de_nota(valor)
+        if codigo is not None and isinstance(self._dados, array):
+            self._dados[indice] = codigo
+        else:
+            self._como_floats()[indice] = valor
+
+    def __delitem__(self, indice: Any) -> None:
+        self._resumo = None
+        del self._dados[indice]
+
+    def __len__(self) -> int:
+        return len(self._dados)
+
+    def __iter__(self) -> Iterator[float]:
+        dados = self._dados
+        if isinstance(dados, array):
+            return map(_VALORES.__getitem__, dados)
+        return iter(dados)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ListaNotas):
+            if isinstance(self._dados, array) and isinstance(other._dados, array):
+                return self._dados == other._dados
+            return list(self) == list(other)
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __reduce__(self) -> Any:
+        if isinstance(self._dados, array):
+            return ListaNotas.de_codigos, (self._dados,)
+        return ListaNotas, (self._dados,)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+def calcular_media(lista: Sequence[float]) -> Optional[float]:
     """
     Calculate the arithmetic mean of a list of numbers.
 
     Args:
-        lista: List of numbers to calculate the mean.
+        lista: Sequence of numbers (a list, an array or a memoryview) to
+            calculate the mean.
 
     Returns:
         The arithmetic mean, or None if the list is empty.
@@ -24,12 +362,12 @@ def calcular_media(lista: List[float]) -> Optional[float]:
     return sum(lista) / len(lista)
 
 
-def calcular_mediana(lista: List[float]) -> Optional[float]:
+def calcular_mediana(lista: Sequence[float]) -> Optional[float]:
     """
     Calculate the median of a list of numbers.
 
     Args:
-        lista: List of numbers to calculate the median.
+        lista: Sequence of numbers to calculate the median.
 
     Returns:
         The median value, or None if the list is empty.
@@ -38,22 +376,194 @@ def calcular_mediana(lista: List[float]) -> Optional[float]:
         logger.warning("Attempted to calculate median of empty list")
         return None
 
-    lista_ordenada = sorted(lista)
-    n = len(lista_ordenada)
+    n = len(lista)
     meio = n // 2
 
     if n % 2 == 0:
-        return (lista_ordenada[meio - 1] + lista_ordenada[meio]) / 2
+        # One selection gives both middle values
+        menor, maior = _selecionar(lista, meio - 1)
+        assert maior is not None  # meio - 1 is never the last position
+        return (menor + maior) / 2
     else:
-        return lista_ordenada[meio]
+        return _selecionar(lista, meio)[0]
 
 
-def calcular_moda(lista: List[float]) -> Optional[Union[float, List[float]]]:
+def _mediana_das_medianas(valores: Sequence[float]) -> float:
+    """Pick a pivot with at least 3/10 of the values on each side of it."""
+    medianas = []
+    for inicio in range(0, len(valores), 5):
+        grupo = sorted(valores[inicio : inicio + 5])
+        medianas.append(grupo[(len(grupo) - 1) // 2])
+    return _selecionar(medianas, (len(medianas) - 1) // 2)[0]
+
+
+def _recortar(valores: Sequence[float], k: int) -> Tuple[Sequence[float], int]:
+    """
+    Keep the values between two pivots sampled around position ``k``.
+
+    The pivots come from a sorted random sample of ``n ** (2/3)`` values
+    (Floyd-Rivest), so position ``k`` almost always falls between them and
+    a pass and a half over the values keeps about ``n ** (2/3)`` of them.
+    When it does not, the side holding ``k`` is kept instead.
+
+    Returns:
+        The kept values and the position of ``k`` among them.
+    """
+    n = len(valores)
+    tamanho = int(n ** (2 / 3))
+    amostra = sorted(valores[i] for i in _AMOSTRAGEM.sample(range(n), tamanho))
+    meio = k * tamanho // n
+    margem = int(tamanho**0.5)
+    baixo = amostra[max(meio - margem, 0)]
+    alto = amostra[min(meio + margem, tamanho - 1)]
+
+    # Start from the nearer end, so the first pass keeps at most half
+    if k < n // 2:
+        ate_alto = [valor for valor in valores if valor <= alto]
+        if k >= len(ate_alto):
+            return [valor for valor in valores if valor > alto], k - len(ate_alto)
+        faixa = [valor for valor in ate_alto if valor >= baixo]
+        antes = len(ate_alto) - len(faixa)
+        if k < antes:
+            return [valor for valor in ate_alto if valor < baixo], k
+    else:
+        desde_baixo = [valor for valor in valores if valor >= baixo]
+        antes = n - len(desde_baixo)
+        if k < antes:
+            return [valor for valor in valores if valor < baixo], k
+        faixa = [valor for valor in desde_baixo if valor <= alto]
+        if k - antes >= len(faixa):
+            acima = [valor for valor in desde_baixo if valor > alto]
+            return acima, k - antes - len(faixa)
+    posicao = k - antes
+    if baixo == alto:
+        # A run of one repeated grade: k and the value after it are found
+        return faixa[posicao : posicao + 2], 0
+    return faixa, posicao
+
+
+def _particionar(
+    valores: Sequence[float], k: int, pivo: float
+) -> Tuple[Sequence[float], int]:
+    """
+    Keep the values on the side of a pivot that holds position ``k``.
+
+    Returns:
+        The kept values and the position of ``k`` among them.
+    """
+    menores = [valor for valor in valores if valor < pivo]
+    if k < len(menores):
+        return menores, k
+    maiores = [valor for valor in valores if valor > pivo]
+    ate_pivo = len(valores) - len(maiores)
+    if k >= ate_pivo:
+        return maiores, k - ate_pivo
+    if k + 1 < ate_pivo:
+        return [pivo, pivo], 0
+    return ([pivo, min(maiores)] if maiores else [pivo]), 0
+
+
+def _selecionar(valores: Sequence[float], k: int) -> Tuple[float, Optional[float]]:
+    """
+    Find the k-th smallest value without sorting every value (introselect).
+
+    Each step keeps only the values around position ``k`` (see _recortar),
+    so the work shrinks geometrically: expected linear time, in about two
+    passes over the values. After _MAX_PIVOS_RUINS steps that kept most of
+    the values, steps split around _mediana_das_medianas instead, which
+    bounds the worst case to linear time too. The last few values are
+    sorted.
+
+    Args:
+        valores: Sequence of numbers.
+        k: Position, from 0 to ``len(valores) - 1``, in the sorted values.
+
+    Returns:
+        The values at positions ``k`` and ``k + 1`` of the sorted values
+        (None for the second one if ``k`` is the last position).
+    """
+    original = valores
+    ruins = 0
+    while len(valores) > _LIMITE_ORDENAR:
+        n = len(valores)
+        if ruins < _MAX_PIVOS_RUINS:
+            valores, k = _recortar(valores, k)
+        else:
+            valores, k = _particionar(valores, k, _mediana_das_medianas(valores))
+        if len(valores) > n * 3 // 4:
+            ruins += 1
+
+    ordenados = sorted(valores)
+    if k + 1 < len(ordenados):
+        return ordenados[k], ordenados[k + 1]
+    # The values after position k were dropped: find the smallest again
+    valor = ordenados[k]
+    return valor, min((outro for outro in original if outro > valor), default=None)
+
+
+def calcular_k_esimo(lista: Sequence[float], k: int) -> Optional[float]:
+    """
+    Find the k-th smallest number of a list without sorting it.
+
+    Args:
+        lista: Sequence of numbers.
+        k: Position in the sorted list, from 0 (the smallest number) to
+            ``len(lista) - 1`` (the largest).
+
+    Returns:
+        The number at position ``k`` of the sorted list, or None if the
+        list is empty.
+
+    Raises:
+        IndexError: If ``k`` is out of range.
+    """
+    if not lista:
+        logger.warning("Attempted to select from empty list")
+        return None
+    if not 0 <= k < len(lista):
+        raise IndexError(f"Position {k} out of range for {len(lista)} values")
+    return _selecionar(lista, k)[0]
+
+
+def calcular_percentil(lista: Sequence[float], percentil: float) -> Optional[float]:
+    """
+    Calculate a percentile of a list of numbers without sorting it.
+
+    Interpolates linearly between the two closest positions of the sorted
+    list, as NumPy's default method and spreadsheet PERCENTILE.INC do: the
+    50th percentile is the median, the 0th and 100th the minimum and the
+    maximum.
+
+    Args:
+        lista: Sequence of numbers.
+        percentil: Percentile, from 0 to 100.
+
+    Returns:
+        The percentile, or None if the list is empty.
+
+    Raises:
+        ValueError: If the percentile is out of range.
+    """
+    if not 0 <= percentil <= 100:
+        raise ValueError(f"Percentile {percentil} out of range [0, 100]")
+    if not lista:
+        logger.warning("Attempted to calculate percentile of empty list")
+        return None
+    posicao = (len(lista) - 1) * percentil / 100
+    k = int(posicao)
+    fracao = posicao - k
+    valor, seguinte = _selecionar(lista, k)
+    if not fracao or seguinte is None:
+        return valor
+    return valor + (seguinte - valor) * fracao
+
+
+def calcular_moda(lista: Sequence[float]) -> Optional[Union[float, List[float]]]:
     """
     Calculate the mode of a list of numbers.
 
     Args:
-        lista: List of numbers to calculate the mode.
+        lista: Sequence of numbers to calculate the mode.
 
     Returns:
         A single mode value if there's only one, a list of modes if there are multiple,
@@ -63,9 +573,16 @@ def calcular_moda(lista: List[float]) -> Optional[Union[float, List[float]]]:
         logger.warning("Attempted to calculate mode of empty list")
         return None
 
-    frequencias: dict[float, int] = {}
-    for valor in lista:
-        frequencias[valor] = frequencias.get(valor, 0) + 1
+    codigos = lista.codigos if isinstance(lista, ListaNotas) else None
+    if codigos is not None:
+        # Equal grades have equal codes: count the codes, decode only the keys
+        frequencias = {
+            _VALORES[codigo]: vezes for codigo, vezes in Counter(codigos).items()
+        }
+    else:
+        frequencias = {}
+        for valor in lista:
+            frequencias[valor] = frequencias.get(valor, 0) + 1
 
     maior_freq = max(frequencias.values())
 
@@ -76,3 +593,668 @@ def calcular_moda(lista: List[float]) -> Optional[Union[float, List[float]]]:
     modas = [k for k, v in frequencias.items() if v == maior_freq]
 
     return modas[0] if len(modas) == 1 else modas
+
+
+# Result of calcular_moda: one mode, several modes, or None
+Moda = Optional[Union[float, List[float]]]
+
+T = TypeVar("T")
+
+# sum() adds floats with Neumaier compensation since Python 3.12; the NumPy
+# path mirrors whichever algorithm calcular_media gets, to match it exactly
+_SOMA_COMPENSADA = sys.version_info >= (3, 12)
+
+# Series longer than this are summed by sum() itself, so that the NumPy path
+# makes at most this many passes over the cohort
+_MAX_PASSOS = 64
+
+
+def achatar(series: Iterable[Sequence[float]]) -> Tuple["array[float]", "array[int]"]:
+    """
+    Pack grade series into a ragged array.
+
+    Args:
+        series: Grade lists, e.g. the grades of each student in a discipline.
+
+    Returns:
+        ``(valores, offsets)``: every grade, series after series, and the
+        ``len(series) + 1`` offsets where each series starts (the last one
+        is the total), the layout of ColunasNotas.
+    """
+    valores: "array[float]" = array("d")
+    offsets: "array[int]" = array("q", [0])
+    for notas in series:
+        valores.extend(notas)
+        offsets.append(len(valores))
+    return valores, offsets
+
+
+def _usar_numpy(usar_numpy: Optional[bool]) -> bool:
+    """Resolve the NumPy choice of a batch function (None: if installed)."""
+    if usar_numpy is None:
+        return np is not None
+    if usar_numpy and np is None:
+        raise ImportError("NumPy is not installed")
+    return usar_numpy
+
+
+def _por_serie(
+    funcao: Callable[[Sequence[float]], T],
+    valores: Sequence[float],
+    offsets: Sequence[int],
+) -> List[Optional[T]]:
+    """Apply a scalar statistic to each series (None for empty series)."""
+    if not isinstance(valores, list):
+        valores = list(valores)  # list slices are the cheapest to build
+    return [
+        funcao(valores[inicio:fim]) if fim > inicio else None
+        for inicio, fim in zip(offsets, offsets[1:])
+    ]
+
+
+def _ragged_numpy(valores: Sequence[float], offsets: Sequence[int]) -> Tuple[Any, ...]:
+    """
+    Convert a ragged array to NumPy.
+
+    Returns:
+        The grades from the first offset on (float64), the start of each
+        series in them and the length of each series.
+    """
+    limites = np.asarray(offsets, dtype=np.int64)
+    valores_np = np.asarray(valores, dtype=np.float64)[limites[0] : limites[-1]]
+    return valores_np, limites[:-1] - limites[0], np.diff(limites)
+
+
+def _somas_numpy(valores: Any, inicios: Any, tamanhos: Any) -> Any:
+    """
+    Sum each series adding its grades in order, as sum() does.
+
+    The cohort is summed position by position: pass ``j`` adds the ``j``-th
+    grade of every series that long, so each series gets exactly the float
+    operations of sum(), with as many passes as the longest series has
+    grades.
+    """
+    somas = np.zeros(len(tamanhos))
+    compensacao = np.zeros(len(tamanhos))
+    for j in range(int(tamanhos.max(initial=0))):
+        ativos = np.flatnonzero(tamanhos > j)
+        x = valores[inicios[ativos] + j]
+        if not _SOMA_COMPENSADA:
+            somas[ativos] += x
+            continue
+        soma = somas[ativos]
+        total = soma + x
+        compensacao[ativos] += np.where(
+            np.abs(soma) >= np.abs(x), (soma - total) + x, (x - total) + soma
+        )
+        somas[ativos] = total
+    if _SOMA_COMPENSADA:
+        corrigir = (compensacao != 0) & np.isfinite(compensacao)
+        somas[corrigir] += compensacao[corrigir]
+    return somas
+
+
+def calcular_medias(
+    valores: Sequence[float],
+    offsets: Sequence[int],
+    usar_numpy: Optional[bool] = None,
+) -> List[Optional[float]]:
+    """
+    Calculate the mean of many grade series at once.
+
+    Gives exactly the results of calcular_media on each series.
+
+    Args:
+        valores: Grades of every series, one series after another (see
+            achatar; a list, an array or a memoryview).
+        offsets: ``n + 1`` offsets into ``valores``: series ``i`` is
+            ``valores[offsets[i]:offsets[i + 1]]``.
+        usar_numpy: Use NumPy (default: if it is installed); otherwise each
+            series goes through calcular_media.
+
+    Returns:
+        The mean of each series, None for empty series.
+
+    Raises:
+        ImportError: If ``usar_numpy`` is True and NumPy is not installed.
+    """
+    if not _usar_numpy(usar_numpy):
+        return _por_serie(calcular_media, valores, offsets)
+
+    valores_np, inicios, tamanhos = _ragged_numpy(valores, offsets)
+    longas = tamanhos > _MAX_PASSOS
+    somas = _somas_numpy(valores_np, inicios, np.where(longas, 0, tamanhos))
+    for i in np.flatnonzero(longas):
+        somas[i] = sum(valores_np[inicios[i] : inicios[i] + tamanhos[i]].tolist())
+    cheias = np.flatnonzero(tamanhos)
+    return _por_posicao(len(tamanhos), cheias, somas[cheias] / tamanhos[cheias])
+
+
+def _por_posicao(quantidade: int, posicoes: Any, valores: Any) -> List[Any]:
+    """Build a list of ``quantidade`` Nones with ``valores`` at ``posicoes``."""
+    resultado = np.full(quantidade, None, dtype=object)
+    resultado[posicoes] = valores.tolist()
+    return resultado.tolist()  # type: ignore[no-any-return]
+
+
+def _ordenar_numpy(valores: Sequence[float], offsets: Sequence[int]) -> Tuple[Any, ...]:
+    """
+    Sort the grades of each series, keeping equal grades in their order.
+
+    Grades are ranked among the distinct grades, so a single stable sort of
+    integer keys (series, rank) orders every series at once.
+
+    Returns:
+        The sorted grades, the positions they came from, the start and the
+        length of each series, and the series of each sorted grade.
+    """
+    valores_np, inicios, tamanhos = _ragged_numpy(valores, offsets)
+    distintos, postos = np.unique(valores_np, return_inverse=True)
+    series = np.repeat(np.arange(len(tamanhos)), tamanhos)
+    ordem = np.argsort(series * len(distintos) + postos.ravel(), kind="stable")
+    return valores_np[ordem], ordem, inicios, tamanhos, series[ordem]
+
+
+def calcular_medianas(
+    valores: Sequence[float],
+    offsets: Sequence[int],
+    usar_numpy: Optional[bool] = None,
+) -> List[Optional[float]]:
+    """
+    Calculate the median of many grade series at once.
+
+    Gives exactly the results of calcular_mediana on each series.
+
+    Args:
+        valores: Grades of every series, one series after another.
+        offsets: ``n + 1`` offsets into ``valores`` (see calcular_medias).
+        usar_numpy: Use NumPy (default: if it is installed); otherwise each
+            series goes through calcular_mediana.
+
+    Returns:
+        The median of each series, None for empty series.
+
+    Raises:
+        ImportError: If ``usar_numpy`` is True and NumPy is not installed.
+    """
+    if not _usar_numpy(usar_numpy):
+        return _por_serie(calcular_mediana, valores, offsets)
+
+    ordenados, _, inicios, tamanhos, _ = _ordenar_numpy(valores, offsets)
+    cheias = np.flatnonzero(tamanhos)
+    impares = tamanhos[cheias] % 2
+    meio = inicios[cheias] + tamanhos[cheias] // 2
+    superior = ordenados[meio]
+    inferior = ordenados[meio - 1 + impares]  # the middle one itself if odd
+    medianas = np.where(impares == 1, superior, (inferior + superior) / 2)
+    return _por_posicao(len(tamanhos), cheias, medianas)
+
+
+def calcular_modas(
+    valores: Sequence[float],
+    offsets: Sequence[int],
+    usar_numpy: Optional[bool] = None,
+) -> List[Moda]:
+    """
+    Calculate the mode of many grade series at once.
+
+    Gives exactly the results of calcular_moda on each series: a value, a
+    list of the tied values in the order they first appear, or None when
+    every grade is unique.
+
+    Args:
+        valores: Grades of every series, one series after another.
+        offsets: ``n + 1`` offsets into ``valores`` (see calcular_medias).
+        usar_numpy: Use NumPy (default: if it is installed); otherwise each
+            series goes through calcular_moda.
+
+    Returns:
+        The mode of each series, None for empty series.
+
+    Raises:
+        ImportError: If ``usar_numpy`` is True and NumPy is not installed.
+    """
+    if not _usar_numpy(usar_numpy):
+        return _por_serie(calcular_moda, valores, offsets)
+
+    ordenados, ordem, _, tamanhos, series = _ordenar_numpy(valores, offsets)
+    if not len(ordenados):
+        return [None] * len(tamanhos)
+    # Runs of equal grades in a series; the first of each run came first
+    novo = np.ones(len(ordenados), dtype=bool)
+    novo[1:] = (series[1:] != series[:-1]) | (ordenados[1:] != ordenados[:-1])
+    inicios = np.flatnonzero(novo)
+    contagens = np.diff(np.append(inicios, len(ordenados)))
+    serie_run = series[inicios]
+    maior = np.zeros(len(tamanhos), dtype=np.int64)
+    np.maximum.at(maior, serie_run, contagens)
+
+    # The most frequent grades of each series, in the order they first appear
+    escolhidos = np.flatnonzero((contagens == maior[serie_run]) & (contagens > 1))
+    escolhidos = escolhidos[
+        np.lexsort((ordem[inicios[escolhidos]], serie_run[escolhidos]))
+    ]
+    serie_moda = serie_run[escolhidos]
+    valor_moda = ordenados[inicios[escolhidos]]
+    empatadas = np.bincount(serie_moda, minlength=len(tamanhos))[serie_moda] > 1
+
+    unicas = ~empatadas
+    modas: List[Moda] = _por_posicao(
+        len(tamanhos), serie_moda[unicas], valor_moda[unicas]
+    )
+    for serie, valor in zip(
+        serie_moda[empatadas].tolist(), valor_moda[empatadas].tolist()
+    ):
+        moda = modas[serie]
+        if isinstance(moda, list):
+            moda.append(valor)
+        else:
+            modas[serie] = [valor]
+    return modas
+
+
+class Acumulador:
+    """
+    Running statistics of a grade series, updated one grade at a time.
+
+    Keeps the count, the sum, the sum of squared deviations (Welford) and
+    a frequency table of the grades, so the mean, the variance and the
+    mode take no pass over the series and order statistics walk the
+    distinct grades only (a handful, since grades repeat), however many
+    attempts the series has. Gives exactly the results of calcular_media,
+    calcular_mediana and calcular_moda on the same grades.
+    """
+
+    __slots__ = (
+        "quantidade",
+        "_soma",
+        "_compensacao",
+        "_media_movel",
+        "_desvios",
+        "frequencias",
+        "_ordenadas",
+    )
+
+    def __init__(self, notas: Iterable[float] = ()) -> None:
+        """
+        Args:
+            notas: Initial grades, added in order.
+        """
+        self.quantidade = 0
+        self._soma = 0.0
+        self._compensacao = 0.0
+        # Welford's running mean and sum of squared deviations from it
+        self._media_movel = 0.0
+        self._desvios = 0.0
+        # Grade -> count, in the order the grades first appear
+        self.frequencias: Dict[float, int] = {}
+        self._ordenadas: Optional[List[float]] = None
+        self._adicionar_todas(notas)
+
+    def _adicionar_todas(self, notas: Iterable[float]) -> None:
+        """Add grades as adicionar does, with the state in local variables."""
+        quantidade = self.quantidade
+        soma, compensacao = self._soma, self._compensacao
+        media_movel, desvios = self._media_movel, self._desvios
+        frequencias = self.frequencias
+        vistas = len(frequencias)
+        for nota in notas:
+            quantidade += 1
+            total = soma + nota
+            if _SOMA_COMPENSADA:
+                if abs(soma) >= abs(nota):
+                    compensacao += (soma - total) + nota
+                else:
+                    compensacao += (nota - total) + soma
+            soma = total
+            desvio = nota - media_movel
+            media_movel += desvio / quantidade
+            desvios += desvio * (nota - media_movel)
+            frequencias[nota] = frequencias.get(nota, 0) + 1
+        self.quantidade = quantidade
+        self._soma, self._compensacao = soma, compensacao
+        self._media_movel, self._desvios = media_movel, desvios
+        if len(frequencias) != vistas:
+            self._ordenadas = None
+
+    def adicionar(self, nota: float) -> None:
+        """
+        Add a grade to the statistics.
+
+        Args:
+            nota: Grade appended to the series.
+        """
+        self.quantidade += 1
+        soma = self._soma
+        total = soma + nota
+        if _SOMA_COMPENSADA:
+            # The same float operations as sum(), so the mean matches it
+            if abs(soma) >= abs(nota):
+                self._compensacao += (soma - total) + nota
+            else:
+                self._compensacao += (nota - total) + soma
+        self._soma = total
+        desvio = nota - self._media_movel
+        self._media_movel += desvio / self.quantidade
+        self._desvios += desvio * (nota - self._media_movel)
+        frequencias = self.frequencias
+        vezes = frequencias.get(nota)
+        if vezes is None:
+            frequencias[nota] = 1
+            self._ordenadas = None
+        else:
+            frequencias[nota] = vezes + 1
+
+    @property
+    def media(self) -> Optional[float]:
+        """Arithmetic mean of the grades, or None if there are none."""
+        if not self.quantidade:
+            return None
+        soma = self._soma
+        compensacao = self._compensacao
+        if compensacao and isfinite(compensacao):
+            soma += compensacao
+        return soma / self.quantidade
+
+    @property
+    def mediana(self) -> Optional[float]:
+        """Median of the grades, or None if there are none."""
+        if not self.quantidade:
+            return None
+        meio = self.quantidade // 2
+        nota = self._na_posicao(meio)
+        if self.quantidade % 2:
+            return nota
+        return (self._na_posicao(meio - 1) + nota) / 2
+
+    def _na_posicao(self, posicao: int) -> float:
+        """Grade at a position of the sorted series (walks distinct grades)."""
+        if self._ordenadas is None:
+            self._ordenadas = sorted(self.frequencias)
+        frequencias = self.frequencias
+        vistas = 0
+        for nota in self._ordenadas:
+            vistas += frequencias[nota]
+            if vistas > posicao:
+                return nota
+        raise IndexError(posicao)
+
+    @property
+    def moda(self) -> Moda:
+        """Mode of the grades, as calcular_moda gives it."""
+        if not self.quantidade:
+            return None
+        maior_freq = max(self.frequencias.values())
+        if maior_freq == 1:
+            return None
+        modas = [k for k, v in self.frequencias.items() if v == maior_freq]
+        return modas[0] if len(modas) == 1 else modas
+
+    def _percentil(self, percentil: float) -> float:
+        """Percentile of the grades, interpolated as calcular_percentil does."""
+        posicao = (self.quantidade - 1) * percentil / 100
+        k = int(posicao)
+        fracao = posicao - k
+        valor = self._na_posicao(k)
+        if not fracao:
+            return valor
+        return valor + (self._na_posicao(k + 1) - valor) * fracao
+
+    def descrever(self) -> Optional["Descricao"]:
+        """
+        Describe the grades from the running statistics.
+
+        Returns:
+            The descriptive statistics of the grades, or None if there are
+            none.
+        """
+        if not self.quantidade:
+            return None
+        if self._ordenadas is None:
+            self._ordenadas = sorted(self.frequencias)
+        histograma = [0] * _FAIXAS_HISTOGRAMA
+        ultima = _FAIXAS_HISTOGRAMA - 1
+        for nota, vezes in self.frequencias.items():
+            histograma[min(max(int(nota), 0), ultima)] += vezes
+        variancia = self._desvios / self.quantidade
+        return Descricao(
+            quantidade=self.quantidade,
+            media=self.media,  # type: ignore[arg-type]
+            variancia=variancia,
+            desvio_padrao=sqrt(variancia),
+            minimo=self._ordenadas[0],
+            maximo=self._ordenadas[-1],
+            q1=self._percentil(25),
+            mediana=self.mediana,  # type: ignore[arg-type]
+            q3=self._percentil(75),
+            moda=self.moda,
+            histograma=tuple(histograma),
+        )
+
+
+# Width-1 bins of the 0-10 grade range: [0, 1), [1, 2), ..., [9, 10]
+_FAIXAS_HISTOGRAMA = 10
+
+
+class Descricao(NamedTuple):
+    """Descriptive statistics of a grade series (see descrever)."""
+
+    quantidade: int
+    media: float
+    # Population variance: the grades are all the attempts of the series
+    variancia: float
+    desvio_padrao: float
+    minimo: float
+    maximo: float
+    q1: float
+    mediana: float
+    q3: float
+    moda: Moda
+    # Grades in each width-1 bin of the 0-10 range, 10 included in the last
+    histograma: Tuple[int, ...]
+
+
+def descrever(lista: Sequence[float]) -> Optional[Descricao]:
+    """
+    Calculate the descriptive statistics of a list of numbers in one pass.
+
+    A single pass feeds an Acumulador (count, compensated sum, Welford's
+    sum of squared deviations and a frequency table); everything else is
+    read off the frequency table, which grades in the 0-10 range keep
+    small. A ListaNotas reuses the statistics it keeps, with no pass at
+    all after the first.
+
+    Args:
+        lista: Sequence of numbers to describe.
+
+    Returns:
+        Mean, variance, standard deviation, minimum, maximum, quartiles
+        (interpolated as calcular_percentil does), median, mode and
+        histogram, or None if the list is empty. The mean, median and mode
+        are exactly those of calcular_media, calcular_mediana and
+        calcular_moda.
+    """
+    if not lista:
+        logger.warning("Attempted to describe empty list")
+        return None
+    resumo = lista.resumo if isinstance(lista, ListaNotas) else Acumulador(lista)
+    return resumo.descrever()
+
+
+# Each level of a quantile sketch holds this fraction of the grades of the
+# level above it (KLL)
+_DECAIMENTO = 2 / 3
+
+
+class EsbocoQuantis:
+    """
+    Mergeable quantile sketch of bounded size (KLL).
+
+    Keeps a few hundred grades however many are added. Grades go into
+    level 0; when the sketch is full, the lowest full level is sorted and
+    every other grade (the odd or the even positions, at random) moves up
+    a level, where each grade stands for twice as many, so the weights
+    always add up to the number of grades. Percentiles are read off the
+    weighted grades. Sketches of parts of the grades (per shard or per
+    process) merge into a sketch of all of them with the same error bound,
+    and they pickle.
+    """
+
+    __slots__ = (
+        "erro",
+        "quantidade",
+        "_k",
+        "_niveis",
+        "_retidos",
+        "_limite",
+        "_aleatorio",
+    )
+
+    def __init__(self, erro: float = 0.01, semente: Optional[int] = None) -> None:
+        """
+        Args:
+            erro: Error bound, as a fraction of the number of grades: a
+                percentile is, with 99% probability, a grade at most
+                ``erro * quantidade`` positions away from the exact one.
+            semente: Seed of the random choices of the compactions, for
+                reproducible sketches.
+
+        Raises:
+            ValueError: If the error bound is not between 0 and 1.
+        """
+        if not 0 < erro < 1:
+            raise ValueError(f"Error bound {erro} out of range (0, 1)")
+        self.erro = erro
+        self.quantidade = 0
+        # Capacity of the top level, from the KLL rank error of about 2.3 / k
+        self._k = max(ceil(2.3 / erro), 8)
+        self._niveis: List[List[float]] = [[]]
+        self._retidos = 0
+        self._limite = self._k
+        self._aleatorio = random.Random(semente)
+
+    @property
+    def retidos(self) -> int:
+        """Number of grades the sketch holds."""
+        return self._retidos
+
+    def _capacidade(self, altura: int) -> int:
+        """Grades a level holds before it is compacted."""
+        profundidade = len(self._niveis) - altura - 1
+        return max(ceil(self._k * _DECAIMENTO**profundidade), 2)
+
+    def _compactar(self) -> None:
+        """Compact the lowest full levels until the sketch is below its limit."""
+        niveis = self._niveis
+        for altura, nivel in enumerate(niveis):
+            if len(nivel) < self._capacidade(altura):
+                continue
+            if altura + 1 == len(niveis):
+                niveis.append([])
+                self._limite = sum(map(self._capacidade, range(len(niveis))))
+            nivel.sort()
+            resto = [nivel.pop()] if len(nivel) % 2 else []
+            promovidas = nivel[self._aleatorio.getrandbits(1) :: 2]
+            niveis[altura + 1].extend(promovidas)
+            self._retidos -= len(nivel) - len(promovidas)
+            nivel[:] = resto
+            if self._retidos < self._limite:
+                return
+
+    def adicionar(self, nota: float) -> None:
+        """
+        Add a grade to the sketch.
+
+        Args:
+            nota: Grade.
+        """
+        self._niveis[0].append(nota)
+        self.quantidade += 1
+        self._retidos += 1
+        if self._retidos >= self._limite:
+            self._compactar()
+
+    def adicionar_todas(self, notas: Iterable[float]) -> None:
+        """
+        Add many grades to the sketch, as many as it has room for at a time.
+
+        Args:
+            notas: Grades, e.g. a list, a ListaNotas or a grade column.
+        """
+        nivel = self._niveis[0]
+        notas = iter(notas)
+        while True:
+            bloco = list(islice(notas, self._limite - self._retidos))
+            if not bloco:
+                return
+            nivel.extend(bloco)
+            self.quantidade += len(bloco)
+            self._retidos += len(bloco)
+            while self._retidos >= self._limite:
+                self._compactar()
+
+    def mesclar(self, outro: "EsbocoQuantis") -> None:
+        """
+        Add the grades of another sketch to this one.
+
+        Args:
+            outro: Sketch of other grades, with the same error bound.
+
+        Raises:
+            ValueError: If the sketches have different error bounds.
+        """
+        if outro.erro != self.erro:
+            raise ValueError(
+                f"Cannot merge sketches with error bounds {self.erro} and {outro.erro}"
+            )
+        niveis = self._niveis
+        while len(niveis) < len(outro._niveis):
+            niveis.append([])
+        self._limite = sum(map(self._capacidade, range(len(niveis))))
+        for nivel, outros in zip(niveis, outro._niveis):
+            nivel.extend(outros)
+        self.quantidade += outro.quantidade
+        self._retidos += outro._retidos
+        while self._retidos >= self._limite:
+            self._compactar()
+
+    def percentil(self, percentil: float) -> Optional[float]:
+        """
+        Estimate a percentile of the grades added.
+
+        While no level has been compacted the sketch holds every grade and
+        the result is exactly that of calcular_percentil.
+
+        Args:
+            percentil: Percentile, from 0 to 100.
+
+        Returns:
+            The grade at the position of the percentile among the grades
+            the sketch holds (weighted), or None if it has no grades.
+
+        Raises:
+            ValueError: If the percentile is out of range.
+        """
+        if not 0 <= percentil <= 100:
+            raise ValueError(f"Percentile {percentil} out of range [0, 100]")
+        if not self.quantidade:
+            logger.warning("Attempted to calculate percentile of empty sketch")
+            return None
+        if len(self._niveis) == 1:
+            return calcular_percentil(self._niveis[0], percentil)
+
+        pesadas = sorted(
+            (
+                (nota, 1 << altura)
+                for altura, nivel in enumerate(self._niveis)
+                for nota in nivel
+            ),
+            key=itemgetter(0),
+        )
+        posicao = (self.quantidade - 1) * percentil / 100
+        vistas = 0
+        for nota, peso in pesadas:
+            vistas += peso
+            if vistas > posicao:
+                return nota
+        return pesadas[-1][0]  # pragma: no cover - weights add up to quantidade
@@ -2,20 +2,148 @@
 IO module for loading and saving student data.
 """
 
+import csv
+import gc
+import gzip
+import hashlib
+import io
 import json
 import logging
+import lzma
+import marshal
+import mmap
 import os
-from dataclasses import asdict, dataclass, field
+import re
+import shutil
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import chain, islice, repeat
+from operator import itemgetter, methodcaller
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any,
+    Callable,
+    IO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    TextIO,
+    Tuple,
+    Union,
+)
 
+from .core import ListaNotas
 from .data import disciplinas
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
 logger = logging.getLogger(__name__)
 
 # Default data file path
 DEFAULT_DATA_PATH = Path("data/alunos.json")
 
+# Default database path for the SQLite backend
+DEFAULT_SQLITE_PATH = DEFAULT_DATA_PATH.with_suffix(".db")
+
+# Default directory of the sharded layout
+DEFAULT_SHARD_PATH = DEFAULT_DATA_PATH.with_suffix("")
+
+# URL-style prefix of a data path that selects the SQLite backend
+SQLITE_SCHEME = "sqlite://"
+
+# Suffixes of a data path that select the SQLite backend without the scheme
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+# Suffix appended to the data file name to build the journal path
+JOURNAL_SUFFIX = ".journal"
+
+# Suffix of data files in the JSON Lines format (one student per line)
+JSONL_SUFFIX = ".jsonl"
+
+# Compressed data files (alunos.json.gz, alunos.jsonl.xz): codec by suffix
+COMPRESSION_SUFFIXES = {".gz": gzip, ".xz": lzma}
+
+# Suffix appended to the data file name to build the binary cache path
+CACHE_SUFFIX = ".cache"
+
+# Suffix appended to the data file name to build the columnar grade file path
+COLUMNS_SUFFIX = ".notas"
+
+# Suffix appended to the data file name to build the quarantine file path
+QUARANTINE_SUFFIX = ".quarantine"
+
+# Suffix of the lock file that serializes writers and holds the generation
+LOCK_SUFFIX = ".lock"
+
+# File that describes a sharded data directory, and its format version
+SHARD_MANIFEST = "manifest.json"
+_SHARD_VERSION = 1
+
+# Number of shards of a new sharded directory (overridden by PIM_SHARDS)
+DEFAULT_SHARDS = 16
+
+# Identifies (and versions) the binary cache format
+_CACHE_MAGIC = b"PIMCACHE"
+_CACHE_VERSION = 2
+
+# Snapshot modification times this close to the writing of its cache may not
+# tell two versions apart (FAT keeps them in 2 s steps; others are finer)
+_GRANULARIDADE_MTIME_NS = 2_000_000_000
+
+# Identifies (and versions) the columnar grade file format
+_COLUMNS_MAGIC = b"PIMNOTAS"
+_COLUMNS_VERSION = 1
+
+# Columnar file header: magic, version, value type code, student and
+# discipline counts; then one directory entry per discipline (positions of
+# its offset table and values, number of grades, name length) and its name
+_COLUMNS_HEADER = struct.Struct("<8sHcxII")
+_COLUMNS_ENTRY = struct.Struct("<QQQH")
+
+# Serializes journal appends and compactions within the process
+_journal_lock = threading.Lock()
+
+# Supported persistence modes (selected via the PIM_STORAGE environment variable)
+STORAGE_MODES = ("json", "journal", "sqlite", "sharded")
+DEFAULT_STORAGE_MODE = "json"
+
+# What a load does with corrupt records (selected via PIM_ON_CORRUPT)
+CORRUPT_POLICIES = ("error", "skip", "quarantine")
+DEFAULT_CORRUPT_POLICY = "error"
+
+# Durability levels of file writes (selected via PIM_DURABILITY)
+DURABILITY_LEVELS = ("none", "batched", "strict")
+DEFAULT_DURABILITY = "none"
+
+# Columns a roster CSV must have (others are ignored), and rows checked at a time
+CSV_COLUMNS = ("nome", "email", "senha")
+IMPORT_BATCH_SIZE = 10_000
+
+# Columns of an export, in their default order; grade columns make one row per
+# grade, otherwise there is one row per student
+EXPORT_COLUMNS = ("nome", "email", "disciplina", "tentativa", "nota")
+EXPORT_FORMATS = ("csv", "jsonl")
+
 
 class DataLoadError(Exception):
     """Exception raised when loading data fails."""
@@ -29,28 +157,188 @@ class DataSaveError(Exception):
     pass
 
 
-@dataclass
+# Shared table of discipline names; students refer to disciplines by index
+_DISCIPLINAS: List[str] = list(disciplinas)
+_DISCIPLINA_IDS: Dict[str, int] = {nome: i for i, nome in enumerate(_DISCIPLINAS)}
+
+
+def _disciplina_id(disciplina: str) -> int:
+    """Get the shared id of a discipline, registering unknown names."""
+    disciplina_id = _DISCIPLINA_IDS.get(disciplina)
+    if disciplina_id is None:
+        disciplina_id = len(_DISCIPLINAS)
+        _DISCIPLINAS.append(disciplina)
+        _DISCIPLINA_IDS[disciplina] = disciplina_id
+    return disciplina_id
+
+
+class NotasView(MutableMapping):
+    """
+    Mapping view of a student's grades keyed by discipline name.
+
+    Every discipline in ``pim.data.disciplinas`` is always present; its list
+    of grades is only allocated the first time it is accessed. Lists are
+    stored as :class:`~pim.core.ListaNotas`; assigned lists are converted.
+    """
+
+    __slots__ = ("_aluno",)
+
+    def __init__(self, aluno: "Aluno") -> None:
+        self._aluno = aluno
+
+    def __getitem__(self, disciplina: str) -> ListaNotas:
+        disciplina_id = _DISCIPLINA_IDS.get(disciplina)
+        if disciplina_id is None:
+            raise KeyError(disciplina)
+        notas = self._aluno._lista(disciplina_id)
+        if notas is None:
+            if disciplina_id >= len(disciplinas):
+                raise KeyError(disciplina)
+            notas = ListaNotas()
+            self._aluno._guardar(disciplina_id, notas)
+        return notas
+
+    def __setitem__(self, disciplina: str, notas: Iterable[float]) -> None:
+        self._aluno._guardar(_disciplina_id(disciplina), notas)
+
+    def setdefault(  # type: ignore[override]
+        self, disciplina: str, notas: Iterable[float] = ()
+    ) -> ListaNotas:
+        # The stored list is a converted copy, so return it, not the default
+        if disciplina not in self:
+            self[disciplina] = notas
+        return self[disciplina]
+
+    def __delitem__(self, disciplina: str) -> None:
+        disciplina_id = _DISCIPLINA_IDS.get(disciplina)
+        if disciplina_id is None or self._aluno._lista(disciplina_id) is None:
+            raise KeyError(disciplina)
+        self._aluno._guardar(disciplina_id, None)
+
+    def __iter__(self) -> Iterator[str]:
+        for disciplina, _ in self._aluno._itens_notas():
+            yield disciplina
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._aluno._itens_notas())
+
+    def __repr__(self) -> str:
+        return repr(dict(self._aluno._itens_notas()))
+
+
 class Aluno:
-    """Dataclass representing a student."""
+    """
+    Student record.
 
-    nome: str
-    email: str
-    senha: str
-    notas: Dict[str, List[float]] = field(default_factory=dict)
+    Instances are slotted and keep their grades in a per-student list indexed
+    by the shared discipline ids, allocated only when the first grade list is
+    needed. Each grade list is a :class:`~pim.core.ListaNotas` of two-byte
+    grade codes. ``aluno.notas`` exposes them as a mapping keyed by
+    discipline name.
+    """
 
-    def __post_init__(self) -> None:
-        """Initialize notes for all disciplines if not provided."""
-        if not self.notas:
-            self.notas = {disc: [] for disc in disciplinas}
-        else:
-            # Ensure all disciplines exist in notas
-            for disc in disciplinas:
-                if disc not in self.notas:
-                    self.notas[disc] = []
+    __slots__ = ("nome", "email", "senha", "_notas")
+
+    def __init__(
+        self,
+        nome: str,
+        email: str,
+        senha: str,
+        notas: Optional[Mapping[str, Iterable[float]]] = None,
+    ) -> None:
+        self.nome = nome
+        self.email = email
+        self.senha = senha
+        self._notas: Optional[List[Optional[ListaNotas]]] = None
+        if notas:
+            self.notas = notas
+
+    @property
+    def notas(self) -> NotasView:
+        """Grades of the student keyed by discipline name."""
+        return NotasView(self)
+
+    @notas.setter
+    def notas(self, notas: Mapping[str, Iterable[float]]) -> None:
+        self._notas = None
+        for disciplina, lista in notas.items():
+            if lista:
+                self._guardar(_disciplina_id(disciplina), lista)
+
+    def _lista(self, disciplina_id: int) -> Optional[ListaNotas]:
+        """Get the stored grade list of a discipline, if allocated."""
+        if self._notas is None or disciplina_id >= len(self._notas):
+            return None
+        return self._notas[disciplina_id]
+
+    def _guardar(self, disciplina_id: int, notas: Optional[Iterable[float]]) -> None:
+        """Store (or clear, with None) the grade list of a discipline."""
+        if notas is not None and not isinstance(notas, ListaNotas):
+            notas = ListaNotas(notas)
+        if self._notas is None:
+            if notas is None:
+                return
+            self._notas = [None] * len(_DISCIPLINAS)
+        elif disciplina_id >= len(self._notas):
+            self._notas.extend([None] * (len(_DISCIPLINAS) - len(self._notas)))
+        self._notas[disciplina_id] = notas
+
+    def _itens_notas(self) -> Iterator[Tuple[str, Sequence[float]]]:
+        """Iterate over (discipline, grades) without allocating missing lists."""
+        for disciplina_id, disciplina in enumerate(disciplinas):
+            yield disciplina, self._lista(disciplina_id) or ()
+        if self._notas is not None:
+            for disciplina_id in range(len(disciplinas), len(self._notas)):
+                notas = self._notas[disciplina_id]
+                if notas is not None:
+                    yield _DISCIPLINAS[disciplina_id], notas
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert the student to a dictionary."""
-        return asdict(self)
+        return {
+            "nome": self.nome,
+            "email": self.email,
+            "senha": self.senha,
+            "notas": {disc: list(notas) for disc, notas in self._itens_notas()},
+        }
+
+    def _registro(self) -> Dict[str, Any]:
+        """
+        Build the compact on-disk record of the student.
+
+        Reads the grade lists straight from the student's slots instead of
+        through the ``notas`` view, and leaves disciplines without grades
+        out (from_dict restores them). Each grade list is still copied, as a
+        plain list of the (shared) decoded grade floats, since json cannot
+        encode a ListaNotas.
+        """
+        notas = self._notas
+        return {
+            "nome": self.nome,
+            "email": self.email,
+            "senha": self.senha,
+            "notas": {}
+            if notas is None
+            else {
+                _DISCIPLINAS[i]: list(lista) for i, lista in enumerate(notas) if lista
+            },
+        }
+
+    @classmethod
+    def _restaurar(
+        cls,
+        nome: str,
+        email: str,
+        senha: str,
+        notas: Optional[List[Any]],
+    ) -> "Aluno":
+        """Rebuild a student from its exported layout (as stored in the cache)."""
+        aluno = cls.__new__(cls)
+        aluno.nome = nome
+        aluno.email = email
+        aluno.senha = senha
+        aluno._notas = None if notas is None else [_importar_lista(n) for n in notas]
+        return aluno
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Aluno":
@@ -62,6 +350,167 @@ class Aluno:
             notas=data.get("notas", {}),
         )
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Aluno):
+            return NotImplemented
+        return (self.nome, self.email, self.senha) == (
+            other.nome,
+            other.email,
+            other.senha,
+        ) and {d: n for d, n in self._itens_notas() if n} == {
+            d: n for d, n in other._itens_notas() if n
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"Aluno(nome={self.nome!r}, email={self.email!r}, "
+            f"senha={self.senha!r}, notas={self.notas!r})"
+        )
+
+
+def _exportar_lista(notas: Optional[ListaNotas]) -> Any:
+    """Dump a grade list to marshal-friendly data: code bytes, or floats."""
+    if notas is None:
+        return None
+    codigos = notas.codigos
+    return list(notas) if codigos is None else codigos.tobytes()
+
+
+def _importar_lista(dados: Any) -> Optional[ListaNotas]:
+    """Rebuild a grade list dumped by _exportar_lista."""
+    if dados is None:
+        return None
+    if isinstance(dados, bytes):
+        codigos = array("H")
+        codigos.frombytes(dados)
+        return ListaNotas.de_codigos(codigos)
+    return ListaNotas(dados)
+
+
+def normalizar_email(email: str) -> str:
+    """
+    Normalize an email address for lookups.
+
+    Args:
+        email: Email address as typed or stored.
+
+    Returns:
+        The address without surrounding whitespace, in lower case.
+    """
+    return email.strip().lower()
+
+
+class StudentRegistry:
+    """
+    Roster of students indexed by normalized email.
+
+    The registry owns the list of students and keeps a hash index in sync
+    with it, so login and duplicate-email checks take constant time. Change
+    the roster only through the registry methods.
+    """
+
+    def __init__(self, alunos: Optional[List[Aluno]] = None) -> None:
+        """
+        Args:
+            alunos: Initial list of students. The list is adopted, not copied.
+        """
+        self._alunos: List[Aluno] = alunos if alunos is not None else []
+        self._por_email: Dict[str, Aluno] = {}
+        self._indexar()
+
+    def _indexar(self) -> None:
+        """Rebuild the email index from the list of students."""
+        self._por_email.clear()
+        for aluno in self._alunos:
+            chave = normalizar_email(aluno.email)
+            if chave in self._por_email:
+                logger.warning(f"Duplicate email {aluno.email} in roster, kept first")
+                continue
+            self._por_email[chave] = aluno
+
+    def load(self, alunos: Iterable[Aluno]) -> None:
+        """
+        Replace the roster with the given students.
+
+        Args:
+            alunos: The new students.
+        """
+        self._alunos[:] = alunos
+        self._indexar()
+
+    def add(self, aluno: Aluno) -> None:
+        """
+        Add a student to the roster.
+
+        Args:
+            aluno: The student to add.
+
+        Raises:
+            ValueError: If a student with the same email is already registered.
+        """
+        chave = normalizar_email(aluno.email)
+        if chave in self._por_email:
+            raise ValueError(f"Email already registered: {aluno.email}")
+        self._alunos.append(aluno)
+        self._por_email[chave] = aluno
+
+    def remove(self, email: str) -> Aluno:
+        """
+        Remove a student from the roster.
+
+        Args:
+            email: Email of the student to remove.
+
+        Returns:
+            The removed student.
+
+        Raises:
+            KeyError: If no student has this email.
+        """
+        aluno = self._por_email.pop(normalizar_email(email))
+        self._alunos.remove(aluno)
+        return aluno
+
+    def get(self, email: str) -> Optional[Aluno]:
+        """
+        Find a student by email.
+
+        Args:
+            email: Email to look up (case and surrounding spaces are ignored).
+
+        Returns:
+            The student, or None if not registered.
+        """
+        return self._por_email.get(normalizar_email(email))
+
+    def autenticar(self, email: str, senha: str) -> Optional[Aluno]:
+        """
+        Find the student matching an email and password.
+
+        Args:
+            email: Email to look up.
+            senha: Password to check.
+
+        Returns:
+            The student, or None if the credentials do not match.
+        """
+        aluno = self.get(email)
+        if aluno is None or aluno.senha != senha:
+            return None
+        return aluno
+
+    def __contains__(self, email: object) -> bool:
+        return isinstance(email, str) and normalizar_email(email) in self._por_email
+
+    def __len__(self) -> int:
+        return len(self._alunos)
+
+    def __iter__(self) -> Iterator[Aluno]:
+        return iter(self._alunos)
+
+    def __getitem__(self, indice: int) -> Aluno:
+        return self._alunos[indice]
+
 
 def get_data_path(custom_path: Optional[str] = None) -> Path:
     """
@@ -74,84 +523,3920 @@ def get_data_path(custom_path: Optional[str] = None) -> Path:
         Path object for the data file.
     """
     if custom_path:
-        return Path(custom_path)
+        return Path(_sem_esquema(custom_path))
 
     # Check environment variable for custom path
     env_path = os.environ.get("PIM_DATA_PATH")
     if env_path:
-        return Path(env_path)
+        return Path(_sem_esquema(env_path))
 
     return DEFAULT_DATA_PATH
 
 
-def carregar_dados(caminho: Optional[str] = None) -> List[Aluno]:
+def get_store_path(caminho: Optional[str] = None) -> Path:
     """
-    Load student data from a JSON file.
+    Get the path of the data store of the configured backend.
+
+    Like :func:`get_data_path`, but without a path or PIM_DATA_PATH the
+    default follows the storage mode: DEFAULT_SQLITE_PATH in ``sqlite``
+    mode, DEFAULT_SHARD_PATH in ``sharded`` mode, DEFAULT_DATA_PATH
+    otherwise. Every backend and reader resolves its default through this,
+    so a store is read back from where it was written.
 
     Args:
-        caminho: Optional path to the JSON file. If not provided, uses default path.
+        caminho: Optional data path (may use the ``sqlite://`` scheme).
 
     Returns:
-        List of Aluno objects.
+        Path object for the data file, database or sharded directory.
+    """
+    if caminho or os.environ.get("PIM_DATA_PATH"):
+        return get_data_path(caminho)
+    mode = get_storage_mode()
+    if mode == "sqlite":
+        return DEFAULT_SQLITE_PATH
+    if mode == "sharded":
+        return DEFAULT_SHARD_PATH
+    return DEFAULT_DATA_PATH
 
-    Raises:
-        DataLoadError: If there's an error loading the data.
+
+def _sem_esquema(caminho: str) -> str:
+    """Strip a storage scheme prefix (such as ``sqlite://``) from a data path."""
+    if caminho.startswith(SQLITE_SCHEME):
+        return caminho[len(SQLITE_SCHEME) :]
+    return caminho
+
+
+def get_storage_mode(caminho: Optional[str] = None) -> str:
+    """
+    Get the persistence mode configured for the application.
+
+    A data path with the ``sqlite://`` scheme or a SQLITE_SUFFIXES suffix
+    (such as ``alunos.db``) selects the SQLite backend; otherwise the mode
+    is read from the PIM_STORAGE environment variable. In
+    ``json`` mode every change rewrites the whole data file; in ``journal``
+    mode registrations and grades are appended to a journal next to the data
+    file; in ``sqlite`` mode each change updates a single database row; in
+    ``sharded`` mode the data path is a directory of shard files (also
+    selected when the path already is one) and each change rewrites one shard.
+
+    Args:
+        caminho: Optional path to the data file. If not provided, uses PIM_DATA_PATH.
+
+    Returns:
+        One of STORAGE_MODES.
+    """
+    bruto = caminho or os.environ.get("PIM_DATA_PATH", "")
+    if bruto.startswith(SQLITE_SCHEME) or Path(bruto).suffix in SQLITE_SUFFIXES:
+        return "sqlite"
+    if bruto and is_sharded(Path(bruto)):
+        return "sharded"
+
+    mode = os.environ.get("PIM_STORAGE", DEFAULT_STORAGE_MODE).strip().lower()
+    if mode not in STORAGE_MODES:
+        logger.warning(
+            f"Unknown storage mode {mode!r}, falling back to {DEFAULT_STORAGE_MODE!r}"
+        )
+        return DEFAULT_STORAGE_MODE
+    return mode
+
+
+def get_journal_path(caminho: Optional[str] = None) -> Path:
+    """
+    Get the path of the journal that accompanies a data file.
+
+    Args:
+        caminho: Optional path to the data file. If not provided, uses default path.
+
+    Returns:
+        Path object for the journal file.
     """
     path = get_data_path(caminho)
-    logger.info(f"Loading student data from {path}")
+    return path.with_name(path.name + JOURNAL_SUFFIX)
 
-    if not path.exists():
-        logger.info(f"Data file {path} does not exist, returning empty list")
-        return []
 
-    try:
-        with open(path, "r", encoding="utf-8") as arquivo:
-            data = json.load(arquivo)
+def get_lock_path(caminho: Optional[str] = None) -> Path:
+    """
+    Get the path of the lock file that accompanies a data file.
 
-        if not isinstance(data, list):
-            logger.error(f"Invalid data format in {path}: expected list, got {type(data)}")
-            raise DataLoadError(f"Invalid data format: expected list, got {type(data)}")
+    Args:
+        caminho: Optional path to the data file. If not provided, uses default path.
 
-        alunos = [Aluno.from_dict(item) for item in data]
-        logger.info(f"Successfully loaded {len(alunos)} students")
-        return alunos
+    Returns:
+        Path object for the lock file.
+    """
+    path = get_data_path(caminho)
+    return path.with_name(path.name + LOCK_SUFFIX)
 
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse JSON from {path}: {e}")
-        raise DataLoadError(f"Invalid JSON format in {path}: {e}") from e
-    except OSError as e:
-        logger.error(f"Failed to read file {path}: {e}")
-        raise DataLoadError(f"Failed to read file {path}: {e}") from e
+
+def get_cache_path(caminho: Optional[str] = None) -> Path:
+    """
+    Get the path of the binary cache that accompanies a data file.
+
+    Args:
+        caminho: Optional path to the data file. If not provided, uses default path.
+
+    Returns:
+        Path object for the cache file.
+    """
+    path = get_data_path(caminho)
+    return path.with_name(path.name + CACHE_SUFFIX)
 
 
-def salvar_dados(alunos: List[Aluno], caminho: Optional[str] = None) -> None:
+def get_columns_path(caminho: Optional[str] = None) -> Path:
     """
-    Save student data to a JSON file.
+    Get the path of the columnar grade file that accompanies a data file.
 
     Args:
-        alunos: List of Aluno objects to save.
-        caminho: Optional path to the JSON file. If not provided, uses default path.
+        caminho: Optional path to the data file. If not provided, uses default path.
 
-    Raises:
-        DataSaveError: If there's an error saving the data.
+    Returns:
+        Path object for the columnar grade file.
+    """
+    path = get_data_path(caminho)
+    return path.with_name(path.name + COLUMNS_SUFFIX)
+
+
+def get_quarantine_path(caminho: Optional[str] = None) -> Path:
+    """
+    Get the path of the file that receives the corrupt records of a data file.
+
+    Args:
+        caminho: Optional path to the data file. If not provided, uses default path.
+
+    Returns:
+        Path object for the quarantine file.
     """
     path = get_data_path(caminho)
-    logger.info(f"Saving {len(alunos)} students to {path}")
+    return path.with_name(path.name + QUARANTINE_SUFFIX)
+
+
+def get_corrupt_policy() -> str:
+    """
+    Get what loads do with corrupt records, from PIM_ON_CORRUPT.
+
+    ``error`` fails the load (without checking checksums), ``skip`` checks
+    every record and leaves out the corrupt ones, and ``quarantine`` also
+    copies them to the quarantine file (see get_quarantine_path).
+
+    Returns:
+        One of CORRUPT_POLICIES.
+    """
+    politica = os.environ.get("PIM_ON_CORRUPT", DEFAULT_CORRUPT_POLICY).strip().lower()
+    if politica not in CORRUPT_POLICIES:
+        logger.warning(
+            f"Unknown corrupt record policy {politica!r}, "
+            f"falling back to {DEFAULT_CORRUPT_POLICY!r}"
+        )
+        return DEFAULT_CORRUPT_POLICY
+    return politica
+
+
+def is_fast_save_enabled() -> bool:
+    """
+    Check whether JSON snapshots are saved in the fast, compact layout.
+
+    Enabled by setting the PIM_SAVE_MODE environment variable to ``fast``;
+    the default ``pretty`` mode writes indented JSON.
+
+    Returns:
+        True if the fast layout is enabled.
+    """
+    return os.environ.get("PIM_SAVE_MODE", "pretty").strip().lower() == "fast"
+
+
+def is_cache_enabled() -> bool:
+    """
+    Check whether loads may use the binary cache.
+
+    The cache is enabled unless the PIM_CACHE environment variable is set to
+    ``0``, ``false``, ``no`` or ``off``.
+
+    Returns:
+        True if the cache is enabled.
+    """
+    valor = os.environ.get("PIM_CACHE", "1").strip().lower()
+    return valor not in ("0", "false", "no", "off")
+
+
+@dataclass
+class DurabilityPolicy:
+    """
+    How hard file writes try to reach the disk.
+
+    - ``none``: writes stay in the page cache until the OS flushes them.
+    - ``batched``: files are fsynced every ``max_escritas`` writes or at most
+      ``max_segundos`` after an unsynced write, whichever comes first.
+    - ``strict``: snapshots are written to a temporary file, fsynced,
+      atomically renamed and the directory fsynced; journal appends are
+      fsynced before returning.
+    """
+
+    nivel: str = DEFAULT_DURABILITY
+    max_escritas: int = 100
+    max_segundos: float = 1.0
+
+    def __post_init__(self) -> None:
+        if self.nivel not in DURABILITY_LEVELS:
+            raise ValueError(
+                f"Invalid durability level {self.nivel!r}; "
+                f"expected one of {', '.join(DURABILITY_LEVELS)}"
+            )
+
+    @classmethod
+    def from_env(cls, nivel: Optional[str] = None) -> "DurabilityPolicy":
+        """
+        Build a policy from the environment.
+
+        PIM_DURABILITY selects the level; PIM_FSYNC_WRITES and PIM_FSYNC_MS
+        override the thresholds of the ``batched`` level.
+
+        Args:
+            nivel: Level to use instead of PIM_DURABILITY.
 
+        Raises:
+            ValueError: If ``nivel`` is not a known level.
+        """
+        if nivel is None:
+            nivel = os.environ.get("PIM_DURABILITY", DEFAULT_DURABILITY).strip().lower()
+            if nivel not in DURABILITY_LEVELS:
+                logger.warning(f"Ignoring invalid value {nivel!r} for PIM_DURABILITY")
+                nivel = DEFAULT_DURABILITY
+        policy = cls(nivel)
+        for var, attr, tipo, escala in (
+            ("PIM_FSYNC_WRITES", "max_escritas", int, 1),
+            ("PIM_FSYNC_MS", "max_segundos", float, 1000),
+        ):
+            valor = os.environ.get(var)
+            if valor is None:
+                continue
+            try:
+                setattr(policy, attr, max(tipo(valor) / escala, 0))
+            except ValueError:
+                logger.warning(f"Ignoring invalid value {valor!r} for {var}")
+        return policy
+
+
+def _fsync_diretorio(path: Path) -> None:
+    """Persist the directory entry of a created or renamed file."""
     try:
-        # Ensure parent directory exists
-        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        # Directories cannot be opened (nor need syncing) on Windows
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
-        data = [aluno.to_dict() for aluno in alunos]
 
-        with open(path, "w", encoding="utf-8") as arquivo:
-            json.dump(data, arquivo, indent=4, ensure_ascii=False)
+class _FsyncsPendentes:
+    """Files written under the ``batched`` level that still need an fsync."""
 
-        logger.info(f"Successfully saved data to {path}")
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._caminhos: Dict[Path, None] = {}
+        self._escritas = 0
+        self._timer: Optional[threading.Timer] = None
 
-    except OSError as e:
-        logger.error(f"Failed to write file {path}: {e}")
-        raise DataSaveError(f"Failed to write file {path}: {e}") from e
-    except (TypeError, ValueError) as e:
-        logger.error(f"Failed to serialize data: {e}")
-        raise DataSaveError(f"Failed to serialize data: {e}") from e
+    def registrar(self, path: Path, politica: DurabilityPolicy) -> None:
+        """Count a write, syncing now or arming the timer as the policy says."""
+        with self._lock:
+            self._caminhos[path] = None
+            self._escritas += 1
+            if self._escritas < politica.max_escritas and politica.max_segundos > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(
+                        politica.max_segundos, self.sincronizar
+                    )
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.sincronizar()
+
+    def sincronizar(self) -> None:
+        """Fsync every pending file."""
+        with self._lock:
+            caminhos, self._caminhos = list(self._caminhos), {}
+            self._escritas = 0
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        for path in caminhos:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                # Replaced or removed since (e.g. a compacted journal)
+                continue
+            except OSError as e:
+                logger.warning(f"Failed to sync {path}: {e}")
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+
+_fsyncs_pendentes = _FsyncsPendentes()
+
+
+def sincronizar_pendentes() -> None:
+    """
+    Fsync every file whose ``batched`` fsync is still pending.
+
+    Called on clean shutdown so the last writes do not wait for the timer.
+    """
+    _fsyncs_pendentes.sincronizar()
+
+
+def _concluir_escrita(arquivo: IO[Any], path: Path, politica: DurabilityPolicy) -> None:
+    """Make a finished write as durable as the policy requires."""
+    if politica.nivel == "none":
+        return
+    arquivo.flush()
+    if politica.nivel == "strict":
+        os.fsync(arquivo.fileno())
+    else:
+        _fsyncs_pendentes.registrar(path, politica)
+
+
+# Nesting depth of _sem_gc() across threads, and whether GC was on before it
+_pausas_gc = 0
+_gc_ativo = False
+_pausas_gc_lock = threading.Lock()
+
+
+@contextmanager
+def _sem_gc() -> Iterator[None]:
+    """
+    Pause the cyclic garbage collector during a bulk load.
+
+    Loading creates millions of acyclic containers, which would otherwise
+    trigger repeated full collections. Pauses may overlap (shards load on
+    several threads); the collector comes back when the last one ends.
+    """
+    global _pausas_gc, _gc_ativo
+    with _pausas_gc_lock:
+        if _pausas_gc == 0:
+            _gc_ativo = gc.isenabled()
+            gc.disable()
+        _pausas_gc += 1
+    try:
+        yield
+    finally:
+        with _pausas_gc_lock:
+            _pausas_gc -= 1
+            if _pausas_gc == 0 and _gc_ativo:
+                gc.enable()
+
+
+def is_compressed(path: Path) -> bool:
+    """
+    Check whether a data file is compressed.
+
+    Args:
+        path: Path to the data file.
+
+    Returns:
+        True for ``.gz`` (gzip) and ``.xz`` (LZMA) files.
+    """
+    return path.suffix in COMPRESSION_SUFFIXES
+
+
+def is_jsonl(path: Path) -> bool:
+    """
+    Check whether a data file uses the JSON Lines format.
+
+    Args:
+        path: Path to the data file.
+
+    Returns:
+        True for ``.jsonl`` files (also compressed, as in ``.jsonl.gz``),
+        False for plain JSON arrays.
+    """
+    if is_compressed(path):
+        path = path.with_suffix("")
+    return path.suffix == JSONL_SUFFIX
+
+
+# Errors raised while reading a (possibly compressed) data file
+_ERROS_LEITURA = (OSError, EOFError, lzma.LZMAError)
+
+
+def _abrir_leitura(path: Path, binario: bool = False) -> IO[Any]:
+    """Open a data file for reading, decompressing it on the fly by its suffix."""
+    codec = COMPRESSION_SUFFIXES.get(path.suffix)
+    if binario:
+        return open(path, "rb") if codec is None else codec.open(path, "rb")
+    if codec is None:
+        return open(path, "r", encoding="utf-8")
+    arquivo: IO[Any] = codec.open(path, "rt", encoding="utf-8")
+    return arquivo
+
+
+@contextmanager
+def _abrir_escrita(
+    temporario: Path, path: Path, politica: DurabilityPolicy
+) -> Iterator[TextIO]:
+    """
+    Open a data file for writing, compressing it on the fly by its suffix.
+
+    Writes go to ``temporario`` (which may be ``path`` itself); compression
+    follows the suffix of ``path``. The compressed stream is finished before
+    the write is made as durable as the policy requires.
+    """
+    codec = COMPRESSION_SUFFIXES.get(path.suffix)
+    if codec is None:
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            yield arquivo
+            _concluir_escrita(arquivo, path, politica)
+        return
+    with open(temporario, "wb") as bruto:
+        # gzip's default level 9 is several times slower for a few % of size
+        opcoes = {"compresslevel": 6} if codec is gzip else {}
+        with codec.open(bruto, "wt", encoding="utf-8", **opcoes) as arquivo:
+            yield arquivo
+        _concluir_escrita(bruto, path, politica)
+
+
+def get_load_processes() -> int:
+    """
+    Get the number of processes used to parse JSON Lines files.
+
+    The value comes from the PIM_LOAD_PROCESSES environment variable
+    (default 1, i.e. parse in the current process).
+
+    Returns:
+        Number of processes, at least 1.
+    """
+    valor = os.environ.get("PIM_LOAD_PROCESSES", "1")
+    try:
+        return max(1, int(valor))
+    except ValueError:
+        logger.warning(f"Ignoring invalid value {valor!r} for PIM_LOAD_PROCESSES")
+        return 1
+
+
+def get_shard_count() -> int:
+    """
+    Get the number of shards of a new sharded directory.
+
+    The value comes from the PIM_SHARDS environment variable (default
+    DEFAULT_SHARDS). Existing directories keep the count in their manifest.
+
+    Returns:
+        Number of shards, at least 1.
+    """
+    valor = os.environ.get("PIM_SHARDS", str(DEFAULT_SHARDS))
+    try:
+        return max(1, int(valor))
+    except ValueError:
+        logger.warning(f"Ignoring invalid value {valor!r} for PIM_SHARDS")
+        return DEFAULT_SHARDS
+
+
+def get_write_behind_latency() -> Optional[float]:
+    """
+    Get the group-commit window of write-behind saves.
+
+    The value comes from the PIM_WRITE_BEHIND environment variable, in
+    milliseconds. Unset (or 0) disables write-behind: every change is saved
+    before the menu continues.
+
+    Returns:
+        The window in seconds, or None if write-behind is disabled.
+    """
+    valor = os.environ.get("PIM_WRITE_BEHIND", "").strip()
+    if not valor:
+        return None
+    try:
+        milissegundos = float(valor)
+    except ValueError:
+        logger.warning(f"Ignoring invalid value {valor!r} for PIM_WRITE_BEHIND")
+        return None
+    if milissegundos <= 0:
+        return None
+    return milissegundos / 1000
+
+
+def get_resident_limit() -> Optional[int]:
+    """
+    Get how many students may stay resident in memory.
+
+    The value comes from the PIM_RESIDENT_STUDENTS environment variable.
+    Unset (or 0) keeps the whole roster in memory.
+
+    Returns:
+        The maximum number of resident students, or None for no limit.
+    """
+    valor = os.environ.get("PIM_RESIDENT_STUDENTS", "").strip()
+    if not valor:
+        return None
+    try:
+        return int(valor) or None
+    except ValueError:
+        logger.warning(f"Ignoring invalid value {valor!r} for PIM_RESIDENT_STUDENTS")
+        return None
+
+
+def _snapshot_id(path: Path) -> Optional[List[int]]:
+    """Identify the current snapshot by its size and modification time."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class _Trava:
+    """
+    Exclusive lock on a data file, shared by every process that writes it.
+
+    The lock is an advisory ``fcntl.flock`` on the lock file, which also
+    stores the generation of the data: a counter bumped by every write, so
+    a writer can tell whether someone else wrote since it last read. The
+    lock is reentrant within a thread, so a writer can hold it across a
+    read-merge-write cycle. Without ``fcntl`` (Windows) only the writers of
+    the current process are serialized.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._rlock = threading.RLock()
+        self._profundidade = 0
+        self._arquivo: Optional[TextIO] = None
+
+    def __enter__(self) -> "_Trava":
+        self._rlock.acquire()
+        if self._profundidade == 0:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                arquivo = open(self.path, "a+", encoding="utf-8")
+                if fcntl is not None:
+                    fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX)
+            except OSError:
+                self._rlock.release()
+                raise
+            self._arquivo = arquivo
+        self._profundidade += 1
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._profundidade -= 1
+        if self._profundidade == 0 and self._arquivo is not None:
+            # Closing the file releases the flock
+            self._arquivo.close()
+            self._arquivo = None
+        self._rlock.release()
+
+    @property
+    def geracao(self) -> int:
+        """Generation of the data file (0 if it was never written)."""
+        assert self._arquivo is not None, "lock not held"
+        self._arquivo.seek(0)
+        try:
+            return int(self._arquivo.read().strip() or 0)
+        except ValueError:
+            logger.warning(f"Ignoring corrupt generation in {self.path}")
+            return 0
+
+    def avancar(self) -> int:
+        """Bump the generation after a write and return the new value."""
+        geracao = self.geracao + 1
+        assert self._arquivo is not None
+        self._arquivo.seek(0)
+        self._arquivo.truncate()
+        self._arquivo.write(str(geracao))
+        self._arquivo.flush()
+        return geracao
+
+
+_travas: Dict[str, _Trava] = {}
+_travas_lock = threading.Lock()
+
+
+def _trava(caminho: Optional[str] = None) -> _Trava:
+    """Get the (process-wide) lock of a data file."""
+    path = get_lock_path(caminho)
+    chave = os.path.abspath(path)
+    with _travas_lock:
+        trava = _travas.get(chave)
+        if trava is None:
+            trava = _travas[chave] = _Trava(path)
+        return trava
+
+
+def get_generation(caminho: Optional[str] = None) -> int:
+    """
+    Get the generation of a data file.
+
+    The generation grows by one on every save, journal append or
+    compaction, from any process.
+
+    Args:
+        caminho: Optional path to the data file. If not provided, uses default path.
+
+    Returns:
+        The current generation (0 if the file was never written).
+    """
+    with _trava(caminho) as trava:
+        return trava.geracao
+
+
+def _anexar_registros(
+    registros: List[Dict[str, Any]],
+    caminho: Optional[str],
+    durabilidade: Optional[str] = None,
+) -> None:
+    """
+    Append change records to the journal of a data file in a single write.
+
+    A new journal starts with a ``base`` header identifying the snapshot it
+    applies to, so a journal left behind by an interrupted save is recognised
+    as stale and never replayed twice.
+    """
+    path = get_data_path(caminho)
+    journal = get_journal_path(caminho)
+    politica = DurabilityPolicy.from_env(durabilidade)
+
+    try:
+        linhas = "".join(_selar(_ENCODER_COMPACTO.encode(r)) + "\n" for r in registros)
+        journal.parent.mkdir(parents=True, exist_ok=True)
+        with _journal_lock, _trava(caminho) as trava, open(
+            journal, "a", encoding="utf-8"
+        ) as arquivo:
+            novo = arquivo.tell() == 0
+            if novo:
+                base = {
+                    "op": "base",
+                    "snapshot": _snapshot_id(path),
+                    "ts": time.time(),
+                }
+                arquivo.write(json.dumps(base) + "\n")
+            arquivo.write(linhas)
+            _concluir_escrita(arquivo, journal, politica)
+            trava.avancar()
+        if novo and politica.nivel == "strict":
+            _fsync_diretorio(journal)
+    except OSError as e:
+        logger.error(f"Failed to append to journal {journal}: {e}")
+        raise DataSaveError(f"Failed to append to journal {journal}: {e}") from e
+    except (TypeError, ValueError) as e:
+        logger.error(f"Failed to serialize journal record: {e}")
+        raise DataSaveError(f"Failed to serialize journal record: {e}") from e
+
+
+def _registro_journal(alteracao: "Alteracao") -> Dict[str, Any]:
+    """Build the journal record of a registration or a grade."""
+    aluno = alteracao.aluno
+    if alteracao.disciplina is None:
+        return {"op": "aluno", "dados": aluno._registro()}
+    return {
+        "op": "nota",
+        "email": aluno.email,
+        "disciplina": alteracao.disciplina,
+        "nota": alteracao.nota,
+    }
+
+
+def anexar_aluno(aluno: Aluno, caminho: Optional[str] = None) -> None:
+    """
+    Record a new student registration in the journal.
+
+    Args:
+        aluno: The newly registered student.
+        caminho: Optional path to the data file. If not provided, uses default path.
+
+    Raises:
+        DataSaveError: If the record cannot be written.
+    """
+    _anexar_registros([_registro_journal(Alteracao(aluno))], caminho)
+    logger.info(f"Journaled registration of {aluno.email}")
+
+
+def anexar_nota(
+    aluno: Aluno, disciplina: str, nota: float, caminho: Optional[str] = None
+) -> None:
+    """
+    Record a new grade for a student in the journal.
+
+    Args:
+        aluno: Student who received the grade.
+        disciplina: Discipline of the evaluation.
+        nota: The grade obtained.
+        caminho: Optional path to the data file. If not provided, uses default path.
+
+    Raises:
+        DataSaveError: If the record cannot be written.
+    """
+    _anexar_registros([_registro_journal(Alteracao(aluno, disciplina, nota))], caminho)
+    logger.info(f"Journaled grade {nota:.1f} for {aluno.email} in {disciplina}")
+
+
+def _ler_journal(
+    path: Path, journal: Path, quarentena: Optional["_Quarentena"] = None
+) -> List[Dict[str, Any]]:
+    """
+    Read the change records of a journal that applies to the current snapshot.
+
+    Args:
+        path: Path to the snapshot file.
+        journal: Path to the journal file.
+        quarentena: Where to put corrupt records instead of failing.
+
+    Returns:
+        The change records in order, without the base header. Empty if the
+        journal does not exist or is stale.
+
+    Raises:
+        DataLoadError: If the journal is corrupt.
+    """
+    try:
+        with open(journal, "rb") as arquivo:
+            linhas = arquivo.read().splitlines()
+    except FileNotFoundError:
+        return []
+    except OSError as e:
+        logger.error(f"Failed to read journal {journal}: {e}")
+        raise DataLoadError(f"Failed to read journal {journal}: {e}") from e
+
+    if not linhas:
+        return []
+
+    registros = []
+    for numero, linha in enumerate(linhas, 1):
+        try:
+            if _conferir_bruto(linha) is False:
+                raise ValueError("checksum mismatch")
+            registros.append(json.loads(linha))
+        except ValueError as e:
+            if numero == len(linhas):
+                # A torn trailing line is the footprint of an interrupted append
+                logger.warning(f"Ignoring incomplete last record in {journal}")
+                break
+            if quarentena is not None and numero > 1:
+                quarentena.registrar(_corrompido(journal, numero, str(e), linha))
+                continue
+            logger.error(f"Corrupt record at line {numero} of {journal}: {e}")
+            raise DataLoadError(
+                f"Corrupt journal {journal} at line {numero}: {e}"
+            ) from e
+
+    if not registros or registros[0].get("op") != "base":
+        raise DataLoadError(f"Journal {journal} has no base header")
+    if registros[0].get("snapshot") != _snapshot_id(path):
+        logger.warning(f"Ignoring stale journal {journal}: snapshot has changed")
+        return []
+    return registros[1:]
+
+
+def _reproduzir_journal(
+    alunos: List[Aluno],
+    path: Path,
+    journal: Path,
+    quarentena: Optional["_Quarentena"] = None,
+) -> int:
+    """
+    Replay the journal records on top of the students loaded from the snapshot.
+
+    Args:
+        alunos: Students loaded from the snapshot; updated in place.
+        path: Path to the snapshot file.
+        journal: Path to the journal file.
+        quarentena: Where to put corrupt records instead of failing.
+
+    Returns:
+        Number of records applied.
+
+    Raises:
+        DataLoadError: If the journal is corrupt.
+    """
+    registros = _ler_journal(path, journal, quarentena)
+    if not registros:
+        return 0
+
+    aplicados = _reproduzir_registros(alunos, registros)
+    logger.info(f"Replayed {aplicados} journal records from {journal}")
+    return aplicados
+
+
+def _reproduzir_registros(
+    alunos: List[Aluno],
+    registros: List[Dict[str, Any]],
+    ignorar: Iterable[str] = (),
+) -> int:
+    """
+    Apply journal change records to a list of students.
+
+    Args:
+        alunos: Students to update in place.
+        registros: Change records, in journal order.
+        ignorar: Emails of students already registered elsewhere.
+
+    Returns:
+        Number of records applied.
+    """
+    por_email = {aluno.email: aluno for aluno in alunos}
+    registrados = set(ignorar)
+    aplicados = 0
+    for registro in registros:
+        op = registro.get("op")
+        if op == "aluno":
+            aluno = Aluno.from_dict(registro.get("dados", {}))
+            if aluno.email in por_email or aluno.email in registrados:
+                logger.warning(f"Skipping duplicate registration of {aluno.email}")
+                continue
+            alunos.append(aluno)
+            por_email[aluno.email] = aluno
+        elif op == "nota":
+            email = registro.get("email")
+            dono = por_email.get(email) if isinstance(email, str) else None
+            if dono is None:
+                logger.warning(f"Skipping grade for unknown student {email}")
+                continue
+            dono.notas.setdefault(registro["disciplina"], []).append(registro["nota"])
+        else:
+            logger.warning(f"Skipping unknown journal record {op!r}")
+            continue
+        aplicados += 1
+    return aplicados
+
+
+def iterar_alunos(caminho: Optional[str] = None) -> Iterator[Aluno]:
+    """
+    Stream the students of a JSON or JSON Lines data file one record at a time.
+
+    A sharded directory is streamed shard after shard, and a SQLite database
+    (``sqlite://`` paths or PIM_STORAGE=sqlite) with ordered cursors.
+
+    The top-level array (or each line) is decoded incrementally from a
+    buffered reader, so memory stays bounded by the largest record instead
+    of the whole file.
+    Journaled changes are applied on the fly: grades as each student goes by,
+    and journaled registrations after the last student of the snapshot.
+
+    Args:
+        caminho: Optional path to the JSON file. If not provided, uses default path.
+
+    Yields:
+        Aluno objects in file order.
+
+    Raises:
+        DataLoadError: If the file or the journal cannot be read or parsed.
+    """
+    if get_storage_mode(caminho) == "sqlite":
+        with SqliteStorage(caminho) as storage:
+            yield from storage.iterar()
+        return
+
+    path = get_store_path(caminho)
+    if is_sharded(path):
+        for arquivo in _arquivos_shards(path, _ler_manifesto(path)):
+            yield from iterar_alunos(str(arquivo))
+        return
+
+    registros = _ler_journal(path, get_journal_path(caminho))
+    novos = {
+        registro.get("dados", {}).get("email")
+        for registro in registros
+        if registro.get("op") == "aluno"
+    }
+    notas_journal: Dict[str, List[Dict[str, Any]]] = {}
+    for registro in registros:
+        email = registro.get("email")
+        if registro.get("op") == "nota" and isinstance(email, str):
+            notas_journal.setdefault(email, []).append(registro)
+
+    existentes = set()
+    if path.exists():
+        for aluno in _iterar_snapshot(path):
+            if aluno.email in novos:
+                existentes.add(aluno.email)
+            for registro in notas_journal.pop(aluno.email, ()):
+                aluno.notas.setdefault(registro["disciplina"], []).append(
+                    registro["nota"]
+                )
+            yield aluno
+
+    # Journaled registrations come after the snapshot, as in carregar_dados
+    restantes = [
+        registro
+        for registro in registros
+        if registro.get("op") == "aluno"
+        or (registro.get("op") == "nota" and registro.get("email") in notas_journal)
+    ]
+    alunos: List[Aluno] = []
+    _reproduzir_registros(alunos, restantes, ignorar=existentes)
+    yield from alunos
+
+
+# Matches the JSON whitespace between array elements
+_ESPACOS = re.compile(r"[ \t\n\r]*")
+
+# Characters read from the file per refill of the streaming buffer
+_BLOCO_LEITURA = 64 * 1024
+
+
+def _iterar_snapshot(path: Path) -> Iterator[Aluno]:
+    """Decode the students of a snapshot one element at a time."""
+    if is_jsonl(path):
+        try:
+            with _abrir_leitura(path, binario=True) as arquivo:
+                for linha in arquivo:
+                    yield from _alunos_de_linhas(path, (linha,))
+        except _ERROS_LEITURA as e:
+            logger.error(f"Failed to read file {path}: {e}")
+            raise DataLoadError(f"Failed to read file {path}: {e}") from e
+        return
+
+    decoder = json.JSONDecoder()
+    try:
+        with _abrir_leitura(path) as arquivo:
+            buffer = ""
+            pos = 0
+            bloco = _BLOCO_LEITURA
+            fim = False
+
+            def proximo_caractere() -> str:
+                nonlocal buffer, pos, fim
+                while True:
+                    espacos = _ESPACOS.match(buffer, pos)
+                    if espacos is not None:  # always, as the pattern matches ""
+                        pos = espacos.end()
+                    if pos < len(buffer) or fim:
+                        return buffer[pos : pos + 1]
+                    buffer = arquivo.read(_BLOCO_LEITURA)
+                    pos = 0
+                    fim = not buffer
+
+            if proximo_caractere() != "[":
+                raise DataLoadError(f"Invalid data format in {path}: expected list")
+            pos += 1
+            if proximo_caractere() == "]":
+                return
+
+            while True:
+                if proximo_caractere() != "{":
+                    raise DataLoadError(
+                        f"Invalid data format in {path}: expected an object"
+                    )
+                try:
+                    item, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if fim:
+                        raise
+                    # The record continues past the buffer: read a larger block
+                    mais = arquivo.read(bloco)
+                    fim = not mais
+                    buffer = buffer[pos:] + mais
+                    pos = 0
+                    bloco *= 2
+                    continue
+                bloco = _BLOCO_LEITURA
+                yield Aluno.from_dict(item)
+
+                separador = proximo_caractere()
+                pos += 1
+                if separador == "]":
+                    return
+                if separador != ",":
+                    raise DataLoadError(
+                        f"Invalid data format in {path}: expected ',' or ']'"
+                    )
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        logger.error(f"Failed to parse JSON from {path}: {e}")
+        raise DataLoadError(f"Invalid JSON format in {path}: {e}") from e
+    except _ERROS_LEITURA as e:
+        logger.error(f"Failed to read file {path}: {e}")
+        raise DataLoadError(f"Failed to read file {path}: {e}") from e
+
+
+def carregar_dados(
+    caminho: Optional[str] = None,
+    usar_cache: Optional[bool] = None,
+    processos: Optional[int] = None,
+    corrompidos: Optional[str] = None,
+) -> List[Aluno]:
+    """
+    Load student data from a JSON or JSON Lines file, or a sharded directory.
+
+    Files ending in ``.gz`` or ``.xz`` are decompressed while they are read.
+    Records found in the journal next to the file are replayed on top of
+    the snapshot. When the cache is enabled and the file has not changed
+    since the last load, the snapshot comes from the binary cache instead
+    of being parsed again. The shards of a sharded directory are loaded
+    concurrently, each as a file of its own.
+
+    Unless corrupt records are to be skipped, checksums are not checked and
+    an unreadable record fails the whole load. With ``skip`` or
+    ``quarantine``, every record is checked (bypassing the cache) and the
+    corrupt ones are left out, and with ``quarantine`` copied to the
+    quarantine file, so a damaged file still yields every intact record.
+
+    Args:
+        caminho: Optional path to the JSON file. If not provided, uses default path.
+        usar_cache: Use the binary cache (default: is_cache_enabled()).
+        processos: Number of processes that parse a JSON Lines file in
+            parallel (default: get_load_processes()).
+        corrompidos: What to do with corrupt records, one of
+            CORRUPT_POLICIES (default: get_corrupt_policy()).
+
+    Returns:
+        List of Aluno objects.
+
+    Raises:
+        DataLoadError: If there's an error loading the data.
+    """
+    path = get_store_path(caminho)
+    if is_sharded(path):
+        partes = _carregar_shards(
+            lambda arquivo: carregar_dados(
+                str(arquivo), usar_cache, processos, corrompidos
+            ),
+            _arquivos_shards(path, _ler_manifesto(path)),
+        )
+        return [aluno for parte in partes for aluno in parte]
+
+    journal = get_journal_path(caminho)
+    logger.info(f"Loading student data from {path}")
+    politica = corrompidos or get_corrupt_policy()
+    if politica not in CORRUPT_POLICIES:
+        raise ValueError(f"Unknown corrupt record policy {politica!r}")
+    quarentena = None
+    if politica != "error":
+        destino = get_quarantine_path(caminho) if politica == "quarantine" else None
+        quarentena = _Quarentena(destino)
+
+    with _sem_gc():
+        if not path.exists():
+            logger.info(f"Data file {path} does not exist, starting from an empty list")
+            alunos: List[Aluno] = []
+        elif quarentena is not None:
+            alunos = _resgatar_snapshot(path, quarentena)
+        elif usar_cache or (usar_cache is None and is_cache_enabled()):
+            alunos = _carregar_snapshot_com_cache(
+                path, get_cache_path(caminho), processos
+            )
+        else:
+            alunos = _carregar_snapshot(path, processos=processos)
+
+        _reproduzir_journal(alunos, path, journal, quarentena)
+    return alunos
+
+
+def _carregar_snapshot_com_cache(
+    path: Path, cache: Path, processos: Optional[int] = None
+) -> List[Aluno]:
+    """
+    Load a JSON snapshot through its binary cache.
+
+    The cache is keyed by the size, modification time and content hash of
+    the snapshot (the hash is only checked when the modification time alone
+    is not conclusive, see _ler_cache); a missing or stale cache is rebuilt
+    after parsing the JSON.
+    """
+    try:
+        stat = path.stat()
+    except OSError as e:
+        logger.error(f"Failed to read file {path}: {e}")
+        raise DataLoadError(f"Failed to read file {path}: {e}") from e
+
+    alunos = _ler_cache(path, cache, stat)
+    if alunos is not None:
+        logger.info(f"Loaded {len(alunos)} students from cache {cache}")
+        return alunos
+
+    if is_compressed(path) or (
+        is_jsonl(path) and (processos or get_load_processes()) > 1
+    ):
+        # Streamed or read by workers; hash it separately for the cache key
+        alunos = _carregar_snapshot(path, processos=processos)
+        _escrever_cache(cache, alunos, stat, _hash_arquivo(path))
+        return alunos
+
+    try:
+        conteudo = path.read_bytes()
+    except OSError as e:
+        logger.error(f"Failed to read file {path}: {e}")
+        raise DataLoadError(f"Failed to read file {path}: {e}") from e
+    alunos = _carregar_snapshot(path, conteudo)
+    _escrever_cache(cache, alunos, stat, hashlib.blake2b(conteudo).hexdigest())
+    return alunos
+
+
+def _hash_arquivo(path: Path) -> str:
+    """Hash the contents of a file in fixed-size blocks."""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b""):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+
+def _ler_cache(path: Path, cache: Path, stat: os.stat_result) -> Optional[List[Aluno]]:
+    """
+    Load the students from the binary cache, or None if it is missing or stale.
+
+    A snapshot with the size and modification time of the cache key is
+    trusted without reading it, unless it was modified within
+    _GRANULARIDADE_MTIME_NS of the last write of the cache: a change right
+    after the cache was built may have kept the same modification time, so
+    only then is its content hash compared. A match found once that window
+    has passed touches the cache, so later loads skip the hash.
+    """
+    try:
+        with open(cache, "rb") as arquivo:
+            if arquivo.read(len(_CACHE_MAGIC)) != _CACHE_MAGIC:
+                logger.warning(f"Ignoring cache {cache} with unknown format")
+                return None
+            versao, tamanho, mtime_ns, digest = marshal.load(arquivo)
+            if (versao, tamanho, mtime_ns) != (
+                _CACHE_VERSION,
+                stat.st_size,
+                stat.st_mtime_ns,
+            ):
+                logger.info(f"Cache {cache} is stale, rebuilding")
+                return None
+            gravado_ns = os.fstat(arquivo.fileno()).st_mtime_ns
+            if stat.st_mtime_ns > gravado_ns - _GRANULARIDADE_MTIME_NS:
+                if digest != _hash_arquivo(path):
+                    logger.info(f"Cache {cache} is stale, rebuilding")
+                    return None
+                if time.time_ns() - stat.st_mtime_ns > _GRANULARIDADE_MTIME_NS:
+                    # Checked after any change could keep that modification
+                    # time: later loads can trust it without hashing again
+                    try:
+                        os.utime(cache)
+                    except OSError:
+                        pass
+            tabela, registros = marshal.loads(arquivo.read())
+
+        return _restaurar_alunos(tabela, registros)
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable cache {cache}: {e}")
+        return None
+
+
+def _exportar_alunos(
+    alunos: Iterable[Aluno],
+) -> Tuple[List[str], List[Tuple[str, str, str, Any]]]:
+    """Dump students to plain tuples plus the discipline table they refer to."""
+    registros = [
+        (
+            a.nome,
+            a.email,
+            a.senha,
+            None if a._notas is None else [_exportar_lista(n) for n in a._notas],
+        )
+        for a in alunos
+    ]
+    return list(_DISCIPLINAS), registros
+
+
+def _restaurar_alunos(
+    tabela: List[str], registros: List[Tuple[str, str, str, Any]]
+) -> List[Aluno]:
+    """Rebuild students dumped by _exportar_alunos, possibly in another process."""
+    ids = [_disciplina_id(disciplina) for disciplina in tabela]
+    if ids == list(range(len(ids))):
+        return [Aluno._restaurar(*registro) for registro in registros]
+    return [
+        Aluno._restaurar(
+            nome,
+            email,
+            senha,
+            None if notas is None else _remapear_notas(notas, ids),
+        )
+        for nome, email, senha, notas in registros
+    ]
+
+
+def _remapear_notas(notas: List[Any], ids: List[int]) -> List[Any]:
+    """Translate grade lists indexed by cached discipline ids to the shared ids."""
+    remapeadas: List[Any] = [None] * len(_DISCIPLINAS)
+    for disciplina_id, lista in zip(ids, notas):
+        remapeadas[disciplina_id] = lista
+    return remapeadas
+
+
+def _escrever_cache(
+    cache: Path, alunos: List[Aluno], stat: os.stat_result, digest: str
+) -> None:
+    """Write the binary cache of a snapshot; failures only disable the cache."""
+    temporario = cache.with_name(cache.name + ".tmp")
+    try:
+        with open(temporario, "wb") as arquivo:
+            arquivo.write(_CACHE_MAGIC)
+            chave = (_CACHE_VERSION, stat.st_size, stat.st_mtime_ns, digest)
+            marshal.dump(chave, arquivo)
+            marshal.dump(_exportar_alunos(alunos), arquivo)
+        os.replace(temporario, cache)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Failed to write cache {cache}: {e}")
+
+
+def _carregar_snapshot(
+    path: Path, conteudo: Optional[bytes] = None, processos: Optional[int] = None
+) -> List[Aluno]:
+    """Load the students stored in a snapshot file (or its raw contents)."""
+    if conteudo is None and is_compressed(path) and not is_jsonl(path):
+        # Decode while decompressing instead of holding the whole document
+        alunos = list(_iterar_snapshot(path))
+        logger.info(f"Successfully loaded {len(alunos)} students")
+        return alunos
+
+    if is_jsonl(path):
+        if conteudo is None:
+            return _carregar_jsonl(path, processos or get_load_processes())
+        alunos = _alunos_de_linhas(path, conteudo.splitlines())
+        logger.info(f"Successfully loaded {len(alunos)} students")
+        return alunos
+
+    try:
+        if conteudo is None:
+            with open(path, "r", encoding="utf-8") as arquivo:
+                data = json.load(arquivo)
+        else:
+            data = json.loads(conteudo.decode("utf-8"))
+
+        if not isinstance(data, list):
+            logger.error(f"Invalid data format in {path}: expected list, got {type(data)}")
+            raise DataLoadError(f"Invalid data format: expected list, got {type(data)}")
+
+        alunos = [Aluno.from_dict(item) for item in data]
+        logger.info(f"Successfully loaded {len(alunos)} students")
+        return alunos
+
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        logger.error(f"Failed to parse JSON from {path}: {e}")
+        raise DataLoadError(f"Invalid JSON format in {path}: {e}") from e
+    except OSError as e:
+        logger.error(f"Failed to read file {path}: {e}")
+        raise DataLoadError(f"Failed to read file {path}: {e}") from e
+
+
+# Lines of a JSON Lines file decoded per batch by the sequential loader
+_LINHAS_POR_LOTE = 10_000
+
+
+def _alunos_de_linhas(path: Path, linhas: Iterable[bytes]) -> List[Aluno]:
+    """Parse the lines of a JSON Lines snapshot, skipping blank lines."""
+    linhas = [linha for linha in linhas if linha.strip()]
+    try:
+        # One decoder call over the joined lines is much faster than one per line
+        itens = json.loads(b"[" + b",".join(linhas) + b"]")
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        itens = []
+        for linha in linhas:
+            try:
+                itens.append(json.loads(linha))
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                logger.error(f"Failed to parse JSON line from {path}: {e}")
+                raise DataLoadError(f"Invalid JSON line in {path}: {e}") from e
+
+    alunos = []
+    for item in itens:
+        if not isinstance(item, dict):
+            raise DataLoadError(f"Invalid data format in {path}: expected objects")
+        alunos.append(Aluno.from_dict(item))
+    return alunos
+
+
+def _ler_faixa_jsonl(
+    caminho: str, inicio: int, fim: int
+) -> Tuple[List[str], List[Tuple[str, str, str, Any]]]:
+    """
+    Parse the lines of a JSON Lines file that start within [inicio, fim).
+
+    Runs in a worker process; returns the students in the portable form of
+    _exportar_alunos so they can be rebuilt in the parent.
+    """
+    path = Path(caminho)
+    with _sem_gc(), open(path, "rb") as arquivo:
+        if inicio > 0:
+            # Skip the line that started in the previous range
+            arquivo.seek(inicio - 1)
+            arquivo.readline()
+        posicao = arquivo.tell()
+        linhas = []
+        while posicao < fim:
+            linha = arquivo.readline()
+            if not linha:
+                break
+            posicao += len(linha)
+            linhas.append(linha)
+        return _exportar_alunos(_alunos_de_linhas(path, linhas))
+
+
+def _carregar_jsonl(path: Path, processos: int) -> List[Aluno]:
+    """
+    Load a JSON Lines snapshot, optionally parsing it in several processes.
+
+    The file is split into byte ranges; each line belongs to the range where
+    it starts. Ranges are parsed in a process pool and merged in file order.
+    """
+    try:
+        if processos <= 1 or is_compressed(path):
+            alunos = []
+            with _abrir_leitura(path, binario=True) as arquivo:
+                while True:
+                    lote = list(islice(arquivo, _LINHAS_POR_LOTE))
+                    if not lote:
+                        break
+                    alunos.extend(_alunos_de_linhas(path, lote))
+        else:
+            tamanho = path.stat().st_size
+            # A few ranges per process keep the workers evenly loaded
+            partes = processos * 4
+            limites = [tamanho * i // partes for i in range(partes + 1)]
+            with ProcessPoolExecutor(max_workers=processos) as executor:
+                resultados = executor.map(
+                    _ler_faixa_jsonl,
+                    [str(path)] * partes,
+                    limites[:-1],
+                    limites[1:],
+                )
+                alunos = []
+                for tabela, registros in resultados:
+                    alunos.extend(_restaurar_alunos(tabela, registros))
+    except _ERROS_LEITURA as e:
+        logger.error(f"Failed to read file {path}: {e}")
+        raise DataLoadError(f"Failed to read file {path}: {e}") from e
+
+    logger.info(f"Successfully loaded {len(alunos)} students")
+    return alunos
+
+
+# Encoder for the compact on-disk layout of student records
+_ENCODER_COMPACTO = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+# Records encoded per write by the fast serializer
+_REGISTROS_POR_LOTE = 10_000
+
+# Checksum field that seals a compact record: ...,"crc":"89abcdef"}
+_CAMPO_CRC = b',"crc":"'
+_TAMANHO_SELO = len(_CAMPO_CRC) + 10
+
+
+def _selar(texto: str) -> str:
+    """
+    Seal a compact JSON record with the CRC-32 of its UTF-8 bytes.
+
+    The checksum is added as a last ``crc`` field, so the record stays valid
+    JSON (loaders ignore the field) and the checksum covers the stored bytes
+    before it. Records written before checksums simply have no seal.
+    """
+    crc = zlib.crc32(texto.encode("utf-8"))
+    return f'{texto[:-1]},"crc":"{crc:08x}"}}'
+
+
+def _selar_registro(registro: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the ``crc`` field to a record of the indented layout, in place."""
+    crc = zlib.crc32(_ENCODER_COMPACTO.encode(registro).encode("utf-8"))
+    registro["crc"] = f"{crc:08x}"
+    return registro
+
+
+def _conferir_bruto(registro: bytes) -> Optional[bool]:
+    """
+    Check the seal of a compact record as stored, without decoding it.
+
+    Returns:
+        True if the checksum matches, False if it does not, None if the
+        record has no seal (it is indented, or older than checksums).
+    """
+    corte = len(registro) - _TAMANHO_SELO
+    if corte < 1 or registro[corte : corte + len(_CAMPO_CRC)] != _CAMPO_CRC:
+        return None
+    if registro[-2:] != b'"}':
+        return False
+    try:
+        esperado = int(registro[-10:-2], 16)
+    except ValueError:
+        return False
+    return zlib.crc32(b"}", zlib.crc32(memoryview(registro)[:corte])) == esperado
+
+
+def _conferir_registro(item: Dict[str, Any]) -> Optional[bool]:
+    """
+    Check (and remove) the ``crc`` field of a decoded record.
+
+    The compact encoding of a decoded record is byte for byte the one that
+    was sealed, whatever the layout it was stored in.
+
+    Returns:
+        True if the checksum matches, False if it does not, None if the
+        record has no checksum.
+    """
+    crc: Optional[str] = item.pop("crc", None)
+    if crc is None:
+        return None
+    texto = _ENCODER_COMPACTO.encode(item).encode("utf-8")
+    return crc == f"{zlib.crc32(texto):08x}"
+
+
+def _escrever_alunos(
+    arquivo: TextIO,
+    alunos: Iterable[Aluno],
+    path: Path,
+    rapido: Optional[bool] = None,
+) -> int:
+    """
+    Serialize students in the format of the given data file.
+
+    JSON Lines files and the fast JSON layout use compact records (see
+    Aluno._registro) written in batches, one student per line; otherwise the
+    array is indented for readability. Every record is sealed with a CRC-32
+    checksum (see _selar).
+
+    Returns:
+        Number of students written.
+    """
+    if rapido is None:
+        rapido = is_fast_save_enabled()
+    jsonl = is_jsonl(path)
+    if not jsonl and not rapido:
+        data = [_selar_registro(aluno.to_dict()) for aluno in alunos]
+        # Compact separators: the lines of a record, stripped and joined, are
+        # the very bytes its seal covers, so they are checked without decoding
+        json.dump(data, arquivo, indent=4, separators=(",", ":"), ensure_ascii=False)
+        return len(data)
+
+    encode = _ENCODER_COMPACTO.encode
+    separador = "\n" if jsonl else ",\n"
+    quantidade = 0
+    iterador = iter(alunos)
+    if not jsonl:
+        arquivo.write("[\n")
+    while True:
+        lote = [
+            _selar(encode(aluno._registro()))
+            for aluno in islice(iterador, _REGISTROS_POR_LOTE)
+        ]
+        if not lote:
+            break
+        if quantidade and not jsonl:
+            arquivo.write(separador)
+        arquivo.write(separador.join(lote))
+        if jsonl:
+            arquivo.write("\n")
+        quantidade += len(lote)
+    if not jsonl:
+        arquivo.write("\n]\n")
+    return quantidade
+
+
+def salvar_dados(
+    alunos: Iterable[Aluno],
+    caminho: Optional[str] = None,
+    rapido: Optional[bool] = None,
+    durabilidade: Optional[str] = None,
+) -> None:
+    """
+    Save student data to a JSON or JSON Lines file (by the ``.jsonl`` suffix).
+
+    A ``.gz`` or ``.xz`` suffix (``alunos.json.gz``) compresses the file as it
+    is written. The file becomes a full snapshot, so any pending journal is discarded.
+    If the path is a sharded directory, every shard is rewritten.
+
+    Args:
+        alunos: List of Aluno objects to save.
+        caminho: Optional path to the JSON file. If not provided, uses default path.
+        rapido: Write the compact layout: one record per line, no indentation,
+            no empty discipline lists (default: is_fast_save_enabled()).
+        durabilidade: Durability level (``none``, ``batched`` or ``strict``).
+            If not provided, uses PIM_DURABILITY.
+
+    Raises:
+        DataSaveError: If there's an error saving the data.
+        ValueError: If ``durabilidade`` is not a known level.
+    """
+    path = get_data_path(caminho)
+    if is_sharded(path):
+        _salvar_shards(alunos, path, _ler_manifesto(path), rapido, durabilidade)
+        return
+
+    politica = DurabilityPolicy.from_env(durabilidade)
+    logger.info(f"Saving students to {path}")
+
+    try:
+        # Ensure parent directory exists
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with _trava(caminho) as trava:
+            if politica.nivel == "strict":
+                # A crash leaves either the old or the new file, never a torn one
+                temporario = path.with_name(path.name + ".tmp")
+                try:
+                    with _abrir_escrita(temporario, path, politica) as arquivo:
+                        quantidade = _escrever_alunos(arquivo, alunos, path, rapido)
+                    os.replace(temporario, path)
+                finally:
+                    temporario.unlink(missing_ok=True)
+                _fsync_diretorio(path)
+            else:
+                with _abrir_escrita(path, path, politica) as arquivo:
+                    quantidade = _escrever_alunos(arquivo, alunos, path, rapido)
+
+            # The snapshot now holds every journaled change
+            get_journal_path(caminho).unlink(missing_ok=True)
+            trava.avancar()
+        logger.info(f"Successfully saved {quantidade} students to {path}")
+
+    except OSError as e:
+        logger.error(f"Failed to write file {path}: {e}")
+        raise DataSaveError(f"Failed to write file {path}: {e}") from e
+    except (TypeError, ValueError) as e:
+        logger.error(f"Failed to serialize data: {e}")
+        raise DataSaveError(f"Failed to serialize data: {e}") from e
+
+
+# Bytes of a corrupt record kept in reports and in the quarantine file
+_LIMITE_CONTEUDO = 64 * 1024
+
+
+class RegistroCorrompido(NamedTuple):
+    """A record that failed its checksum or could not be decoded."""
+
+    arquivo: str
+    linha: int
+    motivo: str
+    conteudo: str
+
+
+def _corrompido(
+    path: Path, linha: int, motivo: str, conteudo: bytes
+) -> RegistroCorrompido:
+    """Describe a corrupt record, keeping (a bounded part of) its raw text."""
+    texto = conteudo[:_LIMITE_CONTEUDO].decode("utf-8", errors="replace")
+    return RegistroCorrompido(str(path), linha, motivo, texto)
+
+
+class _Quarentena:
+    """Corrupt records left out by a tolerant load, optionally kept in a file."""
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path
+        self.registros: List[RegistroCorrompido] = []
+
+    def registrar(self, registro: RegistroCorrompido) -> None:
+        """Take note of a corrupt record (and append it to the file, if any)."""
+        logger.warning(
+            f"Skipping corrupt record at line {registro.linha} of "
+            f"{registro.arquivo}: {registro.motivo}"
+        )
+        self.registros.append(registro)
+        if self.path is None:
+            return
+        linha = json.dumps(
+            {**registro._asdict(), "ts": time.time()}, ensure_ascii=False
+        )
+        try:
+            with open(self.path, "a", encoding="utf-8") as arquivo:
+                arquivo.write(linha + "\n")
+        except OSError as e:
+            logger.error(f"Failed to quarantine record into {self.path}: {e}")
+
+
+def _varrer_registros(
+    path: Path, decodificar: bool = True
+) -> Iterator[Tuple[int, Union[Dict[str, Any], RegistroCorrompido, None]]]:
+    """
+    Scan the records of a snapshot in one streaming pass, surviving damage.
+
+    Works line by line on every layout: a record starts on a line that
+    starts with ``{`` and ends where the lines gathered since then decode
+    (one line in the compact layouts, several in the indented one). Sealed
+    records are checked on their raw bytes; a record that fails, or that is
+    cut short by the next record or the end of the file, is reported as
+    corrupt and scanning resumes at the next record.
+
+    Args:
+        path: Snapshot file (possibly compressed).
+        decodificar: Decode records whose seal matches; if False, they are
+            yielded as None (enough to verify a file).
+
+    Yields:
+        ``(line, record)`` with the first line of each record; the record is
+        a dict, None (sealed and intact, not decoded) or a RegistroCorrompido.
+    """
+    with _abrir_leitura(path, binario=True) as arquivo:
+        yield from _varrer_linhas(path, enumerate(arquivo, 1), decodificar)
+
+
+def _varrer_linhas(
+    path: Path, linhas: Iterable[Tuple[int, bytes]], decodificar: bool
+) -> Iterator[Tuple[int, Union[Dict[str, Any], RegistroCorrompido, None]]]:
+    """Scan numbered lines of a snapshot into records (see _varrer_registros)."""
+    pendente: List[bytes] = []
+    inicio = 0
+    fechamento = b"}"
+    for numero, linha in linhas:
+        if not (pendente or decodificar):
+            # Fast path: a sealed record alone on its line, checked as is
+            fim = len(linha) - (2 if linha[-2:] == b",\n" else 1)
+            corte = fim - _TAMANHO_SELO
+            if (
+                linha[corte : corte + len(_CAMPO_CRC)] == _CAMPO_CRC
+                and linha[:1] == b"{"
+                and linha[fim - 2 : fim] == b'"}'
+                and linha[fim - 10 : fim - 2]
+                == b"%08x" % zlib.crc32(b"}", zlib.crc32(linha[:corte]))
+            ):
+                yield numero, None
+                continue
+        texto = linha.strip()
+        if texto[:1] == b"{":
+            if pendente:
+                bruto = b"".join(pendente)
+                motivo = "registro incompleto"
+                yield inicio, _corrompido(path, inicio, motivo, bruto)
+            pendente = [texto]
+            inicio = numero
+            # An indented record closes at the indentation it opened at
+            fechamento = linha[: len(linha) - len(linha.lstrip())] + b"}"
+        elif pendente:
+            pendente.append(texto)
+        elif texto in (b"", b"[", b"]", b"[]"):
+            continue
+        else:
+            motivo = "conteúdo fora de um registro"
+            yield numero, _corrompido(path, numero, motivo, texto)
+            continue
+
+        if not texto.endswith((b"}", b"},")) or (
+            len(pendente) > 1 and not linha.startswith(fechamento)
+        ):
+            continue
+        bruto = pendente[0] if len(pendente) == 1 else b"".join(pendente)
+        if bruto[-1:] == b",":
+            bruto = bruto[:-1]
+        selo = _conferir_bruto(bruto)
+        if selo is False:
+            motivo = "checksum inválido"
+            yield inicio, _corrompido(path, inicio, motivo, bruto)
+            pendente = []
+            continue
+        if selo and not decodificar:
+            yield inicio, None
+            pendente = []
+            continue
+        try:
+            item = json.loads(bruto)
+        except ValueError:
+            continue  # not the end of the record yet (or corrupt)
+        pendente = []
+        if not isinstance(item, dict):
+            motivo = "registro não é um objeto"
+            yield inicio, _corrompido(path, inicio, motivo, bruto)
+            continue
+        if selo:
+            del item["crc"]  # already checked on the raw bytes
+        else:
+            selo = _conferir_registro(item)
+        if selo is False:
+            motivo = "checksum inválido"
+            yield inicio, _corrompido(path, inicio, motivo, bruto)
+        else:
+            # Records without a checksum are always handed over
+            yield inicio, item if decodificar or selo is None else None
+    if pendente:
+        bruto = b"".join(pendente)
+        motivo = "registro incompleto"
+        yield inicio, _corrompido(path, inicio, motivo, bruto)
+
+
+def _resgatar_snapshot(path: Path, quarentena: _Quarentena) -> List[Aluno]:
+    """Load the intact records of a snapshot, handing corrupt ones over."""
+    alunos = []
+    try:
+        for _, registro in _varrer_registros(path):
+            if isinstance(registro, RegistroCorrompido):
+                quarentena.registrar(registro)
+            elif registro is not None:
+                alunos.append(Aluno.from_dict(registro))
+    except _ERROS_LEITURA as e:
+        # Whatever came before a damaged compressed stream is kept
+        quarentena.registrar(_corrompido(path, 0, f"leitura interrompida: {e}", b""))
+    logger.info(
+        f"Loaded {len(alunos)} students, skipped "
+        f"{len(quarentena.registros)} corrupt records"
+    )
+    return alunos
+
+
+@dataclass
+class RelatorioVerificacao:
+    """Result of verifying a data store."""
+
+    registros: int = 0
+    sem_checksum: int = 0
+    bytes: int = 0
+    corrompidos: List[RegistroCorrompido] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """Whether no corrupt record was found."""
+        return not self.corrompidos
+
+
+# Bytes of snapshot lines checked at a time by the verification fast path
+_BLOCO_VERIFICACAO = 1 << 20
+
+# Ends of the records of the indented layout (at the indentation of the array)
+_FECHAMENTOS_INDENTADOS = (b"    }", b"    },")
+
+# Seals of a block of records without their closing '"}', one after the other
+_SELOS = re.compile(rb'(?:,"crc":"[0-9a-f]{8})*')
+
+_CORPO = itemgetter(slice(None, 2 - _TAMANHO_SELO))
+_SELO = itemgetter(slice(2 - _TAMANHO_SELO, None))
+_DIGITOS = itemgetter(slice(-8, None))
+
+# CRC-32 of the '{' that opens every record
+_CRC_ABERTURA = zlib.crc32(b"{")
+
+
+def _contar_selados(linhas: List[bytes], indentado: bool) -> Optional[int]:
+    """
+    Check a block of whole records at C speed, without decoding them.
+
+    The seal of a record covers its compact encoding, which is the record
+    line itself in the compact layouts and the record's lines, stripped and
+    joined, in the indented one. The block is split into records between
+    the '"}' that ends one and the '{' that opens the next, and every step
+    maps a builtin over the whole block; the checksums are then compared as
+    two arrays.
+
+    Returns:
+        The number of records, or None if any of them is not sealed and
+        intact; the block must then go through _varrer_linhas, which
+        reports each problem.
+    """
+    if indentado:
+        texto = b"".join(map(bytes.strip, linhas)).removesuffix(b",")
+        separador = b'"},{'
+    else:
+        textos = map(methodcaller("removesuffix", b","), map(bytes.strip, linhas))
+        texto = b"\n".join(textos)
+        separador = b'"}\n{'
+    if not (texto.startswith(b"{") and texto.endswith(b'"}')):
+        return None
+    # From after the '{' of each record to before its '"}'
+    registros = texto[1:-2].split(separador)
+    if not _SELOS.fullmatch(b"".join(map(_SELO, registros))):
+        return None
+    corpos = map(zlib.crc32, map(_CORPO, registros), repeat(_CRC_ABERTURA))
+    esperados = array("I", map(zlib.crc32, repeat(b"}"), corpos))
+    gravados = array("I")
+    gravados.frombytes(bytes.fromhex(b"".join(map(_DIGITOS, registros)).decode()))
+    if sys.byteorder == "little":
+        gravados.byteswap()
+    return len(registros) if gravados == esperados else None
+
+
+def _ler_linhas(arquivo: IO[Any]) -> List[bytes]:
+    """
+    Read about _BLOCO_VERIFICACAO bytes of whole lines.
+
+    Unlike readlines, reads the block in one call, which matters on
+    compressed files, whose readline goes through Python for each line.
+    """
+    bloco = arquivo.read(_BLOCO_VERIFICACAO)
+    return (bloco + arquivo.readline()).splitlines(keepends=True) if bloco else []
+
+
+def _verificar_snapshot(path: Path, relatorio: RelatorioVerificacao) -> None:
+    """
+    Verify the records of a snapshot file into a report.
+
+    Blocks of whole records are checked by _contar_selados; from the first
+    block that does not pass (a corrupt or unsealed record), the rest of
+    the file is scanned record by record. The lines
+    that open and close the array are left to the scanner too.
+    """
+    with _abrir_leitura(path, binario=True) as arquivo:
+        linhas = _ler_linhas(arquivo)
+        numero = 1  # line number of linhas[0]
+        # The indented layout opens each record on a line of its own
+        indentado = any(linha.strip() == b"{" for linha in linhas[:2])
+        if linhas and linhas[0].strip() == b"[":
+            numero += 1
+            del linhas[0]
+        while linhas:
+            corte = len(linhas)
+            if indentado:
+                while corte and linhas[corte - 1].rstrip() not in (
+                    _FECHAMENTOS_INDENTADOS
+                ):
+                    corte -= 1
+            elif linhas[-1].strip() == b"]":
+                corte -= 1
+            if corte:
+                quantidade = _contar_selados(linhas[:corte], indentado)
+                if quantidade is None:
+                    break
+                relatorio.registros += quantidade
+                numero += corte
+                del linhas[:corte]
+            # Without a whole record yet, the block grows until it has one
+            bloco = _ler_linhas(arquivo)
+            if not bloco:
+                break
+            linhas += bloco
+
+        restantes = chain(
+            enumerate(linhas, numero), enumerate(arquivo, numero + len(linhas))
+        )
+        for _, registro in _varrer_linhas(path, restantes, decodificar=False):
+            if isinstance(registro, RegistroCorrompido):
+                relatorio.corrompidos.append(registro)
+            else:
+                relatorio.registros += 1
+                relatorio.sem_checksum += registro is not None
+
+
+def _verificar_arquivo(path: Path, relatorio: RelatorioVerificacao) -> None:
+    """Verify a snapshot file and its journal into a report."""
+    if path.exists():
+        relatorio.bytes += path.stat().st_size
+        try:
+            _verificar_snapshot(path, relatorio)
+        except _ERROS_LEITURA as e:
+            motivo = f"leitura interrompida: {e}"
+            relatorio.corrompidos.append(_corrompido(path, 0, motivo, b""))
+
+    journal = path.with_name(path.name + JOURNAL_SUFFIX)
+    try:
+        with open(journal, "rb") as arquivo:
+            for numero, linha in enumerate(arquivo, 1):
+                relatorio.bytes += len(linha)
+                linha = linha.rstrip(b"\r\n")
+                selo = _conferir_bruto(linha)
+                if selo is None:
+                    try:
+                        json.loads(linha)
+                    except ValueError:
+                        selo = False
+                if selo is False:
+                    motivo = "checksum inválido"
+                    relatorio.corrompidos.append(
+                        _corrompido(journal, numero, motivo, linha)
+                    )
+                elif numero > 1:
+                    relatorio.registros += 1
+                    relatorio.sem_checksum += selo is None
+    except FileNotFoundError:
+        pass
+
+
+def verificar_dados(caminho: Optional[str] = None) -> RelatorioVerificacao:
+    """
+    Verify the integrity of a data store in one streaming pass.
+
+    Checks the checksum of every record of a data file (any layout,
+    compressed or not) and of its journal, of every shard of a sharded
+    directory, or runs ``PRAGMA quick_check`` on a SQLite database. Sealed
+    records of the compact layouts are checked without being decoded.
+
+    Args:
+        caminho: Optional path to the data. If not provided, uses
+            :func:`get_store_path`.
+
+    Returns:
+        The verification report.
+
+    Raises:
+        DataLoadError: If the store cannot be read at all.
+    """
+    relatorio = RelatorioVerificacao()
+    path = get_store_path(caminho)
+    if get_storage_mode(caminho) == "sqlite":
+        if not path.exists():
+            raise DataLoadError(f"Database {path} does not exist")
+        try:
+            conexao = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                mensagens = [m for (m,) in conexao.execute("PRAGMA quick_check")]
+                (relatorio.registros,) = conexao.execute(
+                    "SELECT count(*) FROM alunos"
+                ).fetchone()
+            finally:
+                conexao.close()
+        except sqlite3.Error as e:
+            raise DataLoadError(f"Failed to verify database {path}: {e}") from e
+        relatorio.bytes = path.stat().st_size
+        if mensagens != ["ok"]:
+            relatorio.corrompidos.extend(
+                RegistroCorrompido(str(path), 0, mensagem, "") for mensagem in mensagens
+            )
+        return relatorio
+
+    try:
+        if is_sharded(path):
+            for arquivo in _arquivos_shards(path, _ler_manifesto(path)):
+                _verificar_arquivo(arquivo, relatorio)
+        elif path.exists() or path.with_name(path.name + JOURNAL_SUFFIX).exists():
+            _verificar_arquivo(path, relatorio)
+        else:
+            raise DataLoadError(f"Data file {path} does not exist")
+    except OSError as e:
+        raise DataLoadError(f"Failed to verify {path}: {e}") from e
+    return relatorio
+
+
+def is_sharded(path: Path) -> bool:
+    """
+    Check whether a data path is a sharded directory.
+
+    Args:
+        path: Path to the data file or directory.
+
+    Returns:
+        True if the path is a directory with a shard manifest.
+    """
+    return (path / SHARD_MANIFEST).is_file()
+
+
+def shard_de(email: str, shards: int) -> int:
+    """
+    Get the shard that holds a student.
+
+    Uses a BLAKE2 digest of the normalized email, which (unlike ``hash()``)
+    is the same in every process and every run. CRC-32 would be cheaper, but
+    its low bits spread similar emails poorly over small shard counts.
+
+    Args:
+        email: Email of the student.
+        shards: Number of shards.
+
+    Returns:
+        Shard index, from 0 to ``shards - 1``.
+    """
+    digest = hashlib.blake2b(normalizar_email(email).encode("utf-8"), digest_size=8)
+    return int.from_bytes(digest.digest(), "big") % shards
+
+
+def _ler_manifesto(path: Path) -> int:
+    """Read the number of shards from the manifest of a sharded directory."""
+    manifesto = path / SHARD_MANIFEST
+    try:
+        with open(manifesto, encoding="utf-8") as arquivo:
+            dados = json.load(arquivo)
+        shards = int(dados["shards"])
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.error(f"Failed to read shard manifest {manifesto}: {e}")
+        raise DataLoadError(f"Failed to read shard manifest {manifesto}: {e}") from e
+    if dados.get("versao") != _SHARD_VERSION or shards < 1:
+        raise DataLoadError(f"Unsupported shard manifest {manifesto}")
+    return shards
+
+
+def _escrever_manifesto(path: Path, shards: int) -> None:
+    """Write (atomically) the manifest of a sharded directory."""
+    manifesto = path / SHARD_MANIFEST
+    temporario = manifesto.with_name(manifesto.name + ".tmp")
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump({"versao": _SHARD_VERSION, "shards": shards}, arquivo)
+        os.replace(temporario, manifesto)
+    except OSError as e:
+        logger.error(f"Failed to write shard manifest {manifesto}: {e}")
+        raise DataSaveError(f"Failed to write shard manifest {manifesto}: {e}") from e
+
+
+def _arquivos_shards(path: Path, shards: int) -> List[Path]:
+    """Paths of the shard files of a sharded directory."""
+    return [path / f"shard-{indice:03d}.json" for indice in range(shards)]
+
+
+def _particionar(alunos: Iterable[Aluno], shards: int) -> List[List[Aluno]]:
+    """Split a roster by shard, keeping the roster order within each shard."""
+    particoes: List[List[Aluno]] = [[] for _ in range(shards)]
+    for aluno in alunos:
+        particoes[shard_de(aluno.email, shards)].append(aluno)
+    return particoes
+
+
+def _carregar_shards(
+    carregar: Callable[[Any], List[Aluno]], shards: Sequence[Any]
+) -> List[List[Aluno]]:
+    """Load every shard on a thread pool, returning the students of each."""
+    with _sem_gc(), ThreadPoolExecutor() as executor:
+        partes = list(executor.map(carregar, shards))
+    total = sum(len(parte) for parte in partes)
+    logger.info(f"Loaded {total} students from {len(partes)} shards")
+    return partes
+
+
+def _salvar_shards(
+    alunos: Iterable[Aluno],
+    path: Path,
+    shards: int,
+    rapido: Optional[bool] = None,
+    durabilidade: Optional[str] = None,
+) -> None:
+    """Rewrite every shard of a sharded directory."""
+    arquivos = _arquivos_shards(path, shards)
+    for arquivo, particao in zip(arquivos, _particionar(alunos, shards)):
+        salvar_dados(particao, str(arquivo), rapido, durabilidade)
+
+
+def repartir(
+    origem: Optional[str] = None,
+    destino: Optional[str] = None,
+    shards: Optional[int] = None,
+) -> int:
+    """
+    Rewrite a data file or sharded directory as a sharded directory.
+
+    Converts a single data file into the sharded layout, or changes the
+    shard count of a sharded directory. The new layout is built next to the
+    destination and swapped in, so a failure leaves the old data untouched.
+    No other process may write the data meanwhile.
+
+    Args:
+        origem: Data file or sharded directory to read. If not provided,
+            uses PIM_DATA_PATH or the default path.
+        destino: Directory to write. Defaults to ``origem`` itself when it
+            is a sharded directory, or to ``origem`` without its suffix
+            (``alunos.json`` -> ``alunos``).
+        shards: Number of shards (default: get_shard_count()).
+
+    Returns:
+        Number of students written.
+
+    Raises:
+        DataLoadError: If the data cannot be loaded.
+        DataSaveError: If the new layout cannot be written.
+    """
+    path_origem = get_store_path(origem)
+    if destino:
+        path = Path(destino)
+    elif is_sharded(path_origem):
+        path = path_origem
+    else:
+        path = path_origem.with_suffix("")
+    shards = shards or get_shard_count()
+
+    alunos = carregar_dados(str(path_origem))
+    temporario = path.with_name(path.name + ".tmp")
+    antigo = path.with_name(path.name + ".old")
+    try:
+        shutil.rmtree(temporario, ignore_errors=True)
+        _escrever_manifesto(temporario, shards)
+        _salvar_shards(alunos, temporario, shards)
+        if path.exists():
+            shutil.rmtree(antigo, ignore_errors=True)
+            os.replace(path, antigo)
+            os.replace(temporario, path)
+            shutil.rmtree(antigo, ignore_errors=True)
+        else:
+            os.replace(temporario, path)
+    except OSError as e:
+        shutil.rmtree(temporario, ignore_errors=True)
+        logger.error(f"Failed to reshard {path_origem} into {path}: {e}")
+        raise DataSaveError(f"Failed to reshard {path_origem} into {path}: {e}") from e
+
+    logger.info(f"Resharded {len(alunos)} students into {shards} shards at {path}")
+    return len(alunos)
+
+
+def _valores_decimos(valores: "array[float]") -> Optional["array[int]"]:
+    """Encode grades as tenths in bytes, or None if some grade is not a tenth."""
+    decimos = array("B")
+    try:
+        decimos.extend(round(valor * 10) for valor in valores)
+    except (OverflowError, ValueError):
+        return None
+    if any(abs(valor * 10 - decimo) > 1e-9 for valor, decimo in zip(valores, decimos)):
+        return None
+    return decimos
+
+
+def _alinhar(posicao: int) -> int:
+    """Round a file position up to the next multiple of 8."""
+    return (posicao + 7) & ~7
+
+
+def salvar_colunas(alunos: Iterable[Aluno], caminho: Optional[str] = None) -> Path:
+    """
+    Write the grades of a roster to a columnar grade file.
+
+    The file keeps, for each discipline, a table of ``len(alunos) + 1``
+    uint32 offsets (student ``i`` owns values ``offsets[i]:offsets[i + 1]``)
+    and the packed grades of every student in roster order. Grades are
+    stored as uint8 tenths when all of them are multiples of 0.1 (as quiz
+    grades are), and as float32 otherwise. Arrays are little-endian and
+    8-byte aligned, so :class:`ColunasNotas` maps them without copying.
+
+    Students are consumed one at a time, so a streaming source such as
+    :func:`iterar_alunos` converts a roster without loading it.
+
+    Args:
+        alunos: Students to write.
+        caminho: Path of the columnar file. If not provided, uses
+            :func:`get_columns_path`.
+
+    Returns:
+        Path of the file written.
+
+    Raises:
+        DataSaveError: If the file cannot be written.
+    """
+    path = Path(caminho) if caminho else get_columns_path()
+    # Per discipline id: offset table and grades, created on first use
+    offsets: List[Optional["array[int]"]] = []
+    valores: List[Optional["array[float]"]] = []
+    total = 0
+    for aluno in alunos:
+        notas = aluno._notas or ()
+        if len(notas) > len(offsets):
+            offsets.extend([None] * (len(notas) - len(offsets)))
+            valores.extend([None] * (len(notas) - len(valores)))
+        for disciplina_id, lista in enumerate(notas):
+            if lista:
+                acumulados = valores[disciplina_id]
+                if acumulados is None:
+                    offsets[disciplina_id] = array("I", [0]) * (total + 1)
+                    acumulados = valores[disciplina_id] = array("d")
+                acumulados.extend(lista)
+        total += 1
+        for tabela, acumulados in zip(offsets, valores):
+            if tabela is not None and acumulados is not None:
+                tabela.append(len(acumulados))
+
+    colunas = [
+        (i, _DISCIPLINAS[i])
+        for i in range(max(len(offsets), len(disciplinas)))
+        if i < len(disciplinas) or offsets[i] is not None
+    ]
+    # Disciplines with grades (every one of them is a column)
+    usadas = {i: notas for i, notas in enumerate(valores) if notas is not None}
+    codificados: Dict[int, "array[Any]"] = {}
+    tipo = "B"
+    for i, acumulados in usadas.items():
+        decimos = _valores_decimos(acumulados)
+        if decimos is None:
+            tipo = "f"
+            codificados = {i: array("f", notas) for i, notas in usadas.items()}
+            break
+        codificados[i] = decimos
+
+    nomes = [nome.encode("utf-8") for _, nome in colunas]
+    posicao = _alinhar(
+        _COLUMNS_HEADER.size + sum(_COLUMNS_ENTRY.size + len(nome) for nome in nomes)
+    )
+    diretorio = []
+    blocos: List[Tuple[int, "array[Any]"]] = []
+    tamanho_offsets = 4 * (total + 1)
+    for i, _ in colunas:
+        coluna = codificados.get(i)
+        tabela = offsets[i] if coluna is not None else None
+        if coluna is None or tabela is None:
+            coluna = array("B") if tipo == "B" else array("f")
+            tabela = array("I", [0]) * (total + 1)
+        posicao_valores = _alinhar(posicao + tamanho_offsets)
+        diretorio.append((posicao, posicao_valores, len(coluna)))
+        blocos.append((posicao, tabela))
+        blocos.append((posicao_valores, coluna))
+        posicao = _alinhar(posicao_valores + len(coluna) * coluna.itemsize)
+
+    temporario = path.with_name(path.name + ".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(temporario, "wb") as arquivo:
+            arquivo.write(
+                _COLUMNS_HEADER.pack(
+                    _COLUMNS_MAGIC,
+                    _COLUMNS_VERSION,
+                    tipo.encode("ascii"),
+                    total,
+                    len(colunas),
+                )
+            )
+            for (inicio, inicio_valores, quantidade), nome in zip(diretorio, nomes):
+                arquivo.write(
+                    _COLUMNS_ENTRY.pack(inicio, inicio_valores, quantidade, len(nome))
+                )
+                arquivo.write(nome)
+            for inicio, bloco in blocos:
+                arquivo.write(b"\0" * (inicio - arquivo.tell()))
+                if sys.byteorder == "big":
+                    bloco = bloco[:]  # swap a copy
+                    bloco.byteswap()
+                arquivo.write(bloco)
+        os.replace(temporario, path)
+    except OSError as e:
+        logger.error(f"Failed to save grade columns to {path}: {e}")
+        raise DataSaveError(f"Failed to save grade columns to {path}: {e}") from e
+
+    logger.info(f"Saved grades of {total} students to {path}")
+    return path
+
+
+class _Decimos(Sequence[float]):
+    """Read-only sequence of grades decoded from packed uint8 tenths."""
+
+    __slots__ = ("_valores",)
+
+    def __init__(self, valores: memoryview) -> None:
+        self._valores = valores
+
+    def __len__(self) -> int:
+        return len(self._valores)
+
+    def __getitem__(self, indice: Any) -> Any:
+        if isinstance(indice, slice):
+            return _Decimos(self._valores[indice])
+        return self._valores[indice] / 10
+
+    def __iter__(self) -> Iterator[float]:
+        for valor in self._valores:
+            yield valor / 10
+
+    def __repr__(self) -> str:
+        return f"_Decimos({list(self)!r})"
+
+
+class ColunasNotas:
+    """
+    Read-only, memory-mapped view of a columnar grade file.
+
+    Grades are served straight from the page cache: :meth:`valores` returns
+    the packed array of a discipline as a ``memoryview`` and :meth:`notas`
+    a sequence of floats over it, so the statistics in :mod:`pim.core` run
+    over a cohort without building one float object per stored grade.
+    Views must be released before :meth:`fechar` (or the end of a ``with``
+    block), which otherwise raises ``BufferError``.
+
+    Example:
+        >>> with ColunasNotas("data/alunos.json.notas") as colunas:
+        ...     media = calcular_media(colunas.notas("Python"))
+    """
+
+    def __init__(self, caminho: Optional[str] = None) -> None:
+        """
+        Args:
+            caminho: Path of the columnar file. If not provided, uses
+                :func:`get_columns_path`.
+
+        Raises:
+            DataLoadError: If the file is missing, truncated or of another format.
+        """
+        self.path = Path(caminho) if caminho else get_columns_path()
+        try:
+            with open(self.path, "rb") as arquivo:
+                self._mmap = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to open grade columns {self.path}: {e}")
+            raise DataLoadError(f"Failed to open grade columns {self.path}: {e}") from e
+        self._mapa = memoryview(self._mmap)
+        try:
+            self._ler_diretorio()
+        except (struct.error, UnicodeDecodeError, DataLoadError) as e:
+            self.fechar()
+            raise DataLoadError(f"Invalid grade columns {self.path}: {e}") from e
+
+    def _ler_diretorio(self) -> None:
+        """Parse the header and the discipline directory."""
+        magic, versao, tipo, self.alunos, quantidade = _COLUMNS_HEADER.unpack_from(
+            self._mapa
+        )
+        if magic != _COLUMNS_MAGIC or versao != _COLUMNS_VERSION:
+            raise DataLoadError("unknown format")
+        self.tipo = tipo.decode("ascii")
+        if self.tipo not in ("B", "f"):
+            raise DataLoadError(f"unknown value type {self.tipo!r}")
+        self._colunas: Dict[str, Tuple[int, int, int]] = {}
+        posicao = _COLUMNS_HEADER.size
+        for _ in range(quantidade):
+            inicio, inicio_valores, total, tamanho = _COLUMNS_ENTRY.unpack_from(
+                self._mapa, posicao
+            )
+            posicao += _COLUMNS_ENTRY.size
+            nome = bytes(self._mapa[posicao : posicao + tamanho]).decode("utf-8")
+            posicao += tamanho
+            fim = inicio_valores + total * (1 if self.tipo == "B" else 4)
+            if fim > len(self._mapa) or inicio + 4 * (self.alunos + 1) > inicio_valores:
+                raise DataLoadError(f"truncated column {nome!r}")
+            self._colunas[nome] = (inicio, inicio_valores, total)
+
+    @property
+    def disciplinas(self) -> List[str]:
+        """Disciplines in the file, in directory order."""
+        return list(self._colunas)
+
+    def _coluna(self, disciplina: str) -> Tuple[int, int, int]:
+        try:
+            return self._colunas[disciplina]
+        except KeyError:
+            raise KeyError(disciplina) from None
+
+    def _array(self, inicio: int, quantidade: int, tipo: str) -> "memoryview[Any]":
+        """Map a packed array; on big-endian hosts, decode a swapped copy."""
+        tamanho = quantidade * array(tipo).itemsize
+        bloco = self._mapa[inicio : inicio + tamanho]
+        if sys.byteorder == "big" and tipo != "B":  # pragma: no cover
+            copia = array(tipo, bytes(bloco))
+            copia.byteswap()
+            return memoryview(copia)
+        if tipo == "I":
+            return bloco.cast("I")
+        if tipo == "f":
+            return bloco.cast("f")
+        return bloco  # the map is already unsigned bytes
+
+    def offsets(self, disciplina: str) -> "memoryview[int]":
+        """
+        Get the offset table of a discipline.
+
+        Args:
+            disciplina: Discipline name.
+
+        Returns:
+            ``len(self) + 1`` uint32 offsets into :meth:`valores`.
+
+        Raises:
+            KeyError: If the file has no such discipline.
+        """
+        inicio, _, _ = self._coluna(disciplina)
+        return self._array(inicio, self.alunos + 1, "I")
+
+    def valores(self, disciplina: str) -> "memoryview[Any]":
+        """
+        Get the packed grades of a discipline, without copying.
+
+        Args:
+            disciplina: Discipline name.
+
+        Returns:
+            uint8 tenths (``tipo == "B"``) or float32 grades (``tipo == "f"``).
+
+        Raises:
+            KeyError: If the file has no such discipline.
+        """
+        _, inicio_valores, total = self._coluna(disciplina)
+        return self._array(inicio_valores, total, self.tipo)
+
+    def notas(self, disciplina: str, aluno: Optional[int] = None) -> Sequence[float]:
+        """
+        Get grades of a discipline as floats.
+
+        Args:
+            disciplina: Discipline name.
+            aluno: Position of a student in the roster; if not provided,
+                returns the grades of every student.
+
+        Returns:
+            Read-only sequence of grades backed by the mapped file.
+
+        Raises:
+            KeyError: If the file has no such discipline.
+            IndexError: If the student position is out of range.
+        """
+        valores = self.valores(disciplina)
+        if aluno is not None:
+            if not 0 <= aluno < self.alunos:
+                raise IndexError(aluno)
+            offsets = self.offsets(disciplina)
+            valores = valores[offsets[aluno] : offsets[aluno + 1]]
+        return valores if self.tipo == "f" else _Decimos(valores)
+
+    def __len__(self) -> int:
+        return int(self.alunos)
+
+    def fechar(self) -> None:
+        """Unmap the file."""
+        self._mapa.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "ColunasNotas":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.fechar()
+
+
+@dataclass
+class CompactionPolicy:
+    """
+    Thresholds that trigger a journal compaction.
+
+    A compaction runs as soon as any enabled threshold is reached; a
+    threshold set to None is disabled.
+    """
+
+    max_registros: Optional[int] = 1000
+    max_bytes: Optional[int] = 1024 * 1024
+    max_segundos: Optional[float] = 300.0
+
+    @classmethod
+    def from_env(cls) -> "CompactionPolicy":
+        """
+        Build a policy from the PIM_COMPACT_* environment variables.
+
+        PIM_COMPACT_RECORDS, PIM_COMPACT_BYTES and PIM_COMPACT_SECONDS override
+        the defaults; a value of 0 disables the corresponding trigger.
+        """
+        policy = cls()
+        for var, attr, tipo in (
+            ("PIM_COMPACT_RECORDS", "max_registros", int),
+            ("PIM_COMPACT_BYTES", "max_bytes", int),
+            ("PIM_COMPACT_SECONDS", "max_segundos", float),
+        ):
+            valor = os.environ.get(var)
+            if valor is None:
+                continue
+            try:
+                setattr(policy, attr, tipo(valor) or None)
+            except ValueError:
+                logger.warning(f"Ignoring invalid value {valor!r} for {var}")
+        return policy
+
+
+@dataclass
+class JournalStats:
+    """Size and age of a journal."""
+
+    registros: int
+    bytes: int
+    idade: float
+
+
+def journal_stats(caminho: Optional[str] = None) -> JournalStats:
+    """
+    Measure the journal of a data file.
+
+    Args:
+        caminho: Optional path to the data file. If not provided, uses default path.
+
+    Returns:
+        JournalStats with the number of change records, the journal size in
+        bytes and the seconds elapsed since the journal was started.
+    """
+    journal = get_journal_path(caminho)
+    try:
+        with open(journal, "rb") as arquivo:
+            cabecalho = arquivo.readline()
+            registros = sum(1 for _ in arquivo)
+            tamanho = arquivo.tell()
+    except FileNotFoundError:
+        return JournalStats(registros=0, bytes=0, idade=0.0)
+
+    try:
+        inicio = json.loads(cabecalho).get("ts", time.time())
+    except (json.JSONDecodeError, AttributeError):
+        inicio = time.time()
+    return JournalStats(registros=registros, bytes=tamanho, idade=time.time() - inicio)
+
+
+def precisa_compactar(policy: CompactionPolicy, caminho: Optional[str] = None) -> bool:
+    """
+    Check whether the journal of a data file has reached a compaction threshold.
+
+    Args:
+        policy: Thresholds to check.
+        caminho: Optional path to the data file. If not provided, uses default path.
+
+    Returns:
+        True if the journal should be compacted.
+    """
+    stats = journal_stats(caminho)
+    if stats.registros == 0:
+        return False
+    return (
+        (policy.max_registros is not None and stats.registros >= policy.max_registros)
+        or (policy.max_bytes is not None and stats.bytes >= policy.max_bytes)
+        or (policy.max_segundos is not None and stats.idade >= policy.max_segundos)
+    )
+
+
+def compactar_journal(caminho: Optional[str] = None) -> int:
+    """
+    Fold the journal of a data file into a fresh snapshot.
+
+    The new snapshot is written to a temporary file and atomically swapped
+    in before the journal is removed, so a crash at any point leaves either
+    the old snapshot and its journal or the new snapshot.
+
+    Args:
+        caminho: Optional path to the data file. If not provided, uses default path.
+
+    Returns:
+        Number of journal records folded into the snapshot.
+
+    Raises:
+        DataLoadError: If the current data cannot be loaded.
+        DataSaveError: If the new snapshot cannot be written.
+    """
+    path = get_data_path(caminho)
+    journal = get_journal_path(caminho)
+    politica = DurabilityPolicy.from_env()
+
+    with _journal_lock, _trava(caminho) as trava:
+        if not journal.exists():
+            return 0
+        alunos = carregar_dados(caminho)
+        registros = journal_stats(caminho).registros
+        temporario = path.with_name(path.name + ".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                with _abrir_escrita(temporario, path, politica) as arquivo:
+                    _escrever_alunos(arquivo, alunos, path)
+                os.replace(temporario, path)
+            finally:
+                temporario.unlink(missing_ok=True)
+            if politica.nivel == "strict":
+                _fsync_diretorio(path)
+            journal.unlink(missing_ok=True)
+            trava.avancar()
+        except OSError as e:
+            logger.error(f"Failed to compact journal {journal}: {e}")
+            raise DataSaveError(f"Failed to compact journal {journal}: {e}") from e
+
+    logger.info(f"Compacted {registros} journal records into {path}")
+    return registros
+
+
+class Compactador:
+    """
+    Background thread that compacts the journal whenever the policy says so.
+
+    Use as a context manager, or call start() and stop() explicitly.
+    """
+
+    def __init__(
+        self,
+        caminho: Optional[str] = None,
+        policy: Optional[CompactionPolicy] = None,
+        intervalo: float = 5.0,
+    ) -> None:
+        """
+        Args:
+            caminho: Optional path to the data file. If not provided, uses default path.
+            policy: Compaction thresholds (default: CompactionPolicy.from_env()).
+            intervalo: Seconds between threshold checks.
+        """
+        self.caminho = caminho
+        self.policy = policy or CompactionPolicy.from_env()
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the background compaction thread."""
+        if self._thread is not None:
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(
+            target=self._executar, name="pim-compactador", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and wait for it to finish."""
+        if self._thread is None:
+            return
+        self._parar.set()
+        self._thread.join()
+        self._thread = None
+
+    def verificar(self) -> int:
+        """
+        Compact the journal now if a threshold was reached.
+
+        Returns:
+            Number of journal records folded (0 if no compaction ran).
+        """
+        if not precisa_compactar(self.policy, self.caminho):
+            return 0
+        return compactar_journal(self.caminho)
+
+    def _executar(self) -> None:
+        while not self._parar.is_set():
+            try:
+                self.verificar()
+            except (DataLoadError, DataSaveError) as e:
+                logger.error(f"Background compaction failed: {e}")
+            self._parar.wait(self.intervalo)
+
+    def __enter__(self) -> "Compactador":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+class Alteracao(NamedTuple):
+    """A change to persist: a registration (no discipline) or a new grade."""
+
+    aluno: Aluno
+    disciplina: Optional[str] = None
+    nota: Optional[float] = None
+
+
+class Storage(ABC):
+    """
+    Persistence backend for the student roster.
+
+    The CLI talks to storage only through this interface, so backends can
+    persist a single change without rewriting the whole roster.
+    """
+
+    # Whether buscar() can load one student without reading the whole roster
+    indexado = False
+
+    @abstractmethod
+    def carregar(self) -> List[Aluno]:
+        """
+        Load every student.
+
+        Raises:
+            DataLoadError: If the data cannot be loaded.
+        """
+
+    def iterar(self) -> Iterator[Aluno]:
+        """
+        Stream every student.
+
+        Backends that can read the roster incrementally override this; by
+        default it is loaded whole.
+
+        Raises:
+            DataLoadError: If the data cannot be loaded.
+        """
+        return iter(self.carregar())
+
+    @abstractmethod
+    def salvar(self, alunos: Iterable[Aluno]) -> None:
+        """
+        Replace the stored roster with the given students.
+
+        Raises:
+            DataSaveError: If the data cannot be saved.
+        """
+
+    @abstractmethod
+    def registrar_aluno(self, aluno: Aluno, alunos: Iterable[Aluno]) -> None:
+        """
+        Persist a newly registered student.
+
+        Args:
+            aluno: The new student, already added to ``alunos``.
+            alunos: The whole roster, for backends that rewrite it.
+
+        Raises:
+            DataSaveError: If the change cannot be saved.
+        """
+
+    @abstractmethod
+    def registrar_nota(
+        self, aluno: Aluno, disciplina: str, nota: float, alunos: Iterable[Aluno]
+    ) -> None:
+        """
+        Persist a grade just appended to ``aluno.notas[disciplina]``.
+
+        Args:
+            aluno: Student who received the grade.
+            disciplina: Discipline of the evaluation.
+            nota: The grade obtained.
+            alunos: The whole roster, for backends that rewrite it.
+
+        Raises:
+            DataSaveError: If the change cannot be saved.
+        """
+
+    def aplicar(self, alteracoes: Sequence[Alteracao], alunos: Iterable[Aluno]) -> None:
+        """
+        Persist a batch of changes at once.
+
+        Backends override this to commit the whole batch in a single write.
+
+        Args:
+            alteracoes: Changes in the order they happened.
+            alunos: The whole roster, for backends that rewrite it.
+
+        Raises:
+            DataSaveError: If the changes cannot be saved.
+            ValueError: If a change has a discipline but no grade.
+        """
+        for alteracao in alteracoes:
+            if alteracao.disciplina is None:
+                self.registrar_aluno(alteracao.aluno, alunos)
+            elif alteracao.nota is None:
+                raise ValueError(
+                    f"Grade change for {alteracao.aluno.email} in "
+                    f"{alteracao.disciplina} has no grade"
+                )
+            else:
+                self.registrar_nota(
+                    alteracao.aluno, alteracao.disciplina, alteracao.nota, alunos
+                )
+
+    def buscar(self, email: str) -> Optional[Aluno]:
+        """
+        Load a single student by email.
+
+        Only backends with an email index (``indexado``) support this.
+
+        Args:
+            email: Email to look up (case and surrounding spaces are ignored).
+
+        Returns:
+            The student, or None if not registered.
+
+        Raises:
+            NotImplementedError: If the backend has no email index.
+            DataLoadError: If the data cannot be read.
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot look up by email")
+
+    def fechar(self) -> None:
+        """Release any resource held by the backend."""
+
+    def __enter__(self) -> "Storage":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.fechar()
+
+
+def _contagens(aluno: Aluno) -> Tuple[int, ...]:
+    """Number of grades of a student in each discipline, by discipline id."""
+    if aluno._notas is None:
+        return ()
+    return tuple(len(notas) if notas else 0 for notas in aluno._notas)
+
+
+def _mesclar_alunos(
+    alunos: Iterable[Aluno],
+    disco: List[Aluno],
+    base: Mapping[str, Tuple[int, ...]],
+) -> int:
+    """
+    Fold the changes other writers made on disk into a roster, in place.
+
+    Grade lists only grow, so the grades another writer added to a student
+    are the ones past the counts in ``base`` (what was on disk when this
+    roster last matched it). They are inserted before the grades added here
+    since then, so both writers' grades survive. Students registered
+    elsewhere are appended to the roster.
+
+    Args:
+        alunos: The roster to update (a list or a StudentRegistry).
+        disco: The students currently on disk.
+        base: Grade counts per email from the last load or save.
+
+    Returns:
+        Number of students that received changes from disk.
+    """
+    por_email = {normalizar_email(aluno.email): aluno for aluno in alunos}
+    adicionar = getattr(alunos, "add", None) or getattr(alunos, "append")
+    alterados = 0
+    for outro in disco:
+        chave = normalizar_email(outro.email)
+        aluno = por_email.get(chave)
+        if aluno is None:
+            adicionar(outro)
+            por_email[chave] = outro
+            alterados += 1
+            continue
+        if outro.email not in base:
+            logger.warning(f"{outro.email} was also registered by another writer")
+        contagens = base.get(outro.email, ())
+        mudou = False
+        for disciplina_id, notas in enumerate(outro._notas or ()):
+            inicio = contagens[disciplina_id] if disciplina_id < len(contagens) else 0
+            if not notas or len(notas) <= inicio:
+                continue
+            novas = notas[inicio:]
+            atuais = aluno._lista(disciplina_id)
+            if atuais is None:
+                aluno._guardar(disciplina_id, novas)
+            else:
+                atuais[inicio:inicio] = novas
+            mudou = True
+        alterados += mudou
+    return alterados
+
+
+class JsonStorage(Storage):
+    """
+    Storage backed by the JSON data file, optionally with a journal.
+
+    Several processes may share the file. Writes are serialized by the lock
+    file, and each one bumps the generation stored there. In journal mode
+    changes are appends, so concurrent writers never overwrite each other.
+    Without the journal each change rewrites the file, so before writing
+    the storage checks the generation: if another process wrote since this
+    one last loaded or saved, its changes are merged into the roster first
+    (see :func:`_mesclar_alunos`) instead of being overwritten.
+    """
+
+    def __init__(
+        self,
+        caminho: Optional[str] = None,
+        journal: bool = False,
+        durabilidade: Optional[str] = None,
+    ) -> None:
+        """
+        Args:
+            caminho: Optional path to the JSON file. If not provided, uses default path.
+            journal: Append changes to the journal instead of rewriting the file.
+            durabilidade: Durability level of every write. If not provided,
+                uses PIM_DURABILITY.
+        """
+        self.caminho = caminho
+        self.journal = journal
+        self.durabilidade = durabilidade
+        # Generation and grade counts of the file when the roster last matched
+        # it; None until the first load or save (nothing to merge against)
+        self._geracao: Optional[int] = None
+        self._base: Dict[str, Tuple[int, ...]] = {}
+
+    def _sincronizado(self, alunos: Iterable[Aluno], geracao: int) -> None:
+        """Record that the roster matches the file at a generation."""
+        self._geracao = geracao
+        if not self.journal:
+            self._base = {aluno.email: _contagens(aluno) for aluno in alunos}
+
+    def carregar(self) -> List[Aluno]:
+        try:
+            with _trava(self.caminho) as trava:
+                alunos = carregar_dados(self.caminho)
+                self._sincronizado(alunos, trava.geracao)
+        except OSError as e:
+            logger.error(f"Failed to lock {get_lock_path(self.caminho)}: {e}")
+            raise DataLoadError(f"Failed to lock data file: {e}") from e
+        return alunos
+
+    def salvar(self, alunos: Iterable[Aluno]) -> None:
+        with _trava(self.caminho) as trava:
+            salvar_dados(alunos, self.caminho, durabilidade=self.durabilidade)
+            self._sincronizado(alunos, trava.geracao)
+
+    def registrar_aluno(self, aluno: Aluno, alunos: Iterable[Aluno]) -> None:
+        self.aplicar([Alteracao(aluno)], alunos)
+
+    def registrar_nota(
+        self, aluno: Aluno, disciplina: str, nota: float, alunos: Iterable[Aluno]
+    ) -> None:
+        self.aplicar([Alteracao(aluno, disciplina, nota)], alunos)
+
+    def aplicar(self, alteracoes: Sequence[Alteracao], alunos: Iterable[Aluno]) -> None:
+        if not alteracoes:
+            return
+        if self.journal:
+            _anexar_registros(
+                [_registro_journal(a) for a in alteracoes],
+                self.caminho,
+                self.durabilidade,
+            )
+            return
+
+        try:
+            with _trava(self.caminho) as trava:
+                if self._geracao is not None and trava.geracao != self._geracao:
+                    disco = carregar_dados(self.caminho)
+                    alterados = _mesclar_alunos(alunos, disco, self._base)
+                    logger.info(
+                        f"Merged changes to {alterados} students written by "
+                        f"another process (generation {self._geracao} -> "
+                        f"{trava.geracao})"
+                    )
+                salvar_dados(alunos, self.caminho, durabilidade=self.durabilidade)
+                self._sincronizado(alunos, trava.geracao)
+        except (OSError, DataLoadError) as e:
+            logger.error(f"Failed to merge concurrent changes: {e}")
+            raise DataSaveError(f"Failed to merge concurrent changes: {e}") from e
+
+    def fechar(self) -> None:
+        sincronizar_pendentes()
+
+
+class SqliteStorage(Storage):
+    """
+    Storage backed by a SQLite database.
+
+    Each student is one row of ``alunos`` (with a unique index on email) and
+    each grade one row of ``notas``, keyed by student and discipline, so
+    registrations and grades are single-row inserts.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS alunos (
+            id INTEGER PRIMARY KEY,
+            nome TEXT NOT NULL,
+            email TEXT NOT NULL,
+            senha TEXT NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_alunos_email ON alunos (email);
+        CREATE INDEX IF NOT EXISTS idx_alunos_email_normalizado
+            ON alunos (lower(trim(email)));
+        CREATE TABLE IF NOT EXISTS disciplinas (
+            id INTEGER PRIMARY KEY,
+            nome TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS notas (
+            id INTEGER PRIMARY KEY,
+            aluno_id INTEGER NOT NULL REFERENCES alunos (id) ON DELETE CASCADE,
+            disciplina_id INTEGER NOT NULL REFERENCES disciplinas (id),
+            nota REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_notas_aluno ON notas (aluno_id, disciplina_id);
+    """
+
+    indexado = True
+
+    # PRAGMA synchronous for each durability level (in WAL mode NORMAL only
+    # syncs at checkpoints, so recent commits may be lost on power failure)
+    SYNCHRONOUS = {"none": "OFF", "batched": "NORMAL", "strict": "FULL"}
+
+    def __init__(
+        self, caminho: Optional[str] = None, durabilidade: Optional[str] = None
+    ) -> None:
+        """
+        Args:
+            caminho: Optional path to the database. If not provided, uses
+                PIM_DATA_PATH or DEFAULT_SQLITE_PATH.
+            durabilidade: Durability level of commits. If not provided, uses
+                PIM_DURABILITY.
+
+        Raises:
+            DataLoadError: If the database cannot be opened.
+        """
+        self.path = get_store_path(caminho)
+        nivel = DurabilityPolicy.from_env(durabilidade).nivel
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Write-behind storage flushes from a background thread
+            self._conexao = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conexao.execute("PRAGMA foreign_keys = ON")
+            self._conexao.execute("PRAGMA journal_mode = WAL")
+            self._conexao.execute(f"PRAGMA synchronous = {self.SYNCHRONOUS[nivel]}")
+            self._conexao.executescript(self.SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Failed to open database {self.path}: {e}")
+            raise DataLoadError(f"Failed to open database {self.path}: {e}") from e
+        self._disciplina_ids: Dict[str, int] = {}
+
+    def _disciplina_id(self, disciplina: str) -> int:
+        """Get (creating if needed) the id of a discipline."""
+        disciplina_id = self._disciplina_ids.get(disciplina)
+        if disciplina_id is None:
+            self._conexao.execute(
+                "INSERT OR IGNORE INTO disciplinas (nome) VALUES (?)", (disciplina,)
+            )
+            (disciplina_id,) = self._conexao.execute(
+                "SELECT id FROM disciplinas WHERE nome = ?", (disciplina,)
+            ).fetchone()
+            self._disciplina_ids[disciplina] = disciplina_id
+        return disciplina_id
+
+    def _inserir_aluno(self, aluno: Aluno) -> None:
+        """Insert a student row and its grades in the current transaction."""
+        cursor = self._conexao.execute(
+            "INSERT INTO alunos (nome, email, senha) VALUES (?, ?, ?)",
+            (aluno.nome, aluno.email, aluno.senha),
+        )
+        if aluno._notas is None:
+            return  # no grade list allocated, as for every new student
+        aluno_id = cursor.lastrowid
+        self._conexao.executemany(
+            "INSERT INTO notas (aluno_id, disciplina_id, nota) VALUES (?, ?, ?)",
+            [
+                (aluno_id, self._disciplina_id(disciplina), nota)
+                for disciplina, notas in aluno._itens_notas()
+                for nota in notas
+            ],
+        )
+
+    def carregar(self) -> List[Aluno]:
+        logger.info(f"Loading student data from {self.path}")
+        try:
+            linhas = self._conexao.execute(
+                "SELECT id, nome, email, senha FROM alunos ORDER BY id"
+            ).fetchall()
+            notas: Dict[int, Dict[str, List[float]]] = {}
+            for aluno_id, disciplina, nota in self._conexao.execute(
+                "SELECT n.aluno_id, d.nome, n.nota FROM notas n"
+                " JOIN disciplinas d ON d.id = n.disciplina_id ORDER BY n.id"
+            ):
+                notas.setdefault(aluno_id, {}).setdefault(disciplina, []).append(nota)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to read database {self.path}: {e}")
+            raise DataLoadError(f"Failed to read database {self.path}: {e}") from e
+
+        alunos = [
+            Aluno(nome=nome, email=email, senha=senha, notas=notas.get(aluno_id, {}))
+            for aluno_id, nome, email, senha in linhas
+        ]
+        logger.info(f"Successfully loaded {len(alunos)} students")
+        return alunos
+
+    def iterar(self) -> Iterator[Aluno]:
+        """
+        Stream every student, in registration order, with bounded memory.
+
+        Students and grades are read by two cursors ordered by student id
+        and merged as they go, so no table is held in memory.
+
+        Yields:
+            Aluno objects with their grades.
+
+        Raises:
+            DataLoadError: If the database cannot be read.
+        """
+        try:
+            notas = self._conexao.execute(
+                "SELECT n.aluno_id, d.nome, n.nota FROM notas n"
+                " JOIN disciplinas d ON d.id = n.disciplina_id"
+                " ORDER BY n.aluno_id, n.id"
+            )
+            proxima = next(notas, None)
+            for aluno_id, nome, email, senha in self._conexao.execute(
+                "SELECT id, nome, email, senha FROM alunos ORDER BY id"
+            ):
+                aluno = Aluno(nome=nome, email=email, senha=senha)
+                # Grades of students no longer registered are skipped
+                while proxima is not None and proxima[0] <= aluno_id:
+                    if proxima[0] == aluno_id:
+                        aluno.notas.setdefault(proxima[1], []).append(proxima[2])
+                    proxima = next(notas, None)
+                yield aluno
+        except sqlite3.Error as e:
+            logger.error(f"Failed to read database {self.path}: {e}")
+            raise DataLoadError(f"Failed to read database {self.path}: {e}") from e
+
+    def buscar(self, email: str) -> Optional[Aluno]:
+        try:
+            linha = self._conexao.execute(
+                "SELECT id, nome, email, senha FROM alunos"
+                " WHERE lower(trim(email)) = ?",
+                (normalizar_email(email),),
+            ).fetchone()
+            if linha is None:
+                return None
+            aluno_id, nome, email, senha = linha
+            notas: Dict[str, List[float]] = {}
+            for disciplina, nota in self._conexao.execute(
+                "SELECT d.nome, n.nota FROM notas n"
+                " JOIN disciplinas d ON d.id = n.disciplina_id"
+                " WHERE n.aluno_id = ? ORDER BY n.id",
+                (aluno_id,),
+            ):
+                notas.setdefault(disciplina, []).append(nota)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to read database {self.path}: {e}")
+            raise DataLoadError(f"Failed to read database {self.path}: {e}") from e
+        return Aluno(nome=nome, email=email, senha=senha, notas=notas)
+
+    def salvar(self, alunos: Iterable[Aluno]) -> None:
+        logger.info(f"Saving students to {self.path}")
+        try:
+            with self._conexao:
+                self._conexao.execute("DELETE FROM notas")
+                self._conexao.execute("DELETE FROM alunos")
+                for aluno in alunos:
+                    self._inserir_aluno(aluno)
+        except sqlite3.Error as e:
+            self._disciplina_ids.clear()
+            logger.error(f"Failed to write database {self.path}: {e}")
+            raise DataSaveError(f"Failed to write database {self.path}: {e}") from e
+
+    def registrar_aluno(self, aluno: Aluno, alunos: Iterable[Aluno]) -> None:
+        try:
+            with self._conexao:
+                self._inserir_aluno(aluno)
+        except sqlite3.Error as e:
+            self._disciplina_ids.clear()
+            logger.error(f"Failed to insert student {aluno.email}: {e}")
+            raise DataSaveError(f"Failed to insert student {aluno.email}: {e}") from e
+
+    def registrar_nota(
+        self, aluno: Aluno, disciplina: str, nota: float, alunos: Iterable[Aluno]
+    ) -> None:
+        try:
+            with self._conexao:
+                cursor = self._conexao.execute(
+                    "INSERT INTO notas (aluno_id, disciplina_id, nota)"
+                    " SELECT id, ?, ? FROM alunos WHERE email = ?",
+                    (self._disciplina_id(disciplina), nota, aluno.email),
+                )
+        except sqlite3.Error as e:
+            self._disciplina_ids.clear()
+            logger.error(f"Failed to insert grade for {aluno.email}: {e}")
+            raise DataSaveError(f"Failed to insert grade for {aluno.email}: {e}") from e
+        if cursor.rowcount == 0:
+            raise DataSaveError(f"Student {aluno.email} is not in {self.path}")
+
+    def aplicar(self, alteracoes: Sequence[Alteracao], alunos: Iterable[Aluno]) -> None:
+        try:
+            with self._conexao:
+                for alteracao in alteracoes:
+                    aluno = alteracao.aluno
+                    if alteracao.disciplina is None:
+                        self._inserir_aluno(aluno)
+                        continue
+                    cursor = self._conexao.execute(
+                        "INSERT INTO notas (aluno_id, disciplina_id, nota)"
+                        " SELECT id, ?, ? FROM alunos WHERE email = ?",
+                        (
+                            self._disciplina_id(alteracao.disciplina),
+                            alteracao.nota,
+                            aluno.email,
+                        ),
+                    )
+                    if cursor.rowcount == 0:
+                        raise DataSaveError(
+                            f"Student {aluno.email} is not in {self.path}"
+                        )
+        except sqlite3.Error as e:
+            self._disciplina_ids.clear()
+            logger.error(f"Failed to apply batch to {self.path}: {e}")
+            raise DataSaveError(f"Failed to apply batch to {self.path}: {e}") from e
+        except DataSaveError:
+            self._disciplina_ids.clear()
+            raise
+
+    def fechar(self) -> None:
+        self._conexao.close()
+
+
+class ShardedStorage(Storage):
+    """
+    Storage backed by a sharded directory.
+
+    Students are spread over N shard files by :func:`shard_de`, and each
+    shard is a JSON data file managed by its own :class:`JsonStorage` (with
+    its own lock, generation and merge of concurrent changes). A change
+    rewrites only the shard that holds the student, so the I/O of a write
+    stays constant as the roster grows. Loads read the shards concurrently.
+    """
+
+    def __init__(
+        self,
+        caminho: Optional[str] = None,
+        shards: Optional[int] = None,
+        durabilidade: Optional[str] = None,
+    ) -> None:
+        """
+        Args:
+            caminho: Optional path to the directory. If not provided, uses
+                PIM_DATA_PATH or DEFAULT_SHARD_PATH.
+            shards: Number of shards of a new directory (default:
+                get_shard_count()). Use :func:`repartir` to change the count
+                of an existing one.
+            durabilidade: Durability level of every write. If not provided,
+                uses PIM_DURABILITY.
+
+        Raises:
+            DataLoadError: If the manifest of an existing directory is invalid.
+            DataSaveError: If a new directory cannot be created.
+        """
+        self.path = get_store_path(caminho)
+        if is_sharded(self.path):
+            self.shards = _ler_manifesto(self.path)
+            if shards and shards != self.shards:
+                logger.warning(
+                    f"{self.path} has {self.shards} shards, ignoring {shards}; "
+                    "use repartir() to change it"
+                )
+        else:
+            self.shards = shards or get_shard_count()
+            _escrever_manifesto(self.path, self.shards)
+        self._armazens = [
+            JsonStorage(str(arquivo), durabilidade=durabilidade)
+            for arquivo in _arquivos_shards(self.path, self.shards)
+        ]
+        # Students of each shard, in roster order; None until first needed
+        self._particoes: Optional[List[List[Aluno]]] = None
+        # Normalized email -> position in its shard, built per shard on demand
+        self._posicoes: Dict[int, Dict[str, int]] = {}
+
+    def _repartir(self, particoes: List[List[Aluno]]) -> None:
+        """Adopt new shard partitions, dropping the stale email positions."""
+        self._particoes = particoes
+        self._posicoes.clear()
+
+    def _particao(self, alunos: Iterable[Aluno], indice: int) -> List[Aluno]:
+        """Get the students of a shard, splitting the roster on first use."""
+        particoes = self._particoes
+        if particoes is None:
+            particoes = _particionar(alunos, self.shards)
+            self._repartir(particoes)
+        return particoes[indice]
+
+    def _posicoes_de(self, particao: List[Aluno], indice: int) -> Dict[str, int]:
+        """Get the position of each student of a shard, by normalized email."""
+        posicoes = self._posicoes.get(indice)
+        if posicoes is None:
+            posicoes = self._posicoes[indice] = {}
+            for posicao, aluno in enumerate(particao):
+                posicoes.setdefault(normalizar_email(aluno.email), posicao)
+        return posicoes
+
+    def carregar(self) -> List[Aluno]:
+        self._repartir(_carregar_shards(JsonStorage.carregar, self._armazens))
+        return [aluno for parte in self._particoes or [] for aluno in parte]
+
+    def salvar(self, alunos: Iterable[Aluno]) -> None:
+        self._repartir(_particionar(alunos, self.shards))
+        for armazem, particao in zip(self._armazens, self._particoes or []):
+            armazem.salvar(particao)
+
+    def registrar_aluno(self, aluno: Aluno, alunos: Iterable[Aluno]) -> None:
+        self.aplicar([Alteracao(aluno)], alunos)
+
+    def registrar_nota(
+        self, aluno: Aluno, disciplina: str, nota: float, alunos: Iterable[Aluno]
+    ) -> None:
+        self.aplicar([Alteracao(aluno, disciplina, nota)], alunos)
+
+    def aplicar(self, alteracoes: Sequence[Alteracao], alunos: Iterable[Aluno]) -> None:
+        por_shard: Dict[int, List[Alteracao]] = {}
+        roster: Optional[Dict[str, Aluno]] = None
+        for alteracao in alteracoes:
+            aluno = alteracao.aluno
+            chave = normalizar_email(aluno.email)
+            if alteracao.disciplina is None:
+                # A queued registration may carry a copy (WriteBehindStorage):
+                # the shard must hold the roster's own object, which later
+                # grades go to
+                if isinstance(alunos, StudentRegistry):
+                    aluno = alunos.get(chave) or aluno
+                else:
+                    if roster is None:
+                        roster = {normalizar_email(a.email): a for a in alunos}
+                    aluno = roster.get(chave, aluno)
+            indice = shard_de(aluno.email, self.shards)
+            particao = self._particao(alunos, indice)
+            posicoes = self._posicoes_de(particao, indice)
+            posicao = posicoes.get(chave)
+            if posicao is None:
+                if alteracao.disciplina is None:
+                    posicoes[chave] = len(particao)
+                    particao.append(aluno)
+            elif particao[posicao] is not aluno:
+                particao[posicao] = aluno
+            por_shard.setdefault(indice, []).append(alteracao)
+
+        adicionar = getattr(alunos, "add", None) or getattr(alunos, "append")
+        for indice, lote in por_shard.items():
+            particao = self._particao(alunos, indice)
+            tamanho = len(particao)
+            self._armazens[indice].aplicar(lote, particao)
+            # Students registered by other processes, merged into the shard
+            posicoes = self._posicoes_de(particao, indice)
+            for posicao in range(tamanho, len(particao)):
+                aluno = particao[posicao]
+                posicoes.setdefault(normalizar_email(aluno.email), posicao)
+                adicionar(aluno)
+
+    def fechar(self) -> None:
+        sincronizar_pendentes()
+
+
+class WriteBehindStorage(Storage):
+    """
+    Storage that queues changes and saves them from a background thread.
+
+    Registrations and grades return as soon as they are queued. The flusher
+    waits up to ``latencia`` seconds after the first queued change (or until
+    ``max_lote`` changes are waiting) and hands the whole batch to
+    :meth:`Storage.aplicar` of the wrapped backend, so a burst of changes
+    costs a single file rewrite, journal write or transaction. A batch that
+    fails is put back at the head of the queue and retried on the next
+    window. :meth:`fechar` drains the queue before closing the backend.
+
+    Example:
+        >>> with WriteBehindStorage(JsonStorage()) as storage:
+        ...     storage.registrar_aluno(aluno, alunos)
+    """
+
+    def __init__(
+        self, destino: Storage, latencia: float = 0.05, max_lote: int = 1000
+    ) -> None:
+        """
+        Args:
+            destino: Backend that receives the batches.
+            latencia: Maximum seconds a change waits before being saved.
+            max_lote: Number of queued changes that triggers a save at once.
+        """
+        self.destino = destino
+        self.indexado = destino.indexado
+        self.latencia = latencia
+        self.max_lote = max_lote
+        self._pendentes: List[Alteracao] = []
+        self._alunos: Iterable[Aluno] = ()
+        self._inicio_janela = 0.0
+        self._em_gravacao = 0
+        self._urgente = False
+        self._parar = False
+        self._erro: Optional[DataSaveError] = None
+        self._condicao = threading.Condition()
+        # Serializes calls to the backend between the flusher and the caller
+        self._escrita = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._executar, name="pim-write-behind", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def pendentes(self) -> int:
+        """Number of changes not yet saved."""
+        with self._condicao:
+            return len(self._pendentes) + self._em_gravacao
+
+    def _enfileirar(self, alteracao: Alteracao, alunos: Iterable[Aluno]) -> None:
+        """Queue a change, opening a new group-commit window if idle."""
+        with self._condicao:
+            if self._parar:
+                raise DataSaveError("Write-behind storage is closed")
+            if not self._pendentes:
+                self._inicio_janela = time.monotonic()
+            self._pendentes.append(alteracao)
+            self._alunos = alunos
+            self._condicao.notify_all()
+
+    def _proximo_lote(self) -> Optional[Tuple[List[Alteracao], Iterable[Aluno]]]:
+        """Wait for the group-commit window and take the next batch."""
+        with self._condicao:
+            while not self._pendentes and not self._parar:
+                self._condicao.wait()
+            if not self._pendentes:
+                return None
+            while (
+                len(self._pendentes) < self.max_lote
+                and not self._urgente
+                and not self._parar
+            ):
+                restante = self._inicio_janela + self.latencia - time.monotonic()
+                if restante <= 0:
+                    break
+                self._condicao.wait(restante)
+            lote = self._pendentes[: self.max_lote]
+            del self._pendentes[: self.max_lote]
+            self._em_gravacao = len(lote)
+            return lote, self._alunos
+
+    def _executar(self) -> None:
+        """Flusher thread: save batches until stopped and drained."""
+        while True:
+            proximo = self._proximo_lote()
+            if proximo is None:
+                return
+            lote, alunos = proximo
+            try:
+                with self._escrita:
+                    self.destino.aplicar(lote, alunos)
+            except DataSaveError as e:
+                logger.error(f"Write-behind save of {len(lote)} changes failed: {e}")
+                with self._condicao:
+                    self._pendentes[:0] = lote
+                    self._em_gravacao = 0
+                    # Retry on the next window, not in a tight loop
+                    self._inicio_janela = time.monotonic()
+                    self._urgente = False
+                    self._erro = e
+                    self._condicao.notify_all()
+                    if self._parar:
+                        # fechar() retries synchronously and reports the error
+                        return
+                continue
+            with self._condicao:
+                self._em_gravacao = 0
+                self._erro = None
+                if self._pendentes:
+                    self._inicio_janela = time.monotonic()
+                else:
+                    self._urgente = False
+                self._condicao.notify_all()
+
+    def flush(self) -> None:
+        """
+        Save every queued change now and wait until it is on disk.
+
+        Raises:
+            DataSaveError: If the backend rejects the pending batch.
+        """
+        with self._condicao:
+            self._erro = None
+            self._urgente = True
+            self._condicao.notify_all()
+            while (self._pendentes or self._em_gravacao) and self._thread.is_alive():
+                if self._erro is not None:
+                    raise self._erro
+                self._condicao.wait()
+            self._urgente = False
+        self._aplicar_restantes()
+
+    def _aplicar_restantes(self) -> None:
+        """Save, in the caller's thread, whatever the flusher left behind."""
+        with self._condicao:
+            lote, self._pendentes = self._pendentes, []
+            alunos = self._alunos
+        if not lote:
+            return
+        try:
+            with self._escrita:
+                self.destino.aplicar(lote, alunos)
+        except DataSaveError:
+            with self._condicao:
+                self._pendentes[:0] = lote
+            raise
+
+    def carregar(self) -> List[Aluno]:
+        self.flush()
+        with self._escrita:
+            return self.destino.carregar()
+
+    def buscar(self, email: str) -> Optional[Aluno]:
+        self.flush()
+        with self._escrita:
+            return self.destino.buscar(email)
+
+    def salvar(self, alunos: Iterable[Aluno]) -> None:
+        self.flush()
+        with self._escrita:
+            self.destino.salvar(alunos)
+
+    def registrar_aluno(self, aluno: Aluno, alunos: Iterable[Aluno]) -> None:
+        # Queue a copy: grades added before the flush are queued on their own
+        self._enfileirar(Alteracao(Aluno.from_dict(aluno.to_dict())), alunos)
+
+    def registrar_nota(
+        self, aluno: Aluno, disciplina: str, nota: float, alunos: Iterable[Aluno]
+    ) -> None:
+        self._enfileirar(Alteracao(aluno, disciplina, nota), alunos)
+
+    def aplicar(self, alteracoes: Sequence[Alteracao], alunos: Iterable[Aluno]) -> None:
+        for alteracao in alteracoes:
+            self._enfileirar(alteracao, alunos)
+
+    def fechar(self) -> None:
+        """
+        Stop the flusher, save every pending change and close the backend.
+
+        Raises:
+            DataSaveError: If the pending changes cannot be saved.
+        """
+        with self._condicao:
+            self._parar = True
+            self._condicao.notify_all()
+        self._thread.join()
+        try:
+            self._aplicar_restantes()
+        finally:
+            self.destino.fechar()
+
+
+class StudentCache(Storage):
+    """
+    Working set of recently used students, loaded on demand by email.
+
+    Acts as the roster (``get``, ``autenticar``, ``add``, ``in``) and as the
+    storage the CLI writes to. Students are read one at a time from an
+    indexed backend (``Storage.indexado``) and kept in an LRU of at most
+    ``capacidade`` entries, so memory follows the number of active students
+    instead of the enrollment. Changes are kept with the student that owns
+    them and written back in one batch when the student is evicted, on
+    :meth:`flush` and on :meth:`fechar`; clean students are simply dropped.
+
+    Example:
+        >>> with StudentCache(SqliteStorage(), capacidade=100) as alunos:
+        ...     aluno = alunos.autenticar("ana@example.com", "senha")
+    """
+
+    def __init__(self, destino: Storage, capacidade: int = 1000) -> None:
+        """
+        Args:
+            destino: Indexed backend that holds every student.
+            capacidade: Maximum number of resident students.
+
+        Raises:
+            ValueError: If the backend cannot look students up by email, or
+                the capacity is not positive.
+        """
+        if not destino.indexado:
+            raise ValueError(f"{type(destino).__name__} cannot look up by email")
+        if capacidade < 1:
+            raise ValueError(f"Invalid capacity {capacidade}")
+        self.destino = destino
+        self.capacidade = capacidade
+        self._residentes: "OrderedDict[str, Aluno]" = OrderedDict()
+        # Changes not yet written back, by normalized email of their student
+        self._pendentes: Dict[str, List[Alteracao]] = {}
+
+    @property
+    def residentes(self) -> int:
+        """Number of students currently in memory."""
+        return len(self._residentes)
+
+    def _admitir(self, chave: str, aluno: Aluno) -> None:
+        """Make a student the most recently used, evicting the least recent."""
+        self._residentes[chave] = aluno
+        self._residentes.move_to_end(chave)
+        while len(self._residentes) > self.capacidade:
+            antiga, _ = self._residentes.popitem(last=False)
+            pendentes = self._pendentes.pop(antiga, None)
+            if pendentes:
+                try:
+                    self.destino.aplicar(pendentes, ())
+                except DataSaveError:
+                    # Keep the changes; they are retried on the next write-back
+                    self._pendentes[antiga] = pendentes
+                    raise
+
+    def get(self, email: str) -> Optional[Aluno]:
+        """
+        Find a student by email, loading it from the backend if not resident.
+
+        Args:
+            email: Email to look up (case and surrounding spaces are ignored).
+
+        Returns:
+            The student, or None if not registered.
+        """
+        chave = normalizar_email(email)
+        aluno = self._residentes.get(chave)
+        if aluno is not None:
+            self._residentes.move_to_end(chave)
+            return aluno
+        aluno = self.destino.buscar(chave)
+        if aluno is not None:
+            self._admitir(chave, aluno)
+        return aluno
+
+    def autenticar(self, email: str, senha: str) -> Optional[Aluno]:
+        """
+        Find the student matching an email and password.
+
+        Args:
+            email: Email to look up.
+            senha: Password to check.
+
+        Returns:
+            The student, or None if the credentials do not match.
+        """
+        aluno = self.get(email)
+        if aluno is None or aluno.senha != senha:
+            return None
+        return aluno
+
+    def add(self, aluno: Aluno) -> None:
+        """
+        Register a student; it is written back with its other changes.
+
+        Args:
+            aluno: The student to add.
+
+        Raises:
+            ValueError: If a student with the same email is already registered.
+        """
+        if aluno.email in self:
+            raise ValueError(f"Email already registered: {aluno.email}")
+        self._registrar(Alteracao(aluno))
+
+    def __contains__(self, email: object) -> bool:
+        return isinstance(email, str) and self.get(email) is not None
+
+    def __iter__(self) -> Iterator[Aluno]:
+        """
+        Stream every student from the backend, after writing back the changes.
+
+        Resident students are yielded as the objects the cache holds; the
+        others are read without being admitted, so a full pass does not
+        evict the working set.
+
+        Raises:
+            DataLoadError: If the data cannot be loaded.
+            DataSaveError: If the pending changes cannot be saved.
+        """
+        self.flush()
+        for aluno in self.destino.iterar():
+            yield self._residentes.get(normalizar_email(aluno.email), aluno)
+
+    def _registrar(self, alteracao: Alteracao) -> None:
+        """Keep a change with its (now most recently used) student."""
+        aluno = alteracao.aluno
+        if alteracao.disciplina is None:
+            # Keep a copy: later grades are kept as changes of their own
+            alteracao = Alteracao(Aluno.from_dict(aluno.to_dict()))
+        chave = normalizar_email(aluno.email)
+        self._pendentes.setdefault(chave, []).append(alteracao)
+        self._admitir(chave, aluno)
+
+    def carregar(self) -> List[Aluno]:
+        self.flush()
+        return self.destino.carregar()
+
+    def salvar(self, alunos: Iterable[Aluno]) -> None:
+        self._pendentes.clear()
+        self._residentes.clear()
+        self.destino.salvar(alunos)
+
+    def registrar_aluno(self, aluno: Aluno, alunos: Iterable[Aluno]) -> None:
+        pendentes = self._pendentes.get(normalizar_email(aluno.email), ())
+        if any(alteracao.disciplina is None for alteracao in pendentes):
+            return  # already recorded by add()
+        self._registrar(Alteracao(aluno))
+
+    def registrar_nota(
+        self, aluno: Aluno, disciplina: str, nota: float, alunos: Iterable[Aluno]
+    ) -> None:
+        self._registrar(Alteracao(aluno, disciplina, nota))
+
+    def aplicar(self, alteracoes: Sequence[Alteracao], alunos: Iterable[Aluno]) -> None:
+        for alteracao in alteracoes:
+            self._registrar(alteracao)
+
+    def flush(self) -> None:
+        """
+        Write back the changes of every resident student.
+
+        Raises:
+            DataSaveError: If the changes cannot be saved.
+        """
+        pendentes = [a for lote in self._pendentes.values() for a in lote]
+        if pendentes:
+            self.destino.aplicar(pendentes, ())
+        self._pendentes.clear()
+
+    def fechar(self) -> None:
+        """
+        Write back pending changes and close the backend.
+
+        Raises:
+            DataSaveError: If the pending changes cannot be saved.
+        """
+        try:
+            self.flush()
+        finally:
+            self.destino.fechar()
+
+
+def abrir_storage(caminho: Optional[str] = None) -> Storage:
+    """
+    Open the storage backend selected by the configuration.
+
+    Args:
+        caminho: Optional data path (may use the ``sqlite://`` scheme). If not
+            provided, uses PIM_DATA_PATH and PIM_STORAGE.
+
+    Returns:
+        The Storage for the configured mode, wrapped in a WriteBehindStorage
+        when PIM_WRITE_BEHIND is set.
+    """
+    mode = get_storage_mode(caminho)
+    storage: Storage
+    if mode == "sqlite":
+        storage = SqliteStorage(caminho)
+    elif mode == "sharded":
+        storage = ShardedStorage(caminho)
+    else:
+        storage = JsonStorage(caminho, journal=mode == "journal")
+
+    latencia = get_write_behind_latency()
+    if latencia is not None:
+        storage = WriteBehindStorage(storage, latencia=latencia)
+    return storage
+
+
+@dataclass
+class RelatorioImportacao:
+    """Result of importing a roster CSV."""
+
+    importados: int = 0
+    duplicados: int = 0
+    invalidos: List[Tuple[int, str]] = field(default_factory=list)
+
+
+def _colunas_csv(cabecalho: Sequence[str]) -> Tuple[int, ...]:
+    """Find the position of each of CSV_COLUMNS in a CSV header."""
+    nomes = [coluna.strip().lower() for coluna in cabecalho]
+    faltando = [coluna for coluna in CSV_COLUMNS if coluna not in nomes]
+    if faltando:
+        raise DataLoadError(f"CSV header lacks columns: {', '.join(faltando)}")
+    return tuple(nomes.index(coluna) for coluna in CSV_COLUMNS)
+
+
+def _validar_lote(
+    linhas: Sequence[Tuple[int, List[str]]],
+    colunas: Tuple[int, ...],
+    vistos: Set[str],
+    relatorio: RelatorioImportacao,
+) -> List[Aluno]:
+    """Turn a batch of CSV rows into new students, reporting the rejected rows."""
+    inome, iemail, isenha = colunas
+    largura = max(colunas) + 1
+    novos = []
+    for numero, linha in linhas:
+        if len(linha) < largura:
+            relatorio.invalidos.append((numero, "colunas faltando"))
+            continue
+        nome = linha[inome].strip()
+        email = linha[iemail].strip()
+        senha = linha[isenha].strip()
+        if not (nome and email and senha):
+            relatorio.invalidos.append((numero, "campo vazio"))
+            continue
+        chave = normalizar_email(email)
+        if chave in vistos:
+            relatorio.duplicados += 1
+        else:
+            vistos.add(chave)  # later rows with the same email are duplicates
+            novos.append(Aluno(nome=nome, email=email, senha=senha))
+    return novos
+
+
+def importar_csv(
+    arquivo: str,
+    storage: Storage,
+    alunos: Optional[StudentRegistry] = None,
+    lote: int = IMPORT_BATCH_SIZE,
+) -> RelatorioImportacao:
+    """
+    Register every new student of a roster CSV, committed in a single save.
+
+    The CSV is streamed in batches of rows. Rows are validated like the
+    interactive registration (name, email and password must not be empty)
+    and their emails looked up in a hash set of the roster emails, so
+    students already registered, or repeated in the file, are counted as
+    duplicates instead of failing the import. The new students are then
+    persisted with one ``Storage.aplicar`` call: one rewrite, one journal
+    append or one transaction, whatever the size of the intake.
+
+    Args:
+        arquivo: Path of the CSV file (UTF-8, with a header naming at least
+            the CSV_COLUMNS, in any order).
+        storage: Storage backend receiving the new students.
+        alunos: Current roster, updated in place (default: loaded from
+            ``storage``).
+        lote: Number of rows validated at a time.
+
+    Returns:
+        The import report; rejected rows are listed with their line number.
+
+    Raises:
+        DataLoadError: If the CSV or the roster cannot be read.
+        DataSaveError: If the new students cannot be saved.
+    """
+    if alunos is None:
+        alunos = StudentRegistry(storage.carregar())
+    relatorio = RelatorioImportacao()
+    vistos = {normalizar_email(aluno.email) for aluno in alunos}
+    novos: List[Aluno] = []
+    logger.info(f"Importing students from {arquivo}")
+    try:
+        with open(arquivo, encoding="utf-8-sig", newline="") as entrada:
+            leitor = csv.reader(entrada)
+            cabecalho = next(leitor, None)
+            if cabecalho is None:
+                raise DataLoadError(f"CSV file {arquivo} is empty")
+            colunas = _colunas_csv(cabecalho)
+            linhas = ((leitor.line_num, linha) for linha in leitor if linha)
+            while True:
+                parte = list(islice(linhas, lote))
+                if not parte:
+                    break
+                novos.extend(_validar_lote(parte, colunas, vistos, relatorio))
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        logger.error(f"Failed to read CSV file {arquivo}: {e}")
+        raise DataLoadError(f"Failed to read CSV file {arquivo}: {e}") from e
+
+    for aluno in novos:
+        alunos.add(aluno)
+    storage.aplicar([Alteracao(aluno) for aluno in novos], alunos)
+    relatorio.importados = len(novos)
+    logger.info(
+        f"Imported {relatorio.importados} students from {arquivo} "
+        f"({relatorio.duplicados} duplicates, {len(relatorio.invalidos)} invalid)"
+    )
+    return relatorio
+
+
+# Rows formatted per write by the exporter
+_LINHAS_POR_ESCRITA = 10_000
+
+
+def _linhas_exportacao(
+    alunos: Iterable[Aluno], por_nota: bool, filtro: Optional[Set[str]]
+) -> Iterator[Tuple[Any, ...]]:
+    """Rows of an export with every EXPORT_COLUMNS field, in file order."""
+    for aluno in alunos:
+        if not por_nota:
+            if filtro is None or any(
+                notas and disciplina in filtro
+                for disciplina, notas in aluno._itens_notas()
+            ):
+                yield aluno.nome, aluno.email, None, None, None
+            continue
+        for disciplina, notas in aluno._itens_notas():
+            if filtro is not None and disciplina not in filtro:
+                continue
+            for tentativa, nota in enumerate(notas, 1):
+                yield aluno.nome, aluno.email, disciplina, tentativa, nota
+
+
+def exportar_dados(
+    destino: str,
+    caminho: Optional[str] = None,
+    colunas: Optional[Sequence[str]] = None,
+    apenas: Optional[Iterable[str]] = None,
+    formato: Optional[str] = None,
+) -> int:
+    """
+    Export students and grades to CSV or JSON Lines, streaming the roster.
+
+    Students are read one at a time with iterar_alunos and rows are written
+    in batches through a buffer, so memory stays bounded whatever the size
+    of the roster. With any of the grade columns (``disciplina``,
+    ``tentativa``, ``nota``) there is one row per grade, otherwise one row
+    per student (with ``apenas``, per student graded in those disciplines).
+    Passwords are never exported. The export is written to a
+    temporary file that replaces ``destino`` once complete, so readers
+    never see a partial dump; ``.gz`` and ``.xz`` suffixes compress it.
+
+    Args:
+        destino: Path of the export file.
+        caminho: Optional data path. If not provided, uses PIM_DATA_PATH.
+        colunas: Columns to export, in order (default: EXPORT_COLUMNS).
+        apenas: Only export grades of these disciplines (default: all).
+        formato: One of EXPORT_FORMATS (default: ``jsonl`` for ``.jsonl``
+            files, ``csv`` otherwise).
+
+    Returns:
+        Number of rows written (not counting the CSV header).
+
+    Raises:
+        ValueError: If a column or the format is unknown.
+        DataLoadError: If the data does not exist or cannot be read.
+        DataSaveError: If the export cannot be written.
+    """
+    path = Path(destino)
+    if formato is None:
+        formato = "jsonl" if is_jsonl(path) else "csv"
+    if formato not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {formato!r}")
+    colunas = tuple(colunas or EXPORT_COLUMNS)
+    desconhecidas = [coluna for coluna in colunas if coluna not in EXPORT_COLUMNS]
+    if desconhecidas:
+        raise ValueError(f"Unknown export columns: {', '.join(desconhecidas)}")
+
+    # An empty export of a misplaced store would look like a successful one
+    origem = get_store_path(caminho)
+    journal = origem.with_name(origem.name + JOURNAL_SUFFIX)
+    if not origem.exists() and not journal.exists():
+        raise DataLoadError(f"Data store {origem} does not exist")
+
+    indices = [EXPORT_COLUMNS.index(coluna) for coluna in colunas]
+    # A one-column slice keeps single-column rows as tuples
+    selecionar = itemgetter(
+        *indices if len(indices) > 1 else [slice(indices[0], indices[0] + 1)]
+    )
+    por_nota = not set(colunas) <= {"nome", "email"}
+    filtro = set(apenas) if apenas is not None else None
+    linhas = map(
+        selecionar, _linhas_exportacao(iterar_alunos(caminho), por_nota, filtro)
+    )
+
+    logger.info(f"Exporting students to {path}")
+    quantidade = 0
+    temporario = path.with_name(path.name + ".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _abrir_escrita(temporario, path, DurabilityPolicy.from_env()) as arquivo:
+            buffer = io.StringIO()
+            escritor = csv.writer(buffer, lineterminator="\n")
+            encode = _ENCODER_COMPACTO.encode
+            if formato == "csv":
+                escritor.writerow(colunas)
+            while True:
+                lote = list(islice(linhas, _LINHAS_POR_ESCRITA))
+                if not lote:
+                    break
+                if formato == "csv":
+                    escritor.writerows(lote)
+                else:
+                    for linha in lote:
+                        buffer.write(encode(dict(zip(colunas, linha))))
+                        buffer.write("\n")
+                quantidade += len(lote)
+                arquivo.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+            arquivo.write(buffer.getvalue())
+        os.replace(temporario, path)
+    except OSError as e:
+        logger.error(f"Failed to write export {path}: {e}")
+        raise DataSaveError(f"Failed to write export {path}: {e}") from e
+    finally:
+        temporario.unlink(missing_ok=True)
+    logger.info(f"Exported {quantidade} rows to {path}")
+    return quantidade
@@ -8,13 +8,30 @@ from typing import Generator
 
 import pytest
 
+# Environment variables that configure the application
+PIM_ENV_VARS = (
+    "PIM_DATA_PATH",
+    "PIM_STORAGE",
+    "PIM_CACHE",
+    "PIM_LOAD_PROCESSES",
+    "PIM_SAVE_MODE",
+    "PIM_WRITE_BEHIND",
+    "PIM_DURABILITY",
+    "PIM_FSYNC_WRITES",
+    "PIM_FSYNC_MS",
+    "PIM_SHARDS",
+    "PIM_RESIDENT_STUDENTS",
+    "PIM_ON_CORRUPT",
+)
+
 
 @pytest.fixture(autouse=True)
 def clean_env() -> Generator[None, None, None]:
     """Clean environment variables before each test."""
-    old_env = os.environ.pop("PIM_DATA_PATH", None)
+    old_env = {name: os.environ.pop(name, None) for name in PIM_ENV_VARS}
     yield
-    if old_env:
-        os.environ["PIM_DATA_PATH"] = old_env
-    else:
-        os.environ.pop("PIM_DATA_PATH", None)
+    for name, value in old_env.items():
+        if value:
+            os.environ[name] = value
+        else:
+            os.environ.pop(name, None)
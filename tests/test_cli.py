@@ -5,17 +5,29 @@ Tests for the CLI module.
 import os
 import tempfile
 from io import StringIO
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
 
 from pim.cli import (
+    aplicar_avaliacao,
+    fazer_login,
     fazer_perguntas,
+    main,
     registrar_aluno,
     ver_notas,
 )
+from pim.core import codificar_nota
 from pim.data import disciplinas
-from pim.io import Aluno
+from pim.io import (
+    Aluno,
+    SqliteStorage,
+    StudentCache,
+    StudentRegistry,
+    carregar_dados,
+    get_journal_path,
+    salvar_dados,
+)
 
 
 class TestFazerPerguntas:
@@ -85,6 +97,23 @@ class TestRegistrarAluno:
         assert alunos[0].email == "test@example.com"
         assert alunos[0].senha == "password123"
 
+    def test_registrar_aluno_journal_mode(self) -> None:
+        """Test that registration is appended to the journal in journal mode."""
+        alunos: list[Aluno] = []
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = f"{tmpdir}/alunos.json"
+            os.environ["PIM_DATA_PATH"] = path
+            os.environ["PIM_STORAGE"] = "journal"
+
+            inputs = iter(["Test User", "test@example.com", "password123"])
+            with patch("builtins.input", side_effect=lambda _: next(inputs)):
+                registrar_aluno(alunos)
+
+            assert not os.path.exists(path)
+            assert get_journal_path(path).exists()
+            assert [a.email for a in carregar_dados(path)] == ["test@example.com"]
+
     def test_registrar_aluno_empty_name(self) -> None:
         """Test registration with empty name fails."""
         alunos: list[Aluno] = []
@@ -108,6 +137,99 @@ class TestRegistrarAluno:
         assert alunos[0].nome == "Existing"
 
 
+class TestFazerLogin:
+    """Tests for fazer_login function."""
+
+    def test_fazer_login_success(self) -> None:
+        """Test login with the right credentials, ignoring email case."""
+        aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+        registro = StudentRegistry([aluno])
+
+        inputs = iter(["Test@Example.com", "pass"])
+        with patch("builtins.input", side_effect=lambda _: next(inputs)):
+            assert fazer_login(registro) is aluno
+
+    def test_fazer_login_with_working_set(self) -> None:
+        """Test registering and logging in through an on-demand working set."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with StudentCache(SqliteStorage(f"{tmpdir}/alunos.db"), 1) as alunos:
+                inputs = iter(
+                    ["Ana", "ana@example.com", "p1", "Bia", "bia@example.com", "p2"]
+                )
+                with patch("builtins.input", side_effect=lambda _: next(inputs)):
+                    registrar_aluno(alunos, alunos)
+                    registrar_aluno(alunos, alunos)
+
+                inputs = iter(["ana@example.com", "p1"])
+                with patch("builtins.input", side_effect=lambda _: next(inputs)):
+                    aluno = fazer_login(alunos)
+
+                assert aluno is not None and aluno.nome == "Ana"
+                assert alunos.residentes == 1
+
+    def test_fazer_login_wrong_password(self) -> None:
+        """Test login with a wrong password fails."""
+        alunos = [Aluno(nome="Test", email="test@example.com", senha="pass")]
+
+        inputs = iter(["test@example.com", "wrong"])
+        with patch("builtins.input", side_effect=lambda _: next(inputs)):
+            assert fazer_login(alunos) is None
+
+
+class TestAplicarAvaliacao:
+    """Tests for aplicar_avaliacao function."""
+
+    def test_aplicar_avaliacao_records_grade(self) -> None:
+        """Test that the grade is stored in memory and in the backend."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with SqliteStorage(f"{tmpdir}/alunos.db") as storage:
+                aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+                alunos = [aluno]
+                storage.salvar(alunos)
+
+                indice = str(disciplinas.index("Matemática e Estatística") + 1)
+                inputs = iter([indice] + ["A"] * 10)
+                with patch("builtins.input", side_effect=lambda _: next(inputs)):
+                    aplicar_avaliacao(aluno, alunos, storage)
+
+                assert aluno.notas["Matemática e Estatística"] == [10.0]
+                loaded = storage.carregar()
+                assert loaded[0].notas["Matemática e Estatística"] == [10.0]
+
+    def test_aplicar_avaliacao_stores_quiz_result(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that the quiz result is encoded directly, not searched from a float."""
+
+        def buscar(nota: float) -> None:
+            raise AssertionError(f"searched the code of {nota}")
+
+        monkeypatch.setattr("pim.core._buscar_codigo", buscar)
+        aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+        disciplina = "Matemática e Estatística"
+        indice = str(disciplinas.index(disciplina) + 1)
+        inputs = iter([indice] + ["A"] * 7 + ["Z"] * 3)
+        storage = Mock()
+
+        with patch("builtins.input", side_effect=lambda _: next(inputs)):
+            aplicar_avaliacao(aluno, [aluno], storage)
+
+        notas = aluno.notas[disciplina]
+        assert notas == [7.0]
+        assert notas.codigos is not None
+        assert list(notas.codigos) == [codificar_nota(7, 10)]
+        storage.registrar_nota.assert_called_once_with(aluno, disciplina, 7.0, [aluno])
+
+    def test_aplicar_avaliacao_invalid_option(self) -> None:
+        """Test that an invalid choice records nothing."""
+        aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+
+        with patch("builtins.input", return_value="99"):
+            aplicar_avaliacao(aluno, [aluno])
+
+        assert all(not notas for notas in aluno.notas.values())
+
+
 class TestVerNotas:
     """Tests for ver_notas function."""
 
@@ -153,3 +275,133 @@ class TestVerNotas:
 
         captured = capsys.readouterr()
         assert "Moda: Não definida" in captured.out
+
+    def test_ver_notas_after_new_grade(
+        self, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Test that a grade appended after a view shows in the next one."""
+        aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+        aluno.notas["Matemática e Estatística"] = [7.0, 8.0, 9.0]
+        ver_notas(aluno)
+        aluno.notas["Matemática e Estatística"].append(9.0)
+
+        ver_notas(aluno)
+
+        captured = capsys.readouterr()
+        assert "Média: 8.25" in captured.out
+        assert "Mediana: 8.50" in captured.out
+        assert "Moda: 9.0" in captured.out
+
+
+class TestVerify:
+    """Tests for the verify command."""
+
+    def test_intact_data(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that intact data exits with status 0."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.jsonl")
+            salvar_dados([Aluno(nome="A", email="a@example.com", senha="p")], path)
+
+            assert main(["verify", path]) == 0
+
+        captured = capsys.readouterr()
+        assert "Registros íntegros: 1" in captured.out
+        assert "Registros corrompidos: 0" in captured.out
+        assert "MB/s" in captured.out
+
+    def test_corrupt_data(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that a corrupt record is listed and exits with status 1."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.jsonl")
+            salvar_dados([Aluno(nome="A", email="a@example.com", senha="p")], path)
+            with open(path, "a", encoding="utf-8") as arquivo:
+                arquivo.write('{"nome": "B"\n')
+
+            assert main(["verify", path]) == 1
+
+        captured = capsys.readouterr()
+        assert "Registros corrompidos: 1" in captured.out
+        assert "linha 2: registro incompleto" in captured.out
+
+    def test_missing_data(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that missing data exits with status 1."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.environ["PIM_DATA_PATH"] = os.path.join(tmpdir, "nada.json")
+
+            assert main(["verify"]) == 1
+
+        assert "Erro ao verificar dados" in capsys.readouterr().out
+
+
+class TestImport:
+    """Tests for the import command."""
+
+    def test_import_csv(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test importing a roster CSV into the data file."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            arquivo = os.path.join(tmpdir, "turma.csv")
+            with open(arquivo, "w", encoding="utf-8") as csv:
+                csv.write("nome,email,senha\nAna,a@example.com,p\nBia,,p\n")
+
+            assert main(["import", arquivo, "--dados", path]) == 0
+
+            assert [a.nome for a in carregar_dados(path)] == ["Ana"]
+
+        captured = capsys.readouterr()
+        assert "Alunos importados: 1" in captured.out
+        assert "Linhas inválidas: 1" in captured.out
+        assert "linha 3: campo vazio" in captured.out
+
+    def test_import_into_database(self) -> None:
+        """Test that a .db data path imports into SQLite, as documented."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.db")
+            arquivo = os.path.join(tmpdir, "turma.csv")
+            with open(arquivo, "w", encoding="utf-8") as csv:
+                csv.write("nome,email,senha\nAna,a@example.com,p\n")
+
+            assert main(["import", arquivo, "--dados", path]) == 0
+
+            with SqliteStorage(path) as storage:
+                assert [a.nome for a in storage.carregar()] == ["Ana"]
+
+    def test_import_missing_file(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that a missing CSV exits with status 1."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.environ["PIM_DATA_PATH"] = os.path.join(tmpdir, "alunos.json")
+
+            assert main(["import", os.path.join(tmpdir, "nada.csv")]) == 1
+
+        assert "Erro ao importar alunos" in capsys.readouterr().out
+
+
+class TestExport:
+    """Tests for the export command."""
+
+    def test_export(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test exporting selected columns of one discipline."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            destino = os.path.join(tmpdir, "notas.csv")
+            aluno = Aluno(nome="Ana", email="ana@example.com", senha="p")
+            aluno.notas["TIC"].append(6.0)
+            aluno.notas["LGPD"].append(9.0)
+            salvar_dados([aluno], path)
+
+            argv = ["export", destino, "--dados", path, "--colunas", "email,nota"]
+            assert main(argv + ["--disciplina", "LGPD"]) == 0
+
+            with open(destino, encoding="utf-8") as arquivo:
+                assert arquivo.read() == "email,nota\nana@example.com,9.0\n"
+
+        assert "Exportadas 1 linhas" in capsys.readouterr().out
+
+    def test_export_unknown_column(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that an unknown column exits with status 1."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            destino = os.path.join(tmpdir, "notas.csv")
+
+            assert main(["export", destino, "--colunas", "senha"]) == 1
+
+        assert "senha" in capsys.readouterr().out
@@ -2,9 +2,32 @@
 Tests for the core module (statistical calculations).
 """
 
+import pickle
+import random
+import statistics
+from bisect import bisect_left, bisect_right
+
 import pytest
 
-from pim.core import calcular_media, calcular_mediana, calcular_moda
+import pim.core
+from pim.core import (
+    Acumulador,
+    EsbocoQuantis,
+    ListaNotas,
+    achatar,
+    calcular_media,
+    calcular_mediana,
+    calcular_medianas,
+    calcular_medias,
+    calcular_moda,
+    calcular_modas,
+    calcular_k_esimo,
+    calcular_percentil,
+    codificar_nota,
+    codigo_de_nota,
+    decodificar_nota,
+    descrever,
+)
 
 
 class TestCalcularMedia:
@@ -97,3 +120,377 @@ class TestCalcularModa:
     def test_moda_with_floats(self) -> None:
         """Test mode calculation with float values."""
         assert calcular_moda([1.5, 1.5, 2.5, 3.5]) == 1.5
+
+    def test_moda_grade_codes(self) -> None:
+        """Test that grade codes are counted exactly, without rounding noise."""
+        notas = ListaNotas([7.0, (7 / 10) * 10, 6.999999999999999, 5.0])
+        assert notas.codigos is not None
+        assert calcular_moda(notas) == 7.0
+        assert calcular_moda(ListaNotas([7.0, 8.0, 9.0])) is None
+
+
+class TestListaNotas:
+    """Tests for integer-coded grades."""
+
+    def test_codificar_nota(self) -> None:
+        """Test that quiz results are packed as reduced fractions in two bytes."""
+        assert codificar_nota(7, 10) == 7 << 8 | 10
+        assert codificar_nota(5, 10) == codificar_nota(1, 2) == 1 << 8 | 2
+        assert decodificar_nota(codificar_nota(2, 3)) == 20 / 3
+        assert decodificar_nota(codificar_nota(3, 10)) == 3.0
+        for acertos, total in ((-1, 10), (11, 10), (0, 0), (1, 256)):
+            with pytest.raises(ValueError):
+                codificar_nota(acertos, total)
+
+    def test_codigo_de_nota(self) -> None:
+        """Test that grades from any quiz size map back to their result."""
+        assert codigo_de_nota(8.5) == codificar_nota(17, 20)
+        assert codigo_de_nota((3 / 10) * 10) == codificar_nota(3, 10)
+        assert codigo_de_nota(7.123) is None
+        assert codigo_de_nota(11.0) is None
+        assert codigo_de_nota(float("nan")) is None
+
+    def test_grades_without_code_memoised(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a grade without a code is searched once, up to a limit."""
+        buscas = []
+        buscar = pim.core._buscar_codigo
+        monkeypatch.setattr(pim.core, "_CODIGOS", pim.core._Codigos())
+        monkeypatch.setattr(pim.core, "_MAX_SEM_CODIGO", 1)
+        monkeypatch.setattr(
+            pim.core, "_buscar_codigo", lambda nota: buscas.append(nota) or buscar(nota)
+        )
+
+        for _ in range(3):
+            assert codigo_de_nota(7.123) is None
+            assert codigo_de_nota(8.5) == codificar_nota(17, 20)
+            assert codigo_de_nota(6.789) is None
+
+        assert buscas == [7.123, 8.5, 6.789, 6.789, 6.789]
+        notas = ListaNotas([7.123])
+        assert notas == [7.123]
+        assert notas.codigos is None
+        assert buscas.count(7.123) == 1
+
+    def test_behaves_like_a_list(self) -> None:
+        """Test list behaviour, repr and equality with plain lists."""
+        notas = ListaNotas([7.0, 8.0, 9.0])
+        assert notas == [7.0, 8.0, 9.0]
+        assert repr(notas) == "[7.0, 8.0, 9.0]"
+        notas.append(8.5)
+        notas.adicionar(1, 2)
+        notas.insert(0, 10.0)
+        assert notas == [10.0, 7.0, 8.0, 9.0, 8.5, 5.0]
+        assert notas[1:3] == [7.0, 8.0]
+        notas[1:1] = [6.0]
+        del notas[0]
+        assert notas == [6.0, 7.0, 8.0, 9.0, 8.5, 5.0]
+        assert notas.codigos is not None and notas.codigos.itemsize == 2
+
+    def test_float_fallback(self) -> None:
+        """Test that a grade without a code switches the list to floats."""
+        notas = ListaNotas([7.0])
+        notas.append(7.123)
+        assert notas.codigos is None
+        assert notas == [7.0, 7.123]
+        assert calcular_moda(notas) is None
+
+    def test_pickle(self) -> None:
+        """Test that coded and float lists survive pickling."""
+        for notas in (ListaNotas([7.0, 8.0]), ListaNotas([7.123])):
+            copia = pickle.loads(pickle.dumps(notas))
+            assert copia == notas
+            assert (copia.codigos is None) == (notas.codigos is None)
+
+
+class TestSelecao:
+    """Tests for order statistics found by selection."""
+
+    @pytest.fixture(params=["amostras", "mediana das medianas"])
+    def passos_pequenos(
+        self, request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Select over small inputs as over large ones, with either kind of step."""
+        monkeypatch.setattr(pim.core, "_LIMITE_ORDENAR", 8)
+        if request.param == "mediana das medianas":
+            monkeypatch.setattr(pim.core, "_MAX_PIVOS_RUINS", 0)
+
+    @pytest.mark.usefixtures("passos_pequenos")
+    def test_match_sorted(self) -> None:
+        """Test that every position and median match the sorted values."""
+        rng = random.Random(3)
+        for tamanho in (1, 2, 9, 10, 100, 501):
+            for valores in (
+                [rng.random() for _ in range(tamanho)],
+                [float(rng.randint(0, 10)) for _ in range(tamanho)],
+                ListaNotas(rng.randint(0, 3) * 10 / 3 for _ in range(tamanho)),
+                sorted(rng.random() for _ in range(tamanho)),
+                [5.0] * tamanho,
+            ):
+                ordenados = sorted(valores)
+                for k in range(tamanho):
+                    assert calcular_k_esimo(valores, k) == ordenados[k]
+                meio = tamanho // 2
+                if tamanho % 2:
+                    assert calcular_mediana(valores) == ordenados[meio]
+                else:
+                    assert (
+                        calcular_mediana(valores)
+                        == (ordenados[meio - 1] + ordenados[meio]) / 2
+                    )
+
+    def test_k_esimo_out_of_range(self) -> None:
+        """Test positions outside the list and an empty list."""
+        with pytest.raises(IndexError):
+            calcular_k_esimo([7.0, 8.0], 2)
+        with pytest.raises(IndexError):
+            calcular_k_esimo([7.0, 8.0], -1)
+        assert calcular_k_esimo([], 0) is None
+
+    @pytest.mark.usefixtures("passos_pequenos")
+    def test_percentil(self) -> None:
+        """Test percentiles interpolated between the closest positions."""
+        valores = [float(nota) for nota in range(10, -1, -1)]
+        assert calcular_percentil(valores, 0) == 0.0
+        assert calcular_percentil(valores, 100) == 10.0
+        assert calcular_percentil(valores, 50) == calcular_mediana(valores)
+        assert calcular_percentil(valores, 25) == 2.5
+        assert calcular_percentil(valores, 95) == 9.5
+        assert calcular_percentil([7.0], 90) == 7.0
+        assert calcular_percentil([7.0, 8.0], 50) == 7.5
+
+    def test_percentil_invalid(self) -> None:
+        """Test a percentile out of range and an empty list."""
+        with pytest.raises(ValueError):
+            calcular_percentil([7.0], 101)
+        assert calcular_percentil([], 50) is None
+
+
+def _coorte(quantidade: int = 2000) -> list:
+    """Grade series of many lengths: whole, coded and arbitrary grades."""
+    rng = random.Random(7)
+    series = []
+    for i in range(quantidade):
+        tamanho = 100 if i % 500 == 0 else rng.randint(0, 9)
+        if i % 3 == 0:
+            series.append([float(rng.randint(0, 10)) for _ in range(tamanho)])
+        elif i % 3 == 1:
+            notas = ListaNotas(rng.randint(0, 7) * 10 / 7 for _ in range(tamanho))
+            series.append(notas)
+        else:
+            series.append([rng.random() * 10 for _ in range(tamanho)])
+    series.append([1, 2, 2, 3])
+    series.append([7.0, 8.0, 8.0, 7.0, 9.0])
+    return series
+
+
+class TestEstatisticasEmLote:
+    """Tests for the batch statistics over ragged arrays."""
+
+    def test_achatar(self) -> None:
+        """Test packing series into values and offsets."""
+        valores, offsets = achatar([[7.0, 8.0], [], ListaNotas([5.0])])
+        assert list(valores) == [7.0, 8.0, 5.0]
+        assert list(offsets) == [0, 2, 2, 3]
+
+    @pytest.mark.parametrize("usar_numpy", [False, True])
+    def test_match_scalar_functions(self, usar_numpy: bool) -> None:
+        """Test that every series gets exactly the scalar results."""
+        if usar_numpy:
+            pytest.importorskip("numpy")
+        series = _coorte()
+        valores, offsets = achatar(series)
+
+        medias = calcular_medias(valores, offsets, usar_numpy)
+        medianas = calcular_medianas(valores, offsets, usar_numpy)
+        modas = calcular_modas(valores, offsets, usar_numpy)
+
+        assert medias == [calcular_media(s) if s else None for s in series]
+        assert medianas == [calcular_mediana(s) if s else None for s in series]
+        assert modas == [calcular_moda(s) if s else None for s in series]
+        assert modas[-1] == [7.0, 8.0]
+
+    @pytest.mark.parametrize("usar_numpy", [False, True])
+    def test_offsets_into_a_larger_buffer(self, usar_numpy: bool) -> None:
+        """Test offsets that do not start at zero and empty cohorts."""
+        if usar_numpy:
+            pytest.importorskip("numpy")
+        valores = memoryview(bytes(range(10))).cast("B")
+        assert calcular_medias(valores, [2, 5, 5, 6], usar_numpy) == [3.0, None, 5.0]
+        assert calcular_medianas(valores, [2, 6], usar_numpy) == [3.5]
+        assert calcular_modas(valores, [2, 6], usar_numpy) == [None]
+        assert calcular_medias(valores, [0], usar_numpy) == []
+        assert calcular_modas([], [0, 0], usar_numpy) == [None]
+
+    def test_numpy_required(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test falling back to pure Python when NumPy is missing."""
+        monkeypatch.setattr(pim.core, "np", None)
+
+        assert calcular_medias([7.0, 8.0], [0, 2]) == [7.5]
+        with pytest.raises(ImportError):
+            calcular_medias([7.0, 8.0], [0, 2], usar_numpy=True)
+
+
+class TestAcumulador:
+    """Tests for the running grade statistics."""
+
+    def test_match_scalar_functions(self) -> None:
+        """Test that the statistics are exactly those of the scalar functions."""
+        for serie in _coorte(500):
+            if not serie:
+                continue
+            resumo = Acumulador(serie)
+            assert resumo.quantidade == len(serie)
+            assert resumo.media == calcular_media(serie)
+            assert resumo.mediana == calcular_mediana(serie)
+            assert resumo.moda == calcular_moda(serie)
+
+    def test_empty(self) -> None:
+        """Test the statistics of no grades."""
+        resumo = Acumulador()
+        assert (resumo.media, resumo.mediana, resumo.moda) == (None, None, None)
+
+    def test_updated_on_append(self) -> None:
+        """Test that a list keeps its statistics up to date as grades are added."""
+        notas = ListaNotas([7.0, 8.0])
+        resumo = notas.resumo
+        notas.append(7.0)
+        notas.adicionar(9, 10)
+        notas.append(7.123)
+
+        assert notas.resumo is resumo
+        assert resumo.quantidade == 5
+        assert resumo.media == calcular_media(notas)
+        assert resumo.mediana == 7.123
+        assert resumo.moda == 7.0
+
+    def test_rebuilt_after_other_changes(self) -> None:
+        """Test that changes other than appending rebuild the statistics."""
+        notas = ListaNotas([7.0, 7.0, 8.0])
+        assert notas.resumo.moda == 7.0
+        notas[0] = 8.0
+        assert notas.resumo.moda == 8.0
+        del notas[0]
+        notas.insert(0, 9.0)
+        assert notas.resumo.mediana == 8.0
+        assert notas.resumo.moda is None
+
+
+class TestDescrever:
+    """Tests for the single-pass descriptive statistics."""
+
+    def test_match_separate_functions(self) -> None:
+        """Test every statistic against the function computing it alone."""
+        for serie in _coorte(500):
+            if not serie:
+                continue
+            descricao = descrever(serie)
+            assert descricao is not None
+            assert descricao.quantidade == len(serie)
+            assert descricao.media == calcular_media(serie)
+            assert descricao.mediana == calcular_mediana(serie)
+            assert descricao.moda == calcular_moda(serie)
+            assert descricao.q1 == calcular_percentil(serie, 25)
+            assert descricao.q3 == calcular_percentil(serie, 75)
+            assert (descricao.minimo, descricao.maximo) == (min(serie), max(serie))
+            assert descricao.variancia == pytest.approx(statistics.pvariance(serie))
+            assert descricao.desvio_padrao == pytest.approx(statistics.pstdev(serie))
+            assert sum(descricao.histograma) == len(serie)
+
+    def test_histogram(self) -> None:
+        """Test the width-1 bins, with 10 in the last one."""
+        descricao = descrever([0.0, 0.5, 1.0, 7.5, 9.99, 10.0])
+        assert descricao is not None
+        assert descricao.histograma == (2, 1, 0, 0, 0, 0, 0, 1, 0, 2)
+
+    def test_grade_list(self) -> None:
+        """Test that a grade list is described from its running statistics."""
+        notas = ListaNotas([7.0, 8.0, 9.0])
+        assert descrever(notas) == descrever([7.0, 8.0, 9.0])
+        notas.append(10.0)
+
+        descricao = descrever(notas)
+        assert descricao is not None
+        assert notas.resumo.quantidade == 4
+        assert (descricao.media, descricao.variancia) == (8.5, 1.25)
+        assert (descricao.q1, descricao.mediana, descricao.q3) == (7.75, 8.5, 9.25)
+
+    def test_empty(self) -> None:
+        """Test describing an empty list."""
+        assert descrever([]) is None
+
+
+def _posicoes(ordenados: list, valor: float) -> range:
+    """Positions of a value in sorted values."""
+    return range(bisect_left(ordenados, valor), bisect_right(ordenados, valor))
+
+
+class TestEsbocoQuantis:
+    """Tests for the mergeable quantile sketch."""
+
+    def _conferir(self, esboco: EsbocoQuantis, valores: list) -> None:
+        """Check percentiles against the exact ones, within the error bound."""
+        ordenados = sorted(valores)
+        tolerancia = esboco.erro * len(valores)
+        for percentil in (10, 50, 90):
+            posicao = (len(valores) - 1) * percentil / 100
+            posicoes = _posicoes(ordenados, esboco.percentil(percentil))
+            assert posicoes.start - tolerancia <= posicao < posicoes.stop + tolerancia
+        # Few grades lie strictly between the estimate and the exact median
+        baixo, alto = sorted((esboco.percentil(50), calcular_mediana(valores)))
+        if baixo != alto:
+            entre = bisect_left(ordenados, alto) - bisect_right(ordenados, baixo)
+            assert entre <= tolerancia
+
+    @pytest.mark.parametrize("erro", [0.05, 0.01])
+    def test_accuracy(self, erro: float) -> None:
+        """Test percentiles of many grades against the exact ones."""
+        rng = random.Random(5)
+        for valores in (
+            [rng.random() * 10 for _ in range(50_000)],
+            [float(rng.randint(0, 10)) for _ in range(50_000)],
+        ):
+            esboco = EsbocoQuantis(erro, semente=1)
+            esboco.adicionar_todas(valores)
+            assert esboco.quantidade == len(valores)
+            assert esboco.retidos < 10 / erro
+            self._conferir(esboco, valores)
+
+    def test_merge_shards(self) -> None:
+        """Test that merged per-shard sketches give global percentiles."""
+        rng = random.Random(6)
+        shards = [
+            [rng.gauss(5 + i % 3, 1.5) for _ in range(rng.randint(0, 20_000))]
+            for i in range(8)
+        ]
+        esboco = EsbocoQuantis(semente=0)
+        for i, valores in enumerate(shards):
+            parte = EsbocoQuantis(semente=i)
+            for valor in valores:
+                parte.adicionar(valor)
+            esboco.mesclar(pickle.loads(pickle.dumps(parte)))
+
+        todas = [valor for valores in shards for valor in valores]
+        assert esboco.quantidade == len(todas)
+        assert esboco.retidos < 1000
+        self._conferir(esboco, todas)
+
+    def test_exact_while_small(self) -> None:
+        """Test that a sketch holding every grade gives exact percentiles."""
+        valores = [7.0, 3.0, 9.0, 5.0, 10.0]
+        esboco = EsbocoQuantis()
+        esboco.adicionar_todas(valores)
+        for percentil in (0, 25, 50, 90, 100):
+            assert esboco.percentil(percentil) == calcular_percentil(valores, percentil)
+        assert esboco.percentil(50) == calcular_mediana(valores)
+
+    def test_invalid(self) -> None:
+        """Test invalid error bounds, merges and percentiles."""
+        with pytest.raises(ValueError):
+            EsbocoQuantis(0)
+        with pytest.raises(ValueError):
+            EsbocoQuantis(0.01).mesclar(EsbocoQuantis(0.02))
+        with pytest.raises(ValueError):
+            EsbocoQuantis().percentil(-1)
+        assert EsbocoQuantis().percentil(50) is None
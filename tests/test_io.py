@@ -2,21 +2,74 @@
 Tests for the IO module (data loading and saving).
 """
 
+import gzip
 import json
+import lzma
+import multiprocessing
 import os
+import pickle
+import sqlite3
 import tempfile
+import time
+import zlib
 from pathlib import Path
 
 import pytest
 
+import pim.io
+from pim.core import ListaNotas, calcular_media, calcular_mediana
 from pim.data import disciplinas
 from pim.io import (
     Aluno,
+    Alteracao,
+    ColunasNotas,
+    Compactador,
+    CompactionPolicy,
+    DEFAULT_SHARD_PATH,
     DataLoadError,
     DataSaveError,
+    DurabilityPolicy,
+    JsonStorage,
+    RegistroCorrompido,
+    ShardedStorage,
+    SqliteStorage,
+    StudentCache,
+    StudentRegistry,
+    WriteBehindStorage,
+    abrir_storage,
+    anexar_aluno,
+    anexar_nota,
     carregar_dados,
+    compactar_journal,
+    exportar_dados,
+    get_cache_path,
+    get_columns_path,
+    get_corrupt_policy,
+    get_load_processes,
     get_data_path,
+    get_generation,
+    get_resident_limit,
+    get_journal_path,
+    get_lock_path,
+    get_quarantine_path,
+    get_storage_mode,
+    get_store_path,
+    get_write_behind_latency,
+    importar_csv,
+    is_compressed,
+    is_fast_save_enabled,
+    is_jsonl,
+    is_sharded,
+    iterar_alunos,
+    journal_stats,
+    normalizar_email,
+    precisa_compactar,
+    repartir,
+    salvar_colunas,
     salvar_dados,
+    shard_de,
+    sincronizar_pendentes,
+    verificar_dados,
 )
 
 
@@ -69,6 +122,142 @@ class TestAluno:
         assert aluno.email == "test@example.com"
         assert aluno.notas["Matemática e Estatística"] == [7.0]
 
+    def test_aluno_is_slotted(self) -> None:
+        """Test that students have no per-instance __dict__."""
+        aluno = Aluno(nome="Test", email="test@example.com", senha="password")
+        assert not hasattr(aluno, "__dict__")
+        with pytest.raises(AttributeError):
+            aluno.idade = 20  # type: ignore[attr-defined]
+
+    def test_aluno_grades_allocated_lazily(self) -> None:
+        """Test that grade lists are only created when accessed."""
+        aluno = Aluno(nome="Test", email="test@example.com", senha="password")
+        assert aluno._notas is None
+
+        aluno.notas["TIC"].append(5.0)
+
+        assert aluno.notas["TIC"] == [5.0]
+        assert list(aluno.notas) == disciplinas
+        assert len(aluno.notas) == len(disciplinas)
+
+    def test_notas_view_mapping(self) -> None:
+        """Test the mapping behaviour of aluno.notas."""
+        aluno = Aluno(nome="Test", email="test@example.com", senha="password")
+
+        with pytest.raises(KeyError):
+            aluno.notas["Inexistente"]
+        aluno.notas["Extra"] = [6.0]
+        assert aluno.notas["Extra"] == [6.0]
+        assert list(aluno.notas)[-1] == "Extra"
+        del aluno.notas["Extra"]
+        assert "Extra" not in aluno.notas
+
+    def test_grades_stored_as_codes(self) -> None:
+        """Test that grade lists are converted to two-byte grade codes."""
+        aluno = Aluno(nome="Test", email="test@example.com", senha="password")
+        aluno.notas["TIC"] = [7.0, 8.5]
+        aluno.notas.setdefault("Extra", []).append(6.0)
+
+        assert isinstance(aluno.notas["TIC"], ListaNotas)
+        assert aluno.notas["TIC"].codigos is not None
+        assert aluno.notas["Extra"] == [6.0]
+        assert aluno.to_dict()["notas"]["TIC"] == [7.0, 8.5]
+
+    def test_aluno_extra_discipline_roundtrip(self) -> None:
+        """Test that disciplines outside pim.data survive to_dict/from_dict."""
+        data = {
+            "nome": "Test",
+            "email": "test@example.com",
+            "senha": "password",
+            "notas": {"Disciplina Antiga": [4.0]},
+        }
+        aluno = Aluno.from_dict(data)
+        assert aluno.to_dict()["notas"]["Disciplina Antiga"] == [4.0]
+        assert aluno.to_dict()["notas"]["TIC"] == []
+
+    def test_aluno_equality_and_pickle(self) -> None:
+        """Test equality and pickling of slotted students."""
+        aluno = Aluno(nome="Test", email="test@example.com", senha="password")
+        aluno.notas["TIC"].append(7.0)
+        outro = Aluno(nome="Test", email="test@example.com", senha="password")
+        assert aluno != outro
+
+        outro.notas["TIC"] = [7.0]
+        outro.notas["Ética"]  # allocated but empty
+        assert aluno == outro
+        assert pickle.loads(pickle.dumps(aluno)) == aluno
+
+
+class TestStudentRegistry:
+    """Tests for the StudentRegistry container."""
+
+    def test_normalizar_email(self) -> None:
+        """Test email normalization."""
+        assert normalizar_email("  Test@Example.COM ") == "test@example.com"
+
+    def test_registry_adopts_list(self) -> None:
+        """Test that the registry indexes and updates the given list in place."""
+        alunos = [Aluno(nome="Alice", email="alice@example.com", senha="p1")]
+        registro = StudentRegistry(alunos)
+        bob = Aluno(nome="Bob", email="bob@example.com", senha="p2")
+
+        registro.add(bob)
+
+        assert alunos[1] is bob
+        assert len(registro) == 2
+        assert list(registro) == alunos
+        assert registro[0].nome == "Alice"
+
+    def test_get_is_case_insensitive(self) -> None:
+        """Test lookups by normalized email."""
+        aluno = Aluno(nome="Alice", email="Alice@Example.com", senha="p1")
+        registro = StudentRegistry([aluno])
+
+        assert registro.get("alice@example.com ") is aluno
+        assert "ALICE@EXAMPLE.COM" in registro
+        assert registro.get("bob@example.com") is None
+
+    def test_add_duplicate_raises(self) -> None:
+        """Test that duplicate emails are rejected."""
+        registro = StudentRegistry()
+        registro.add(Aluno(nome="Alice", email="alice@example.com", senha="p1"))
+
+        with pytest.raises(ValueError):
+            registro.add(Aluno(nome="Other", email="ALICE@example.com", senha="p2"))
+        assert len(registro) == 1
+
+    def test_remove(self) -> None:
+        """Test that removal keeps list and index in sync."""
+        registro = StudentRegistry()
+        registro.add(Aluno(nome="Alice", email="alice@example.com", senha="p1"))
+
+        removido = registro.remove("alice@example.com")
+
+        assert removido.nome == "Alice"
+        assert len(registro) == 0
+        assert "alice@example.com" not in registro
+        with pytest.raises(KeyError):
+            registro.remove("alice@example.com")
+
+    def test_load_reindexes(self) -> None:
+        """Test that load replaces the roster and the index."""
+        registro = StudentRegistry()
+        registro.add(Aluno(nome="Alice", email="alice@example.com", senha="p1"))
+
+        registro.load([Aluno(nome="Bob", email="bob@example.com", senha="p2")])
+
+        assert "alice@example.com" not in registro
+        assert registro.get("bob@example.com") is not None
+
+    def test_autenticar(self) -> None:
+        """Test authentication by email and password."""
+        aluno = Aluno(nome="Alice", email="alice@example.com", senha="p1")
+        registro = StudentRegistry([aluno])
+
+        assert registro.autenticar("alice@example.com", "p1") is aluno
+        assert registro.autenticar("alice@example.com", "wrong") is None
+        assert registro.autenticar("bob@example.com", "p1") is None
+
 
 class TestGetDataPath:
     """Tests for get_data_path function."""
@@ -175,3 +364,1953 @@ class TestCarregarSalvarDados:
             assert os.path.exists(path)
             loaded = carregar_dados(path)
             assert len(loaded) == 1
+
+
+class TestJournal:
+    """Tests for the append-only journal persistence mode."""
+
+    def test_storage_mode_default_and_env(self) -> None:
+        """Test that the storage mode comes from PIM_STORAGE."""
+        assert get_storage_mode() == "json"
+        os.environ["PIM_STORAGE"] = "journal"
+        assert get_storage_mode() == "journal"
+        os.environ["PIM_STORAGE"] = "unknown"
+        assert get_storage_mode() == "json"
+
+    def test_journal_replayed_on_load(self) -> None:
+        """Test that journaled grades and registrations are replayed."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            alice = Aluno(nome="Alice", email="alice@example.com", senha="pass1")
+            salvar_dados([alice], path)
+
+            bob = Aluno(nome="Bob", email="bob@example.com", senha="pass2")
+            anexar_aluno(bob, path)
+            anexar_nota(alice, "TIC", 7.0, path)
+            anexar_nota(bob, "Ética", 9.0, path)
+
+            loaded = carregar_dados(path)
+
+            assert [a.nome for a in loaded] == ["Alice", "Bob"]
+            assert loaded[0].notas["TIC"] == [7.0]
+            assert loaded[1].notas["Ética"] == [9.0]
+
+    def test_journal_without_snapshot(self) -> None:
+        """Test that a journal is replayed even before the first snapshot."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            anexar_aluno(aluno, path)
+
+            loaded = carregar_dados(path)
+
+            assert len(loaded) == 1
+            assert not os.path.exists(path)
+
+    def test_salvar_discards_journal(self) -> None:
+        """Test that a full save folds the journal into the snapshot."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            anexar_aluno(aluno, path)
+            anexar_nota(aluno, "TIC", 5.0, path)
+
+            alunos = carregar_dados(path)
+            salvar_dados(alunos, path)
+
+            assert not get_journal_path(path).exists()
+            loaded = carregar_dados(path)
+            assert loaded[0].notas["TIC"] == [5.0]
+
+    def test_stale_journal_ignored(self) -> None:
+        """Test that a journal written against an older snapshot is not replayed."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            salvar_dados([aluno], path)
+            anexar_nota(aluno, "TIC", 5.0, path)
+            journal = get_journal_path(path).read_text(encoding="utf-8")
+
+            # Simulate a crash after the snapshot was rewritten with the grade
+            aluno.notas["TIC"].append(5.0)
+            salvar_dados([aluno], path)
+            get_journal_path(path).write_text(journal, encoding="utf-8")
+
+            loaded = carregar_dados(path)
+            assert loaded[0].notas["TIC"] == [5.0]
+
+    def test_torn_last_record_ignored(self) -> None:
+        """Test that an incomplete trailing record is skipped."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            anexar_aluno(aluno, path)
+            with open(get_journal_path(path), "a", encoding="utf-8") as f:
+                f.write('{"op": "nota", "ema')
+
+            loaded = carregar_dados(path)
+            assert len(loaded) == 1
+
+    def test_corrupt_journal_raises(self) -> None:
+        """Test that corruption in the middle of the journal raises DataLoadError."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            anexar_aluno(aluno, path)
+            with open(get_journal_path(path), "a", encoding="utf-8") as f:
+                f.write("not json\n")
+            anexar_nota(aluno, "TIC", 5.0, path)
+
+            with pytest.raises(DataLoadError):
+                carregar_dados(path)
+
+
+class TestCompactacao:
+    """Tests for journal compaction."""
+
+    def test_journal_stats(self) -> None:
+        """Test that journal statistics count change records."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            assert journal_stats(path).registros == 0
+
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            anexar_aluno(aluno, path)
+            anexar_nota(aluno, "TIC", 5.0, path)
+
+            stats = journal_stats(path)
+            assert stats.registros == 2
+            assert stats.bytes == get_journal_path(path).stat().st_size
+
+    def test_precisa_compactar_thresholds(self) -> None:
+        """Test each compaction trigger."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            nenhum = CompactionPolicy(None, None, None)
+            assert not precisa_compactar(CompactionPolicy(1, None, None), path)
+
+            anexar_aluno(aluno, path)
+
+            assert not precisa_compactar(nenhum, path)
+            assert precisa_compactar(CompactionPolicy(1, None, None), path)
+            assert not precisa_compactar(CompactionPolicy(2, None, None), path)
+            assert precisa_compactar(CompactionPolicy(None, 10, None), path)
+            assert precisa_compactar(CompactionPolicy(None, None, 0.0), path)
+
+    def test_policy_from_env(self) -> None:
+        """Test that thresholds can be configured through the environment."""
+        nomes = ("PIM_COMPACT_RECORDS", "PIM_COMPACT_SECONDS")
+        old = {k: os.environ.pop(k, None) for k in nomes}
+        try:
+            os.environ["PIM_COMPACT_RECORDS"] = "50"
+            os.environ["PIM_COMPACT_SECONDS"] = "0"
+            policy = CompactionPolicy.from_env()
+            assert policy.max_registros == 50
+            assert policy.max_segundos is None
+        finally:
+            for k, v in old.items():
+                os.environ.pop(k, None)
+                if v is not None:
+                    os.environ[k] = v
+
+    def test_compactar_journal(self) -> None:
+        """Test that compaction folds the journal into the snapshot."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            salvar_dados([aluno], path)
+            anexar_nota(aluno, "TIC", 5.0, path)
+            anexar_nota(aluno, "TIC", 6.0, path)
+
+            assert compactar_journal(path) == 2
+
+            assert not get_journal_path(path).exists()
+            with open(path, encoding="utf-8") as f:
+                assert json.load(f)[0]["notas"]["TIC"] == [5.0, 6.0]
+            assert compactar_journal(path) == 0
+
+    def test_compactar_journal_failure(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a failed compaction leaves no temporary file behind."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            salvar_dados([aluno], path)
+            anexar_nota(aluno, "TIC", 5.0, path)
+
+            def falhar(*args: object, **kwargs: object) -> int:
+                raise OSError("disk full")
+
+            monkeypatch.setattr("pim.io._escrever_alunos", falhar)
+            with pytest.raises(DataSaveError):
+                compactar_journal(path)
+
+            assert not os.path.exists(path + ".tmp")
+            assert get_journal_path(path).exists()
+
+    def test_compactador_background(self) -> None:
+        """Test that the background compactor folds the journal."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            anexar_aluno(aluno, path)
+
+            policy = CompactionPolicy(1, max_bytes=None, max_segundos=None)
+            with Compactador(path, policy, intervalo=0.01):
+                prazo = time.monotonic() + 5
+                while get_journal_path(path).exists() and time.monotonic() < prazo:
+                    time.sleep(0.01)
+
+            assert os.path.exists(path)
+            assert not get_journal_path(path).exists()
+            assert len(carregar_dados(path)) == 1
+
+
+class TestStorage:
+    """Tests for the storage backends."""
+
+    def test_abrir_storage_default_json(self) -> None:
+        """Test that JSON storage is the default backend."""
+        storage = abrir_storage()
+        assert isinstance(storage, JsonStorage)
+        assert not storage.journal
+
+    def test_abrir_storage_journal(self) -> None:
+        """Test that PIM_STORAGE=journal selects the journaled JSON backend."""
+        os.environ["PIM_STORAGE"] = "journal"
+        storage = abrir_storage()
+        assert isinstance(storage, JsonStorage)
+        assert storage.journal
+
+    def test_abrir_storage_sqlite_scheme(self) -> None:
+        """Test that the sqlite:// scheme selects the SQLite backend."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.environ["PIM_DATA_PATH"] = f"sqlite://{tmpdir}/alunos.db"
+            with abrir_storage() as storage:
+                assert isinstance(storage, SqliteStorage)
+                assert storage.path == Path(f"{tmpdir}/alunos.db")
+
+    def test_json_storage_roundtrip(self) -> None:
+        """Test registering through the JSON backend."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            storage = JsonStorage(path)
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            alunos = [aluno]
+            storage.registrar_aluno(aluno, alunos)
+            aluno.notas["TIC"].append(6.0)
+            storage.registrar_nota(aluno, "TIC", 6.0, alunos)
+
+            assert storage.carregar()[0].notas["TIC"] == [6.0]
+
+
+class TestSqliteStorage:
+    """Tests for the SQLite storage backend."""
+
+    def test_mode_from_suffix(self) -> None:
+        """Test that a database suffix selects SQLite without the scheme."""
+        os.environ["PIM_STORAGE"] = "journal"
+        assert get_storage_mode("data/alunos.db") == "sqlite"
+        assert get_storage_mode("data/alunos.sqlite3") == "sqlite"
+        assert get_storage_mode("data/alunos.json") == "journal"
+        os.environ["PIM_DATA_PATH"] = "data/alunos.db"
+        assert get_storage_mode() == "sqlite"
+
+    def test_salvar_and_carregar(self) -> None:
+        """Test saving and loading a roster."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with SqliteStorage(os.path.join(tmpdir, "alunos.db")) as storage:
+                alice = Aluno(nome="Alice", email="alice@example.com", senha="p1")
+                alice.notas["TIC"].extend([7.0, 8.0])
+                bob = Aluno(nome="Bob", email="bob@example.com", senha="p2")
+                storage.salvar([alice, bob])
+
+                loaded = storage.carregar()
+
+            assert [a.nome for a in loaded] == ["Alice", "Bob"]
+            assert loaded[0].notas["TIC"] == [7.0, 8.0]
+            assert loaded[1].notas["TIC"] == []
+
+    def test_registrar_aluno_and_nota(self) -> None:
+        """Test single-row registration and grade inserts."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.db")
+            with SqliteStorage(path) as storage:
+                aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+                storage.registrar_aluno(aluno, [aluno])
+                storage.registrar_nota(aluno, "Ética", 9.0, [aluno])
+                storage.registrar_nota(aluno, "Ética", 4.0, [aluno])
+
+            with SqliteStorage(path) as storage:
+                loaded = storage.carregar()
+
+            assert loaded[0].notas["Ética"] == [9.0, 4.0]
+
+    def test_duplicate_email_rejected(self) -> None:
+        """Test that the unique email index rejects duplicates."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with SqliteStorage(os.path.join(tmpdir, "alunos.db")) as storage:
+                aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+                storage.registrar_aluno(aluno, [aluno])
+
+                with pytest.raises(DataSaveError):
+                    storage.registrar_aluno(aluno, [aluno])
+
+    def test_nota_for_unknown_student(self) -> None:
+        """Test that a grade for a missing student raises DataSaveError."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with SqliteStorage(os.path.join(tmpdir, "alunos.db")) as storage:
+                aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+
+                with pytest.raises(DataSaveError):
+                    storage.registrar_nota(aluno, "TIC", 5.0, [aluno])
+
+    def test_schema(self) -> None:
+        """Test that grades are normalized by discipline."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.db")
+            with SqliteStorage(path) as storage:
+                aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+                aluno.notas["TIC"].append(5.0)
+                storage.salvar([aluno])
+
+            conexao = sqlite3.connect(path)
+            try:
+                assert conexao.execute("SELECT COUNT(*) FROM notas").fetchone() == (1,)
+                assert conexao.execute("SELECT nome FROM disciplinas").fetchall() == [
+                    ("TIC",)
+                ]
+            finally:
+                conexao.close()
+
+
+class TestCache:
+    """Tests for the binary snapshot cache."""
+
+    def _salvar(self, path: str) -> Aluno:
+        aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+        aluno.notas["TIC"].extend([5.0, 6.0])
+        salvar_dados([aluno], path)
+        return aluno
+
+    def test_cache_created_and_used(self) -> None:
+        """Test that the first load builds the cache and the next one uses it."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = self._salvar(path)
+
+            assert carregar_dados(path) == [aluno]
+            assert get_cache_path(path).exists()
+            assert carregar_dados(path) == [aluno]
+
+    def test_cache_keeps_grade_codes(self) -> None:
+        """Test that coded and float grade lists survive the cache."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            aluno.notas["TIC"].extend([5.0, 20 / 3])
+            aluno.notas["LGPD"].append(7.123)
+            salvar_dados([aluno], path)
+            carregar_dados(path)
+
+            carregado = carregar_dados(path)[0]
+
+            assert carregado == aluno
+            assert carregado.notas["TIC"].codigos is not None
+            assert carregado.notas["LGPD"].codigos is None
+
+    def test_cache_disabled_by_env(self) -> None:
+        """Test that PIM_CACHE=0 disables the cache."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            self._salvar(path)
+            os.environ["PIM_CACHE"] = "0"
+
+            carregar_dados(path)
+
+            assert not get_cache_path(path).exists()
+
+    def test_stale_cache_rebuilt(self) -> None:
+        """Test that a content change is detected despite equal size and mtime."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            self._salvar(path)
+            carregar_dados(path)
+
+            stat = os.stat(path)
+            with open(path, encoding="utf-8") as f:
+                conteudo = f.read()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(conteudo.replace('"Test"', '"Tost"'))
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+            assert carregar_dados(path)[0].nome == "Tost"
+            assert carregar_dados(path)[0].nome == "Tost"
+
+    def test_cache_hit_skips_hash(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that an unchanged, settled snapshot is not read on a cache hit."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = self._salvar(path)
+            antigo = time.time_ns() - 3600 * 10**9
+            os.utime(path, ns=(antigo, antigo))
+            carregar_dados(path)
+
+            def hash_arquivo(path: Path) -> str:
+                raise AssertionError(f"hashed {path}")
+
+            monkeypatch.setattr("pim.io._hash_arquivo", hash_arquivo)
+            assert carregar_dados(path) == [aluno]
+
+    def test_ambiguous_cache_hashed_once(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a cache written right after its snapshot is checked once."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = self._salvar(path)
+            antigo = time.time_ns() - 3600 * 10**9
+            os.utime(path, ns=(antigo, antigo))
+            carregar_dados(path)
+            cache = get_cache_path(path)
+            os.utime(cache, ns=(antigo, antigo))
+            hashes = []
+            hash_arquivo = pim.io._hash_arquivo
+            monkeypatch.setattr(
+                "pim.io._hash_arquivo", lambda p: hashes.append(p) or hash_arquivo(p)
+            )
+
+            assert carregar_dados(path) == [aluno]
+            assert carregar_dados(path) == [aluno]
+            assert hashes == [Path(path)]
+            assert cache.stat().st_mtime_ns > antigo
+
+    def test_corrupt_cache_ignored(self) -> None:
+        """Test that an unreadable cache falls back to the JSON file."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = self._salvar(path)
+            get_cache_path(path).write_bytes(b"PIMCACHE garbage")
+
+            assert carregar_dados(path) == [aluno]
+
+    def test_journal_replayed_over_cache(self) -> None:
+        """Test that the journal still applies to a snapshot loaded from cache."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = self._salvar(path)
+            carregar_dados(path)
+            anexar_nota(aluno, "TIC", 7.0, path)
+
+            assert carregar_dados(path)[0].notas["TIC"] == [5.0, 6.0, 7.0]
+
+
+class TestIterarAlunos:
+    """Tests for the streaming loader."""
+
+    def _alunos(self, quantidade: int) -> list[Aluno]:
+        alunos = []
+        for i in range(quantidade):
+            aluno = Aluno(nome=f"Aluno {i}", email=f"a{i}@example.com", senha="p")
+            aluno.notas["TIC"].append(float(i % 11))
+            alunos.append(aluno)
+        return alunos
+
+    def test_matches_carregar_dados(self) -> None:
+        """Test that streaming yields the same students as a full load."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            alunos = self._alunos(50)
+            salvar_dados(alunos, path)
+
+            assert list(iterar_alunos(path)) == alunos
+
+    def test_records_across_buffer_refills(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test records that span several read blocks."""
+        import pim.io
+
+        monkeypatch.setattr(pim.io, "_BLOCO_LEITURA", 7)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            alunos = self._alunos(5)
+            salvar_dados(alunos, path)
+
+            assert list(iterar_alunos(path)) == alunos
+
+    def test_empty_and_missing_files(self) -> None:
+        """Test an empty array and a missing file."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            assert list(iterar_alunos(path)) == []
+
+            with open(path, "w") as f:
+                f.write(" [ ] ")
+            assert list(iterar_alunos(path)) == []
+
+    def test_invalid_format_raises(self) -> None:
+        """Test that non-list and truncated files raise DataLoadError."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            with open(path, "w") as f:
+                json.dump({"not": "a list"}, f)
+            with pytest.raises(DataLoadError):
+                list(iterar_alunos(path))
+
+            with open(path, "w") as f:
+                f.write('[{"nome": "A", "email": "a@example.com"}, {"nome": ')
+            with pytest.raises(DataLoadError):
+                list(iterar_alunos(path))
+
+    def test_journal_applied(self) -> None:
+        """Test that journaled grades and registrations are streamed too."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            alunos = self._alunos(3)
+            salvar_dados(alunos, path)
+            novo = Aluno(nome="Novo", email="novo@example.com", senha="p")
+            anexar_nota(alunos[1], "Ética", 8.0, path)
+            anexar_aluno(novo, path)
+            anexar_nota(novo, "TIC", 2.0, path)
+            anexar_aluno(alunos[0], path)
+
+            streamed = list(iterar_alunos(path))
+
+            assert streamed == carregar_dados(path)
+            assert streamed[1].notas["Ética"] == [8.0]
+            assert streamed[-1].notas["TIC"] == [2.0]
+
+
+class TestJsonl:
+    """Tests for the JSON Lines format and its parallel loader."""
+
+    def _alunos(self, quantidade: int) -> list[Aluno]:
+        alunos = []
+        for i in range(quantidade):
+            aluno = Aluno(nome=f"Aluno {i}", email=f"a{i}@example.com", senha="p")
+            aluno.notas["LGPD"].extend([float(i % 11), 5.0])
+            alunos.append(aluno)
+        return alunos
+
+    def test_salvar_one_student_per_line(self) -> None:
+        """Test that .jsonl files hold one student per line."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.jsonl")
+            alunos = self._alunos(3)
+
+            salvar_dados(alunos, path)
+
+            with open(path, encoding="utf-8") as f:
+                linhas = f.read().splitlines()
+            assert len(linhas) == 3
+            assert json.loads(linhas[1])["email"] == "a1@example.com"
+            assert carregar_dados(path) == alunos
+            assert list(iterar_alunos(path)) == alunos
+
+    def test_parallel_load_preserves_order(self) -> None:
+        """Test that parallel parsing merges the byte ranges in order."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.jsonl")
+            alunos = self._alunos(101)
+            salvar_dados(alunos, path)
+
+            loaded = carregar_dados(path, usar_cache=False, processos=3)
+
+            assert loaded == alunos
+
+    def test_parallel_load_builds_cache(self) -> None:
+        """Test that a parallel load also keys the binary cache."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.jsonl")
+            alunos = self._alunos(10)
+            salvar_dados(alunos, path)
+
+            assert carregar_dados(path, usar_cache=True, processos=2) == alunos
+            assert carregar_dados(path, usar_cache=True) == alunos
+
+    def test_invalid_line_raises(self) -> None:
+        """Test that a corrupt line raises DataLoadError in both modes."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.jsonl")
+            salvar_dados(self._alunos(4), path)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("{ invalid json }\n")
+
+            with pytest.raises(DataLoadError):
+                carregar_dados(path, usar_cache=False)
+            with pytest.raises(DataLoadError):
+                carregar_dados(path, usar_cache=False, processos=2)
+
+    def test_compactar_keeps_format(self) -> None:
+        """Test that compaction rewrites a .jsonl snapshot as JSON Lines."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.jsonl")
+            alunos = self._alunos(2)
+            salvar_dados(alunos, path)
+            anexar_nota(alunos[0], "TIC", 9.0, path)
+
+            compactar_journal(path)
+
+            with open(path, encoding="utf-8") as f:
+                assert len(f.read().splitlines()) == 2
+            assert carregar_dados(path)[0].notas["TIC"] == [9.0]
+
+    def test_get_load_processes(self) -> None:
+        """Test the PIM_LOAD_PROCESSES setting."""
+        assert get_load_processes() == 1
+        os.environ["PIM_LOAD_PROCESSES"] = "4"
+        assert get_load_processes() == 4
+        os.environ["PIM_LOAD_PROCESSES"] = "many"
+        assert get_load_processes() == 1
+
+
+class TestSalvarRapido:
+    """Tests for the fast save layout."""
+
+    def _alunos(self) -> list[Aluno]:
+        alice = Aluno(nome="Alice", email="alice@example.com", senha="p1")
+        alice.notas["Ética"].extend([7.0, 8.5])
+        bob = Aluno(nome="Bob", email="bob@example.com", senha="p2")
+        return [alice, bob]
+
+    def test_fast_layout(self) -> None:
+        """Test one compact record per line without empty disciplines."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+
+            salvar_dados(self._alunos(), path, rapido=True)
+
+            with open(path, encoding="utf-8") as f:
+                linhas = f.read().splitlines()
+            assert linhas[0] == "["
+            assert linhas[-1] == "]"
+            registro = (
+                '{"nome":"Alice","email":"alice@example.com","senha":"p1",'
+                '"notas":{"Ética":[7.0,8.5]}}'
+            )
+            crc = zlib.crc32(registro.encode("utf-8"))
+            assert linhas[1] == registro[:-1] + f',"crc":"{crc:08x}"}},'
+            assert '"notas":{},"crc":"' in linhas[2]
+
+    def test_fast_layout_readable_by_loaders(self) -> None:
+        """Test that the fast layout loads back with every discipline."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            alunos = self._alunos()
+
+            salvar_dados(alunos, path, rapido=True)
+
+            loaded = carregar_dados(path, usar_cache=False)
+            assert loaded == alunos
+            assert loaded[1].notas["TIC"] == []
+            assert list(iterar_alunos(path)) == alunos
+
+    def test_empty_roster(self) -> None:
+        """Test the fast layout of an empty roster."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            salvar_dados([], path, rapido=True)
+            assert carregar_dados(path) == []
+
+    def test_save_mode_from_env(self) -> None:
+        """Test that PIM_SAVE_MODE=fast selects the fast layout."""
+        assert not is_fast_save_enabled()
+        os.environ["PIM_SAVE_MODE"] = "fast"
+        assert is_fast_save_enabled()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            salvar_dados(self._alunos(), path)
+            with open(path, encoding="utf-8") as f:
+                assert "    " not in f.read()
+
+    def test_record_shares_grade_floats(self) -> None:
+        """Test that the on-disk record reuses the decoded grade floats."""
+        aluno = self._alunos()[0]
+        registro = aluno._registro()["notas"]["Ética"]
+        assert type(registro) is list
+        assert registro == aluno.notas["Ética"]
+        assert all(a is b for a, b in zip(registro, aluno.notas["Ética"]))
+
+
+class _ContadorStorage(JsonStorage):
+    """JSON storage that records the batches it receives."""
+
+    def __init__(self, caminho: str, falhas: int = 0) -> None:
+        super().__init__(caminho)
+        self.lotes: list = []
+        self.falhas = falhas
+
+    def aplicar(self, alteracoes, alunos) -> None:
+        if self.falhas:
+            self.falhas -= 1
+            raise DataSaveError("disk full")
+        self.lotes.append(len(alteracoes))
+        super().aplicar(alteracoes, alunos)
+
+
+class TestWriteBehind:
+    """Tests for the write-behind group-commit storage."""
+
+    def test_burst_is_saved_in_one_batch(self) -> None:
+        """Test that changes queued within the window share one save."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            destino = _ContadorStorage(os.path.join(tmpdir, "alunos.json"))
+            storage = WriteBehindStorage(destino, latencia=60)
+            alunos = []
+            for i in range(5):
+                aluno = Aluno(nome=f"A{i}", email=f"a{i}@example.com", senha="p")
+                alunos.append(aluno)
+                storage.registrar_aluno(aluno, alunos)
+            assert storage.pendentes == 5
+
+            storage.flush()
+
+            assert destino.lotes == [5]
+            assert storage.pendentes == 0
+            assert len(destino.carregar()) == 5
+            storage.fechar()
+
+    def test_saved_within_latency(self) -> None:
+        """Test that the flusher saves on its own after the window."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            storage = WriteBehindStorage(JsonStorage(path), latencia=0.01)
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            storage.registrar_aluno(aluno, [aluno])
+
+            deadline = time.monotonic() + 5
+            while storage.pendentes and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            assert storage.pendentes == 0
+            assert carregar_dados(path) == [aluno]
+            storage.fechar()
+
+    def test_fechar_drains_queue(self) -> None:
+        """Test that closing saves every pending change."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            with WriteBehindStorage(JsonStorage(path), latencia=60) as storage:
+                storage.registrar_aluno(aluno, [aluno])
+                aluno.notas["TIC"].append(7.0)
+                storage.registrar_nota(aluno, "TIC", 7.0, [aluno])
+
+            assert carregar_dados(path)[0].notas["TIC"] == [7.0]
+            with pytest.raises(DataSaveError):
+                storage.registrar_nota(aluno, "TIC", 8.0, [aluno])
+
+    def test_registration_is_not_replayed_with_later_grades(self) -> None:
+        """Test that a grade given before the flush is journaled only once."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            destino = JsonStorage(path, journal=True)
+            with WriteBehindStorage(destino, latencia=60) as storage:
+                storage.registrar_aluno(aluno, [aluno])
+                aluno.notas["TIC"].append(7.0)
+                storage.registrar_nota(aluno, "TIC", 7.0, [aluno])
+
+            assert carregar_dados(path)[0].notas["TIC"] == [7.0]
+
+    def test_failed_batch_is_retried(self) -> None:
+        """Test that a rejected batch stays queued for the next attempt."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            destino = _ContadorStorage(os.path.join(tmpdir, "alunos.json"), falhas=1)
+            storage = WriteBehindStorage(destino, latencia=60)
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            storage.registrar_aluno(aluno, [aluno])
+
+            with pytest.raises(DataSaveError):
+                storage.flush()
+            assert storage.pendentes == 1
+
+            storage.flush()
+            assert destino.lotes == [1]
+            storage.fechar()
+
+    def test_journal_batch_is_one_append(self) -> None:
+        """Test that a batch lands in the journal after a single header."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            storage = JsonStorage(path, journal=True)
+            storage.aplicar([Alteracao(aluno), Alteracao(aluno, "TIC", 5.0)], [aluno])
+
+            with open(get_journal_path(path), encoding="utf-8") as f:
+                ops = [json.loads(linha)["op"] for linha in f]
+            assert ops == ["base", "aluno", "nota"]
+            assert carregar_dados(path)[0].notas["TIC"] == [5.0]
+
+    def test_sqlite_batch_is_atomic(self) -> None:
+        """Test that a SQLite batch is rolled back as a whole."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with SqliteStorage(os.path.join(tmpdir, "alunos.db")) as storage:
+                aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+                estranho = Aluno(nome="X", email="x@example.com", senha="x")
+
+                with pytest.raises(DataSaveError):
+                    storage.aplicar(
+                        [Alteracao(aluno), Alteracao(estranho, "TIC", 5.0)], [aluno]
+                    )
+                assert storage.carregar() == []
+
+                storage.aplicar(
+                    [Alteracao(aluno), Alteracao(aluno, "TIC", 5.0)], [aluno]
+                )
+                assert storage.carregar()[0].notas["TIC"] == [5.0]
+
+    def test_abrir_storage_from_env(self) -> None:
+        """Test that PIM_WRITE_BEHIND wraps the configured backend."""
+        assert get_write_behind_latency() is None
+        os.environ["PIM_WRITE_BEHIND"] = "250"
+        assert get_write_behind_latency() == 0.25
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.environ["PIM_DATA_PATH"] = f"sqlite://{tmpdir}/alunos.db"
+            with abrir_storage() as storage:
+                assert isinstance(storage, WriteBehindStorage)
+                assert isinstance(storage.destino, SqliteStorage)
+
+
+class TestDurabilidade:
+    """Tests for the durability levels of file writes."""
+
+    @pytest.fixture
+    def fsyncs(self, monkeypatch: pytest.MonkeyPatch) -> list:
+        """Record the file descriptors passed to os.fsync."""
+        chamadas: list = []
+        original = os.fsync
+
+        def fsync(fd: int) -> None:
+            chamadas.append(fd)
+            original(fd)
+
+        monkeypatch.setattr(os, "fsync", fsync)
+        return chamadas
+
+    def test_policy_from_env(self) -> None:
+        """Test the level and thresholds taken from the environment."""
+        assert DurabilityPolicy.from_env().nivel == "none"
+
+        os.environ["PIM_DURABILITY"] = "Batched"
+        os.environ["PIM_FSYNC_WRITES"] = "10"
+        os.environ["PIM_FSYNC_MS"] = "250"
+        policy = DurabilityPolicy.from_env()
+        assert (policy.nivel, policy.max_escritas, policy.max_segundos) == (
+            "batched",
+            10,
+            0.25,
+        )
+        assert DurabilityPolicy.from_env("strict").nivel == "strict"
+
+        os.environ["PIM_DURABILITY"] = "paranoid"
+        assert DurabilityPolicy.from_env().nivel == "none"
+        with pytest.raises(ValueError):
+            DurabilityPolicy.from_env("paranoid")
+
+    def test_none_does_not_fsync(self, fsyncs: list) -> None:
+        """Test that the default level leaves writes in the page cache."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            salvar_dados([], os.path.join(tmpdir, "alunos.json"))
+        assert fsyncs == []
+
+    def test_strict_replaces_atomically(self, fsyncs: list) -> None:
+        """Test that a strict save syncs the file and the directory."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            salvar_dados([aluno], path, durabilidade="strict")
+
+            assert carregar_dados(path) == [aluno]
+            assert not os.path.exists(path + ".tmp")
+            assert len(fsyncs) == 2
+
+    def test_strict_failure_keeps_old_file(self) -> None:
+        """Test that a failed strict save leaves the previous snapshot intact."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            salvar_dados([aluno], path)
+
+            def alunos():
+                yield aluno
+                raise ValueError("boom")
+
+            with pytest.raises(DataSaveError):
+                salvar_dados(alunos(), path, durabilidade="strict")
+
+            assert carregar_dados(path, usar_cache=False) == [aluno]
+            assert not os.path.exists(path + ".tmp")
+
+    def test_strict_journal_append(self, fsyncs: list) -> None:
+        """Test that strict journal appends are synced before returning."""
+        os.environ["PIM_DURABILITY"] = "strict"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            anexar_aluno(aluno, path)
+            anexar_nota(aluno, "TIC", 5.0, path)
+
+        # The new journal also syncs its directory
+        assert len(fsyncs) == 3
+
+    def test_batched_by_count(self, fsyncs: list) -> None:
+        """Test that batched writes are synced every max_escritas writes."""
+        os.environ["PIM_FSYNC_WRITES"] = "3"
+        os.environ["PIM_FSYNC_MS"] = "60000"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            storage = JsonStorage(path, durabilidade="batched")
+            storage.salvar([])
+            storage.salvar([])
+            assert fsyncs == []
+
+            storage.salvar([])
+            assert len(fsyncs) == 1
+
+            storage.salvar([])
+            storage.fechar()
+            assert len(fsyncs) == 2
+
+    def test_batched_by_time(self, fsyncs: list) -> None:
+        """Test that a batched write is synced once the time bound passes."""
+        os.environ["PIM_FSYNC_MS"] = "10"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            salvar_dados([], path, durabilidade="batched")
+
+            deadline = time.monotonic() + 5
+            while not fsyncs and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            assert len(fsyncs) == 1
+            sincronizar_pendentes()
+            assert len(fsyncs) == 1
+
+    def test_sqlite_synchronous(self) -> None:
+        """Test that the level maps to PRAGMA synchronous."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.db")
+            for nivel, esperado in (("none", 0), ("batched", 1), ("strict", 2)):
+                with SqliteStorage(path, durabilidade=nivel) as storage:
+                    conexao = storage._conexao
+                    (valor,) = conexao.execute("PRAGMA synchronous").fetchone()
+                assert valor == esperado
+
+
+def _registrar_notas(path: str, journal: bool, quantidade: int, nota: float) -> None:
+    """Give grades from a separate process, like a concurrent pim instance."""
+    storage = JsonStorage(path, journal=journal)
+    alunos = StudentRegistry()
+    alunos.load(storage.carregar())
+    for i in range(quantidade):
+        aluno = alunos[i % len(alunos)]
+        aluno.notas["TIC"].append(nota)
+        storage.registrar_nota(aluno, "TIC", nota, alunos)
+
+
+class TestConcorrencia:
+    """Tests for concurrent writers sharing a data file."""
+
+    def test_generation_counts_writes(self) -> None:
+        """Test that saves, appends and compactions bump the generation."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            assert get_generation(path) == 0
+
+            aluno = Aluno(nome="Test", email="test@example.com", senha="pass")
+            salvar_dados([aluno], path)
+            anexar_nota(aluno, "TIC", 5.0, path)
+            compactar_journal(path)
+
+            assert get_generation(path) == 3
+            assert get_lock_path(path).read_text() == "3"
+
+    def test_stale_writer_merges(self) -> None:
+        """Test that a writer behind the file merges instead of overwriting."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            ana = Aluno(nome="Ana", email="ana@example.com", senha="p")
+            ana.notas["TIC"].append(4.0)
+            salvar_dados([ana], path)
+
+            primeiro, segundo = JsonStorage(path), JsonStorage(path)
+            alunos1, alunos2 = primeiro.carregar(), segundo.carregar()
+
+            bia = Aluno(nome="Bia", email="bia@example.com", senha="p")
+            alunos1.append(bia)
+            primeiro.registrar_aluno(bia, alunos1)
+            alunos1[0].notas["TIC"].append(6.0)
+            primeiro.registrar_nota(alunos1[0], "TIC", 6.0, alunos1)
+
+            alunos2[0].notas["TIC"].append(9.0)
+            segundo.registrar_nota(alunos2[0], "TIC", 9.0, alunos2)
+
+            loaded = carregar_dados(path)
+            assert [a.email for a in loaded] == ["ana@example.com", "bia@example.com"]
+            assert loaded[0].notas["TIC"] == [4.0, 6.0, 9.0]
+            # The stale roster now holds the other writer's changes too
+            assert alunos2 == loaded
+
+    def test_merge_into_registry(self) -> None:
+        """Test that students registered elsewhere join the registry index."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            ana = Aluno(nome="Ana", email="ana@example.com", senha="p")
+            salvar_dados([ana], path)
+            storage = JsonStorage(path)
+            alunos = StudentRegistry()
+            alunos.load(storage.carregar())
+
+            bia = Aluno(nome="Bia", email="bia@example.com", senha="p")
+            salvar_dados([ana, bia], path)
+            alunos[0].notas["TIC"].append(7.0)
+            storage.registrar_nota(alunos[0], "TIC", 7.0, alunos)
+
+            assert alunos.get("bia@example.com") is not None
+            assert len(carregar_dados(path)) == 2
+
+    @pytest.mark.parametrize("journal", [False, True])
+    def test_concurrent_processes_keep_every_grade(self, journal: bool) -> None:
+        """Test that grades from several processes are all kept."""
+        if "fork" not in multiprocessing.get_all_start_methods():
+            pytest.skip("needs fork")
+        contexto = multiprocessing.get_context("fork")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            alunos = [
+                Aluno(nome=f"A{i}", email=f"a{i}@example.com", senha="p")
+                for i in range(3)
+            ]
+            salvar_dados(alunos, path)
+
+            processos = [
+                contexto.Process(
+                    target=_registrar_notas, args=(path, journal, 15, float(n))
+                )
+                for n in range(4)
+            ]
+            for processo in processos:
+                processo.start()
+            for processo in processos:
+                processo.join(30)
+                assert processo.exitcode == 0
+
+            loaded = carregar_dados(path)
+            notas = [nota for aluno in loaded for nota in aluno.notas["TIC"]]
+            esperadas = [float(n) for n in range(4) for _ in range(15)]
+            assert sorted(notas) == esperadas
+
+
+class TestShards:
+    """Tests for the sharded directory layout."""
+
+    @staticmethod
+    def _alunos(quantidade: int = 20) -> list:
+        alunos = []
+        for i in range(quantidade):
+            aluno = Aluno(nome=f"A{i}", email=f"a{i}@example.com", senha="p")
+            aluno.notas["TIC"].append(float(i % 11))
+            alunos.append(aluno)
+        return alunos
+
+    @staticmethod
+    def _por_email(alunos) -> list:
+        return sorted(alunos, key=lambda aluno: aluno.email)
+
+    def test_shard_de(self) -> None:
+        """Test that the shard is stable and ignores email case."""
+        assert shard_de("a1@example.com", 8) == shard_de(" A1@Example.com ", 8)
+        assert {shard_de(f"a{i}@example.com", 8) for i in range(100)} == set(range(8))
+
+    def test_reshard_file_into_directory(self) -> None:
+        """Test converting a data file into a sharded directory."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            arquivo = os.path.join(tmpdir, "alunos.json")
+            alunos = self._alunos()
+            salvar_dados(alunos, arquivo)
+
+            assert repartir(arquivo, shards=4) == 20
+
+            diretorio = Path(tmpdir) / "alunos"
+            assert is_sharded(diretorio)
+            assert len(list(diretorio.glob("shard-*.json"))) == 4
+            loaded = carregar_dados(str(diretorio))
+            assert self._por_email(loaded) == self._por_email(alunos)
+            assert self._por_email(iterar_alunos(str(diretorio))) == self._por_email(
+                alunos
+            )
+
+    def test_reshard_in_place(self) -> None:
+        """Test changing the shard count of a directory."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            diretorio = os.path.join(tmpdir, "alunos")
+            storage = ShardedStorage(diretorio, shards=2)
+            alunos = self._alunos()
+            storage.salvar(alunos)
+
+            repartir(diretorio, shards=5)
+
+            assert ShardedStorage(diretorio).shards == 5
+            loaded = carregar_dados(diretorio)
+            assert self._por_email(loaded) == self._por_email(alunos)
+            assert not os.path.exists(diretorio + ".tmp")
+            assert not os.path.exists(diretorio + ".old")
+
+    def test_change_rewrites_one_shard(self) -> None:
+        """Test that a grade rewrites only the shard of the student."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            diretorio = os.path.join(tmpdir, "alunos")
+            ShardedStorage(diretorio, shards=4).salvar(self._alunos())
+
+            storage = ShardedStorage(diretorio)
+            alunos = StudentRegistry()
+            alunos.load(storage.carregar())
+            arquivos = sorted(Path(diretorio).glob("shard-*.json"))
+            antes = [get_generation(str(arquivo)) for arquivo in arquivos]
+
+            aluno = alunos.get("a3@example.com")
+            aluno.notas["TIC"].append(10.0)
+            storage.registrar_nota(aluno, "TIC", 10.0, alunos)
+
+            depois = [get_generation(str(arquivo)) for arquivo in arquivos]
+            alterados = [i for i in range(4) if depois[i] != antes[i]]
+            assert alterados == [shard_de(aluno.email, 4)]
+            loaded = {a.email: a for a in carregar_dados(diretorio)}
+            assert loaded["a3@example.com"].notas["TIC"] == [3.0, 10.0]
+
+    def test_registration(self) -> None:
+        """Test registering students into an empty sharded directory."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            diretorio = os.path.join(tmpdir, "alunos")
+            alunos = []
+            with ShardedStorage(diretorio, shards=3) as storage:
+                for aluno in self._alunos(5):
+                    alunos.append(aluno)
+                    storage.registrar_aluno(aluno, alunos)
+
+            assert self._por_email(carregar_dados(diretorio)) == alunos
+
+    def test_write_behind_registration_keeps_grades(self) -> None:
+        """Test that a queued registration copy is not what the shard keeps."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            diretorio = os.path.join(tmpdir, "alunos")
+            alunos = StudentRegistry()
+            destino = ShardedStorage(diretorio, shards=2)
+            with WriteBehindStorage(destino, latencia=60) as storage:
+                aluno = Aluno(nome="Ana", email="ana@example.com", senha="p")
+                alunos.add(aluno)
+                storage.registrar_aluno(aluno, alunos)
+                storage.flush()
+                aluno.notas["TIC"].append(8.0)
+                storage.registrar_nota(aluno, "TIC", 8.0, alunos)
+
+            loaded = carregar_dados(diretorio)
+            assert [a.email for a in loaded] == ["ana@example.com"]
+            assert loaded[0].notas["TIC"] == [8.0]
+
+    def test_abrir_storage(self) -> None:
+        """Test selecting the sharded layout by mode or by directory."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.environ["PIM_DATA_PATH"] = os.path.join(tmpdir, "alunos")
+            os.environ["PIM_STORAGE"] = "sharded"
+            os.environ["PIM_SHARDS"] = "3"
+            storage = abrir_storage()
+            assert isinstance(storage, ShardedStorage)
+            assert storage.shards == 3
+
+            del os.environ["PIM_STORAGE"]
+            assert get_storage_mode() == "sharded"
+
+    def test_default_path(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that readers find a store saved at the sharded default path."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            monkeypatch.chdir(tmpdir)
+            os.environ["PIM_STORAGE"] = "sharded"
+            alunos = self._alunos(5)
+            with ShardedStorage(shards=2) as storage:
+                storage.salvar(alunos)
+
+            assert get_store_path() == DEFAULT_SHARD_PATH
+            assert is_sharded(DEFAULT_SHARD_PATH)
+            assert self._por_email(iterar_alunos()) == self._por_email(alunos)
+            assert self._por_email(carregar_dados()) == self._por_email(alunos)
+
+
+class TestStudentCache:
+    """Tests for the on-demand working set of students."""
+
+    @staticmethod
+    def _banco(tmpdir: str, quantidade: int = 10) -> str:
+        path = os.path.join(tmpdir, "alunos.db")
+        alunos = []
+        for i in range(quantidade):
+            aluno = Aluno(nome=f"A{i}", email=f"a{i}@example.com", senha=f"s{i}")
+            aluno.notas["TIC"].append(float(i))
+            alunos.append(aluno)
+        with SqliteStorage(path) as storage:
+            storage.salvar(alunos)
+        return path
+
+    @staticmethod
+    def _notas_no_banco(path: str, email: str) -> list:
+        with SqliteStorage(path) as storage:
+            return storage.buscar(email).notas["TIC"]
+
+    def test_buscar(self) -> None:
+        """Test loading one student by email, ignoring case."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with SqliteStorage(self._banco(tmpdir)) as storage:
+                aluno = storage.buscar(" A3@Example.COM")
+                assert aluno.nome == "A3"
+                assert aluno.notas["TIC"] == [3.0]
+                assert storage.buscar("nobody@example.com") is None
+
+    def test_bounded_residency(self) -> None:
+        """Test that only the most recently used students stay resident."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with StudentCache(SqliteStorage(self._banco(tmpdir)), 3) as alunos:
+                for i in range(6):
+                    assert alunos.autenticar(f"a{i}@example.com", f"s{i}") is not None
+                assert alunos.residentes == 3
+
+                recente = alunos.get("a5@example.com")
+                assert alunos.get("A5@example.com") is recente
+                assert "a0@example.com" in alunos
+                assert "nobody@example.com" not in alunos
+
+    def test_dirty_written_back_on_eviction(self) -> None:
+        """Test that changes reach the backend when their student is evicted."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._banco(tmpdir)
+            with StudentCache(SqliteStorage(path), 1) as alunos:
+                aluno = alunos.get("a1@example.com")
+                aluno.notas["TIC"].append(9.0)
+                alunos.registrar_nota(aluno, "TIC", 9.0, alunos)
+                assert self._notas_no_banco(path, "a1@example.com") == [1.0]
+
+                alunos.get("a2@example.com")
+                assert self._notas_no_banco(path, "a1@example.com") == [1.0, 9.0]
+
+    def test_add_written_back_on_close(self) -> None:
+        """Test that registrations are kept until the cache is closed."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._banco(tmpdir)
+            with StudentCache(SqliteStorage(path), 5) as alunos:
+                nova = Aluno(nome="Nova", email="nova@example.com", senha="p")
+                alunos.add(nova)
+                alunos.registrar_aluno(nova, alunos)
+                nova.notas["TIC"].append(5.0)
+                alunos.registrar_nota(nova, "TIC", 5.0, alunos)
+
+                with pytest.raises(ValueError):
+                    alunos.add(Aluno(nome="X", email="A9@example.com", senha="p"))
+
+            assert self._notas_no_banco(path, "nova@example.com") == [5.0]
+
+    def test_iteration(self) -> None:
+        """Test iterating the whole roster without evicting the working set."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with StudentCache(SqliteStorage(self._banco(tmpdir)), 2) as alunos:
+                residente = alunos.get("a3@example.com")
+                nova = Aluno(nome="Nova", email="nova@example.com", senha="p")
+                alunos.add(nova)
+
+                todos = list(alunos)
+
+                assert [a.email for a in todos][-1] == "nova@example.com"
+                assert len(todos) == 11
+                assert todos[3] is residente
+                assert alunos.residentes == 2
+
+    def test_requires_index(self) -> None:
+        """Test that a backend without an email index is rejected."""
+        with pytest.raises(ValueError):
+            StudentCache(JsonStorage())
+
+    def test_resident_limit_from_env(self) -> None:
+        """Test reading PIM_RESIDENT_STUDENTS."""
+        assert get_resident_limit() is None
+        os.environ["PIM_RESIDENT_STUDENTS"] = "500"
+        assert get_resident_limit() == 500
+
+
+class TestColunasNotas:
+    """Tests for the memory-mapped columnar grade file."""
+
+    @staticmethod
+    def _alunos() -> list:
+        return [
+            Aluno(nome="A", email="a@x.com", senha="p", notas={"TIC": [7.0, 8.0]}),
+            Aluno(nome="B", email="b@x.com", senha="p"),
+            Aluno(nome="C", email="c@x.com", senha="p", notas={"TIC": [9.0]}),
+        ]
+
+    def test_get_columns_path(self) -> None:
+        """Test that the columnar file sits next to the data file."""
+        assert get_columns_path("/tmp/alunos.json") == Path("/tmp/alunos.json.notas")
+
+    def test_round_trip_tenths(self) -> None:
+        """Test that quiz grades are stored as tenths and read back exactly."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json.notas")
+            alunos = self._alunos()
+            alunos[1].notas["LGPD"].append(3.3)
+            salvar_colunas(alunos, path)
+
+            with ColunasNotas(path) as colunas:
+                assert colunas.tipo == "B"
+                assert len(colunas) == 3
+                assert colunas.disciplinas == list(disciplinas)
+                assert list(colunas.notas("TIC")) == [7.0, 8.0, 9.0]
+                assert list(colunas.notas("TIC", 1)) == []
+                assert list(colunas.notas("TIC", 2)) == [9.0]
+                assert list(colunas.notas("LGPD")) == [3.3]
+                assert colunas.offsets("TIC").tolist() == [0, 2, 2, 3]
+                assert list(colunas.notas("Ética")) == []
+
+    def test_float32_fallback(self) -> None:
+        """Test that grades that are not tenths are stored as float32."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json.notas")
+            alunos = self._alunos()
+            alunos[0].notas["TIC"].append(20 / 3)
+            salvar_colunas(alunos, path)
+
+            with ColunasNotas(path) as colunas:
+                assert colunas.tipo == "f"
+                notas = colunas.notas("TIC", 0)
+                assert notas.tolist()[:2] == [7.0, 8.0]
+                assert notas[2] == pytest.approx(20 / 3, rel=1e-6)
+                del notas
+
+    def test_values_are_not_copied(self) -> None:
+        """Test that grades are served from the mapped file."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json.notas")
+            salvar_colunas(self._alunos(), path)
+
+            with ColunasNotas(path) as colunas:
+                valores = colunas.valores("TIC")
+                assert isinstance(valores, memoryview)
+                assert valores.readonly
+                assert valores.tolist() == [70, 80, 90]
+                valores.release()
+
+    def test_statistics_over_columns(self) -> None:
+        """Test that pim.core statistics run directly over a column."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json.notas")
+            salvar_colunas(self._alunos(), path)
+
+            with ColunasNotas(path) as colunas:
+                assert calcular_media(colunas.notas("TIC")) == 8.0
+                assert calcular_mediana(colunas.notas("TIC")) == 8.0
+
+    def test_from_streaming_loader(self) -> None:
+        """Test converting a roster without loading it, including new disciplines."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            arquivo = os.path.join(tmpdir, "alunos.json")
+            alunos = self._alunos()
+            alunos[2].notas["Robótica"] = [6.5]
+            salvar_dados(alunos, arquivo)
+
+            destino = str(get_columns_path(arquivo))
+            path = salvar_colunas(iterar_alunos(arquivo), destino)
+
+            with ColunasNotas(str(path)) as colunas:
+                assert colunas.disciplinas[-1] == "Robótica"
+                assert colunas.offsets("Robótica").tolist() == [0, 0, 0, 1]
+                assert list(colunas.notas("Robótica", 2)) == [6.5]
+
+    def test_unknown_discipline(self) -> None:
+        """Test that a missing discipline raises KeyError."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json.notas")
+            salvar_colunas(self._alunos(), path)
+
+            with ColunasNotas(path) as colunas:
+                with pytest.raises(KeyError):
+                    colunas.notas("Astronomia")
+                with pytest.raises(IndexError):
+                    colunas.notas("TIC", 3)
+
+    def test_invalid_file(self) -> None:
+        """Test that missing, foreign and truncated files raise DataLoadError."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json.notas")
+            with pytest.raises(DataLoadError):
+                ColunasNotas(path)
+
+            Path(path).write_bytes(b"[]")
+            with pytest.raises(DataLoadError):
+                ColunasNotas(path)
+
+            salvar_colunas(self._alunos(), path)
+            Path(path).write_bytes(Path(path).read_bytes()[:-8])
+            with pytest.raises(DataLoadError):
+                ColunasNotas(path)
+
+
+class TestCompressao:
+    """Tests for transparently compressed data files."""
+
+    @staticmethod
+    def _alunos() -> list:
+        alunos = []
+        for i in range(50):
+            aluno = Aluno(nome=f"A{i}", email=f"a{i}@example.com", senha="p")
+            aluno.notas["TIC"].append(float(i % 11))
+            alunos.append(aluno)
+        return alunos
+
+    @pytest.mark.parametrize(
+        "nome", ["alunos.json.gz", "alunos.json.xz", "alunos.jsonl.gz"]
+    )
+    def test_round_trip(self, nome: str) -> None:
+        """Test saving, loading and streaming compressed files."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, nome)
+            alunos = self._alunos()
+
+            salvar_dados(alunos, path)
+
+            codec = gzip if nome.endswith(".gz") else lzma
+            with codec.open(path, "rt", encoding="utf-8") as arquivo:
+                assert "a49@example.com" in arquivo.read()
+            assert carregar_dados(path, usar_cache=False) == alunos
+            assert carregar_dados(path, usar_cache=True) == alunos
+            assert carregar_dados(path, usar_cache=True) == alunos
+            assert list(iterar_alunos(path)) == alunos
+
+    def test_suffix_detection(self) -> None:
+        """Test that the format is detected under the compression suffix."""
+        assert is_compressed(Path("alunos.json.gz"))
+        assert is_compressed(Path("alunos.jsonl.xz"))
+        assert not is_compressed(Path("alunos.json"))
+        assert is_jsonl(Path("alunos.jsonl.gz"))
+        assert not is_jsonl(Path("alunos.json.gz"))
+
+    def test_parallel_load_falls_back_to_streaming(self) -> None:
+        """Test that a compressed JSON Lines file is read in one stream."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.jsonl.xz")
+            salvar_dados(self._alunos(), path)
+
+            assert carregar_dados(path, usar_cache=False, processos=4) == self._alunos()
+
+    def test_strict_durability(self) -> None:
+        """Test that a strict save leaves a complete compressed file."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json.gz")
+
+            salvar_dados(self._alunos(), path, durabilidade="strict")
+
+            assert carregar_dados(path, usar_cache=False) == self._alunos()
+            assert not list(Path(tmpdir).glob("*.tmp"))
+
+    def test_journal_compacted_into_compressed_file(self) -> None:
+        """Test that compaction rewrites the compressed snapshot."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json.gz")
+            alunos = self._alunos()
+            salvar_dados(alunos, path)
+            novo = Aluno(nome="Novo", email="novo@example.com", senha="p")
+            anexar_aluno(novo, path)
+
+            assert compactar_journal(path) == 1
+
+            assert carregar_dados(path, usar_cache=False) == alunos + [novo]
+            with gzip.open(path, "rt", encoding="utf-8") as arquivo:
+                assert "novo@example.com" in arquivo.read()
+
+    @pytest.mark.parametrize("nome", ["alunos.json.gz", "alunos.jsonl.xz"])
+    def test_corrupt_file(self, nome: str) -> None:
+        """Test that truncated and foreign files raise DataLoadError."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, nome)
+            salvar_dados(self._alunos(), path)
+            conteudo = Path(path).read_bytes()
+
+            Path(path).write_bytes(conteudo[: len(conteudo) // 2])
+            with pytest.raises(DataLoadError):
+                carregar_dados(path, usar_cache=False)
+
+            Path(path).write_bytes(b"[]")
+            with pytest.raises(DataLoadError):
+                list(iterar_alunos(path))
+
+
+class TestIntegridade:
+    """Tests for per-record checksums, verification and tolerant loads."""
+
+    @staticmethod
+    def _alunos() -> list:
+        alunos = []
+        for i in range(5):
+            aluno = Aluno(nome=f"A{i}", email=f"a{i}@example.com", senha="p")
+            aluno.notas["LGPD"].append(float(i))
+            alunos.append(aluno)
+        return alunos
+
+    @staticmethod
+    def _corromper(path: str, email: str) -> None:
+        """Flip a byte inside the record of the given student."""
+        conteudo = Path(path).read_bytes()
+        posicao = conteudo.index(email.encode()) + 1
+        danificado = conteudo[:posicao] + b"X" + conteudo[posicao + 1 :]
+        Path(path).write_bytes(danificado)
+
+    @pytest.mark.parametrize(
+        ("nome", "rapido"),
+        [("alunos.json", False), ("alunos.json", True), ("alunos.jsonl", False)],
+    )
+    def test_records_are_sealed(self, nome: str, rapido: bool) -> None:
+        """Test that every layout stores a checksum with each record."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, nome)
+            salvar_dados(self._alunos(), path, rapido=rapido)
+
+            assert Path(path).read_text(encoding="utf-8").count('"crc"') == 5
+            relatorio = verificar_dados(path)
+
+            assert relatorio.ok
+            assert relatorio.registros == 5
+            assert relatorio.sem_checksum == 0
+            assert relatorio.bytes == os.path.getsize(path)
+            assert carregar_dados(path, usar_cache=False) == self._alunos()
+
+    @pytest.mark.parametrize(
+        ("nome", "rapido"),
+        [("alunos.json", False), ("alunos.json", True), ("alunos.jsonl", False)],
+    )
+    def test_corrupt_record_reported(self, nome: str, rapido: bool) -> None:
+        """Test that verification pinpoints a damaged record."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, nome)
+            salvar_dados(self._alunos(), path, rapido=rapido)
+            self._corromper(path, "a2@example.com")
+
+            relatorio = verificar_dados(path)
+
+            assert not relatorio.ok
+            assert relatorio.registros == 4
+            [registro] = relatorio.corrompidos
+            assert registro.motivo == "checksum inválido"
+            assert "aX@example.com" in registro.conteudo
+
+    def test_legacy_records_without_checksum(self) -> None:
+        """Test that records written before checksums still verify."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            registros = [aluno.to_dict() for aluno in self._alunos()]
+            Path(path).write_text(json.dumps(registros, indent=2), encoding="utf-8")
+
+            relatorio = verificar_dados(path)
+
+            assert relatorio.ok
+            assert relatorio.registros == 5
+            assert relatorio.sem_checksum == 5
+
+    def test_truncated_record(self) -> None:
+        """Test that a record cut short is reported, the rest verifies."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.jsonl")
+            salvar_dados(self._alunos(), path)
+            linhas = Path(path).read_bytes().splitlines(keepends=True)
+            linhas[1] = linhas[1][:20] + b"\n"
+            Path(path).write_bytes(b"".join(linhas))
+
+            relatorio = verificar_dados(path)
+
+            assert relatorio.registros == 4
+            assert [r.linha for r in relatorio.corrompidos] == [2]
+
+    @pytest.mark.parametrize(
+        ("nome", "rapido"),
+        [
+            ("alunos.json", False),
+            ("alunos.json", True),
+            ("alunos.jsonl", False),
+            ("alunos.json.gz", False),
+        ],
+    )
+    def test_corrupt_record_after_checked_blocks(
+        self, monkeypatch: pytest.MonkeyPatch, nome: str, rapido: bool
+    ) -> None:
+        """Test that a record past blocks checked in bulk keeps its line."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            plano = os.path.join(tmpdir, nome.removesuffix(".gz"))
+            salvar_dados(self._alunos(), plano, rapido=rapido)
+            self._corromper(plano, "a3@example.com")
+            path = os.path.join(tmpdir, nome)
+            if path != plano:
+                Path(path).write_bytes(gzip.compress(Path(plano).read_bytes()))
+            esperado = verificar_dados(plano)
+
+            monkeypatch.setattr("pim.io._BLOCO_VERIFICACAO", 64)
+            relatorio = verificar_dados(path)
+
+            assert relatorio.registros == esperado.registros == 4
+            assert [r.linha for r in relatorio.corrompidos] == [
+                r.linha for r in esperado.corrompidos
+            ]
+            assert relatorio.corrompidos[0].linha > 1
+
+    def test_error_policy_fails_load(self) -> None:
+        """Test that a corrupt record fails a load by default."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            salvar_dados(self._alunos(), path)
+            with open(path, "a", encoding="utf-8") as arquivo:
+                arquivo.write("{lixo")
+
+            with pytest.raises(DataLoadError):
+                carregar_dados(path, usar_cache=False)
+
+    def test_skip_policy(self) -> None:
+        """Test that a tolerant load leaves the corrupt record out."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            salvar_dados(self._alunos(), path, rapido=True)
+            self._corromper(path, "a2@example.com")
+
+            alunos = carregar_dados(path, corrompidos="skip")
+
+            assert [a.email for a in alunos] == [
+                "a0@example.com",
+                "a1@example.com",
+                "a3@example.com",
+                "a4@example.com",
+            ]
+            assert not get_quarantine_path(path).exists()
+
+    def test_quarantine_policy(self) -> None:
+        """Test that quarantined records are copied to the quarantine file."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.jsonl")
+            salvar_dados(self._alunos(), path)
+            self._corromper(path, "a3@example.com")
+            os.environ["PIM_ON_CORRUPT"] = "quarantine"
+
+            alunos = carregar_dados(path)
+
+            assert len(alunos) == 4
+            [linha] = get_quarantine_path(path).read_text(encoding="utf-8").splitlines()
+            registro = json.loads(linha)
+            assert registro["linha"] == 4
+            assert registro["motivo"] == "checksum inválido"
+            assert "ts" in registro
+
+    def test_policy_from_environment(self) -> None:
+        """Test that PIM_ON_CORRUPT is validated."""
+        assert get_corrupt_policy() == "error"
+        os.environ["PIM_ON_CORRUPT"] = "SKIP"
+        assert get_corrupt_policy() == "skip"
+        os.environ["PIM_ON_CORRUPT"] = "unknown"
+        assert get_corrupt_policy() == "error"
+        with pytest.raises(ValueError):
+            carregar_dados("alunos.json", corrompidos="unknown")
+
+    def test_journal_records_sealed(self) -> None:
+        """Test that journal lines carry checksums and are verified."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            salvar_dados(self._alunos(), path)
+            novo = Aluno(nome="Novo", email="novo@example.com", senha="p")
+            anexar_aluno(novo, path)
+            anexar_nota(novo, "Ética", 9.0, path)
+
+            assert verificar_dados(path).registros == 7
+            journal = get_journal_path(path)
+            assert journal.read_text(encoding="utf-8").count('"crc"') == 2
+
+            self._corromper(str(journal), "novo@example.com")
+            relatorio = verificar_dados(path)
+
+            assert [r.arquivo for r in relatorio.corrompidos] == [str(journal)]
+            os.environ["PIM_ON_CORRUPT"] = "skip"
+            alunos = carregar_dados(path, usar_cache=False)
+            assert [a.email for a in alunos] == [a.email for a in self._alunos()]
+
+    def test_sharded_directory(self) -> None:
+        """Test that every shard of a directory is verified."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos")
+            with ShardedStorage(path, shards=4) as storage:
+                storage.salvar(self._alunos())
+
+            relatorio = verificar_dados(path)
+
+            assert relatorio.ok
+            assert relatorio.registros == 5
+
+    def test_sharded_default_path(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test verifying the sharded store at its default path."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            monkeypatch.chdir(tmpdir)
+            os.environ["PIM_STORAGE"] = "sharded"
+            with ShardedStorage(shards=2) as storage:
+                storage.salvar(self._alunos())
+
+            relatorio = verificar_dados()
+
+            assert relatorio.ok
+            assert relatorio.registros == 5
+
+    def test_sqlite_quick_check(self) -> None:
+        """Test that SQLite databases are checked with quick_check."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.db")
+            with SqliteStorage(path) as storage:
+                storage.salvar(self._alunos())
+
+            relatorio = verificar_dados(f"sqlite://{path}")
+
+            assert relatorio.ok
+            assert relatorio.registros == 5
+
+    def test_missing_store(self) -> None:
+        """Test that verifying nothing raises DataLoadError."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with pytest.raises(DataLoadError):
+                verificar_dados(os.path.join(tmpdir, "nada.json"))
+
+    def test_corrupt_record_tuple(self) -> None:
+        """Test the fields of a corrupt record description."""
+        registro = RegistroCorrompido("alunos.json", 3, "checksum inválido", "{}")
+        assert registro._asdict()["linha"] == 3
+
+
+class TestImportarCsv:
+    """Tests for bulk roster import from CSV."""
+
+    @staticmethod
+    def _csv(tmpdir: str, conteudo: str) -> str:
+        arquivo = os.path.join(tmpdir, "turma.csv")
+        Path(arquivo).write_text(conteudo, encoding="utf-8")
+        return arquivo
+
+    def test_import_new_students(self) -> None:
+        """Test that every valid row is registered in one save."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            arquivo = self._csv(
+                tmpdir,
+                "email,nome,senha,turma\n"
+                "a@example.com,Ana,p1,A\n"
+                'b@example.com,"Bia, da Silva",p2,B\n',
+            )
+            storage = _ContadorStorage(path)
+
+            relatorio = importar_csv(arquivo, storage)
+
+            assert relatorio.importados == 2
+            assert storage.lotes == [2]
+            alunos = carregar_dados(path, usar_cache=False)
+            assert [a.nome for a in alunos] == ["Ana", "Bia, da Silva"]
+            assert alunos[1].senha == "p2"
+
+    def test_duplicates_and_invalid_rows(self) -> None:
+        """Test that known emails are skipped and bad rows reported."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            existente = Aluno(nome="Ana", email="ana@example.com", senha="p")
+            existente.notas["LGPD"].append(7.0)
+            salvar_dados([existente], path)
+            arquivo = self._csv(
+                tmpdir,
+                "nome,email,senha\n"
+                "Ana,ANA@example.com ,x\n"
+                "Bia,bia@example.com,p\n"
+                "Bia de novo,Bia@Example.com,p\n"
+                ",cid@example.com,p\n"
+                "\n"
+                "Duda\n",
+            )
+
+            relatorio = importar_csv(arquivo, JsonStorage(path), lote=2)
+
+            assert relatorio.importados == 1
+            assert relatorio.duplicados == 2
+            assert relatorio.invalidos == [(5, "campo vazio"), (7, "colunas faltando")]
+            alunos = carregar_dados(path, usar_cache=False)
+            assert [a.email for a in alunos] == ["ana@example.com", "bia@example.com"]
+            assert alunos[0].notas["LGPD"] == [7.0]
+
+    def test_roster_updated_in_place(self) -> None:
+        """Test that a given roster receives the new students."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            arquivo = self._csv(tmpdir, "nome,email,senha\nAna,a@example.com,p\n")
+            registro = StudentRegistry()
+
+            with SqliteStorage(os.path.join(tmpdir, "alunos.db")) as storage:
+                importar_csv(arquivo, storage, registro)
+                assert [a.nome for a in storage.carregar()] == ["Ana"]
+
+            assert "a@example.com" in registro
+
+    def test_fresh_sharded_store(self) -> None:
+        """Test that students are written once into a sharded directory."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            linhas = "".join(f"A{i},a{i}@example.com,p\n" for i in range(10))
+            arquivo = self._csv(tmpdir, "nome,email,senha\n" + linhas)
+            diretorio = os.path.join(tmpdir, "alunos")
+
+            storage = ShardedStorage(diretorio, shards=2)
+            importar_csv(arquivo, storage, StudentRegistry())
+
+            emails = sorted(a.email for a in carregar_dados(diretorio))
+            assert emails == sorted(f"a{i}@example.com" for i in range(10))
+
+    def test_journal_mode_appends_once(self) -> None:
+        """Test that the journal receives the whole intake in one append."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            linhas = "".join(f"A{i},a{i}@example.com,p\n" for i in range(100))
+            arquivo = self._csv(tmpdir, "nome,email,senha\n" + linhas)
+
+            importar_csv(arquivo, JsonStorage(path, journal=True))
+
+            assert journal_stats(path).registros == 100
+            assert not Path(path).exists()
+            assert len(carregar_dados(path, usar_cache=False)) == 100
+
+    def test_bad_header(self) -> None:
+        """Test that a CSV without the required columns is rejected."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            arquivo = self._csv(tmpdir, "nome,email\nAna,a@example.com\n")
+            storage = JsonStorage(os.path.join(tmpdir, "alunos.json"))
+
+            with pytest.raises(DataLoadError, match="senha"):
+                importar_csv(arquivo, storage)
+            with pytest.raises(DataLoadError):
+                importar_csv(os.path.join(tmpdir, "nada.csv"), storage)
+
+
+class TestExportarDados:
+    """Tests for streaming exports of students and grades."""
+
+    @staticmethod
+    def _alunos() -> list[Aluno]:
+        ana = Aluno(nome="Ana", email="ana@example.com", senha="segredo")
+        ana.notas["LGPD"].extend([7.0, 8.0])
+        ana.notas["Ética"].append(10.0)
+        bia = Aluno(nome="Bia, da Silva", email="bia@example.com", senha="segredo")
+        return [ana, bia]
+
+    def _salvar(self, path: str) -> None:
+        salvar_dados(self._alunos(), path)
+
+    def test_csv_grade_rows(self) -> None:
+        """Test that every grade becomes a CSV row."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            destino = os.path.join(tmpdir, "notas.csv")
+            self._salvar(path)
+
+            assert exportar_dados(destino, path) == 3
+
+            assert Path(destino).read_text(encoding="utf-8") == (
+                "nome,email,disciplina,tentativa,nota\n"
+                "Ana,ana@example.com,LGPD,1,7.0\n"
+                "Ana,ana@example.com,LGPD,2,8.0\n"
+                "Ana,ana@example.com,Ética,1,10.0\n"
+            )
+            assert not Path(destino + ".tmp").exists()
+
+    def test_jsonl_with_columns_and_filter(self) -> None:
+        """Test column selection and the discipline filter in JSON Lines."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            destino = os.path.join(tmpdir, "notas.jsonl")
+            self._salvar(path)
+
+            exportar_dados(destino, path, colunas=["email", "nota"], apenas=["LGPD"])
+
+            linhas = Path(destino).read_text(encoding="utf-8").splitlines()
+            assert [json.loads(linha) for linha in linhas] == [
+                {"email": "ana@example.com", "nota": 7.0},
+                {"email": "ana@example.com", "nota": 8.0},
+            ]
+
+    def test_roster_rows(self) -> None:
+        """Test that student columns alone give one row per student."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            destino = os.path.join(tmpdir, "turma.csv.gz")
+            self._salvar(path)
+
+            assert exportar_dados(destino, path, colunas=["nome"]) == 2
+
+            with gzip.open(destino, "rt", encoding="utf-8") as arquivo:
+                assert arquivo.read() == 'nome\nAna\n"Bia, da Silva"\n'
+
+    def test_roster_rows_filtered_by_discipline(self) -> None:
+        """Test that the discipline filter selects the students of a roster."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            destino = os.path.join(tmpdir, "turma.csv")
+            self._salvar(path)
+
+            assert exportar_dados(destino, path, ["email"], apenas=["Ética"]) == 1
+            assert exportar_dados(destino, path, ["email"], apenas=["TIC"]) == 0
+
+    def test_missing_store(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a store missing at the default path is an error."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            monkeypatch.chdir(tmpdir)
+            os.environ["PIM_STORAGE"] = "sharded"
+
+            with pytest.raises(DataLoadError, match="does not exist"):
+                exportar_dados("notas.csv")
+            assert not Path("notas.csv").exists()
+
+            with ShardedStorage() as storage:
+                storage.salvar(self._alunos())
+            assert exportar_dados("notas.csv") == 3
+
+    def test_invalid_options(self) -> None:
+        """Test that unknown columns (passwords included) and formats fail."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "alunos.json")
+            destino = os.path.join(tmpdir, "x.csv")
+            self._salvar(path)
+
+            with pytest.raises(ValueError, match="senha"):
+                exportar_dados(destino, path, colunas=["nome", "senha"])
+            with pytest.raises(ValueError):
+                exportar_dados(destino, path, formato="xml")
+            assert not Path(destino).exists()
+
+    def test_export_from_sqlite_and_journal(self) -> None:
+        """Test exporting from SQLite and from journaled changes."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            banco = os.path.join(tmpdir, "alunos.db")
+            with SqliteStorage(banco) as storage:
+                ana = Aluno(nome="Ana", email="ana@example.com", senha="p")
+                bia = Aluno(nome="Bia", email="bia@example.com", senha="p")
+                storage.salvar([ana, bia])
+                storage.registrar_nota(bia, "TIC", 6.0, [ana, bia])
+                storage.registrar_nota(ana, "TIC", 9.0, [ana, bia])
+            destino = os.path.join(tmpdir, "sqlite.csv")
+
+            exportar_dados(destino, f"sqlite://{banco}", colunas=["nome", "nota"])
+
+            assert Path(destino).read_text().splitlines() == [
+                "nome,nota",
+                "Ana,9.0",
+                "Bia,6.0",
+            ]
+
+            path = os.path.join(tmpdir, "alunos.json")
+            self._salvar(path)
+            anexar_nota(bia, "TIC", 5.0, path)
+            destino = os.path.join(tmpdir, "journal.csv")
+
+            exportar_dados(destino, path, apenas=["TIC"])
+
+            assert Path(destino).read_text().splitlines()[1:] == [
+                '"Bia, da Silva",bia@example.com,TIC,1,5.0'
+            ]